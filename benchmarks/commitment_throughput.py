@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.merkle import CHUNK_SIZE, commit_tensors
+
+
+def run(megabytes, layers, chunk_size, workers_list, repeats=3, seed=0):
+    rng = np.random.default_rng(seed)
+    params = megabytes * 1024 * 1024 // 4
+    sizes = np.full(layers, params // layers)
+    sizes[-1] += params - sizes.sum()
+    tensors = [rng.standard_normal(int(size), dtype=np.float32) for size in sizes]
+    gigabytes = params * 4 / 1e9
+
+    results = {}
+    root = None
+    for workers in workers_list:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            commitment = commit_tensors(tensors, chunk_size=chunk_size, workers=workers)
+            best = min(best, time.perf_counter() - start)
+        if root is not None and commitment.root_hex != root:
+            raise RuntimeError("Commitment root depends on the number of workers")
+        root = commitment.root_hex
+        results[workers] = {'seconds': best, 'gb_per_second': gigabytes / best}
+        print(f"{workers:>3} workers: {best:7.3f}s  {gigabytes / best:6.2f} GB/s  ({len(commitment.leaves)} leaves)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merkle gradient commitment throughput benchmark')
+    parser.add_argument('--megabytes', type=int, default=1024, help='Total gradient size')
+    parser.add_argument('--layers', type=int, default=8)
+    parser.add_argument('--chunk-kb', type=int, default=CHUNK_SIZE // 1024)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Commitment over {args.megabytes} MB in {args.layers} tensors, {args.chunk_kb} KB leaves")
+    run(args.megabytes, args.layers, args.chunk_kb * 1024, args.workers, args.repeats)
+
+
+if __name__ == '__main__':
+    main()
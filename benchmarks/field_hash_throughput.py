@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.field_encoding import BLOCK_SIZE, FRACTION_BITS, field_elements, hash_blocks, to_blocks
+
+
+def run(parameters, max_blocks, workers_list, fraction_bits=FRACTION_BITS, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = rng.standard_normal(parameters, dtype=np.float32)
+
+    start = time.perf_counter()
+    blocks = to_blocks(field_elements([weights], fraction_bits))
+    quantize_seconds = time.perf_counter() - start
+    print(f"Quantization: {quantize_seconds:.3f}s for {parameters} parameters "
+          f"({parameters / quantize_seconds / 1e6:.1f} M parameters/s)")
+
+    # PoseidonChain hashing is timed on a prefix and projected to the full model
+    sample = blocks[:max_blocks] if max_blocks else blocks
+    results = {'quantize_seconds': quantize_seconds, 'blocks': len(blocks), 'workers': {}}
+    digests = None
+    for workers in workers_list:
+        start = time.perf_counter()
+        hashes = hash_blocks(sample, workers=workers)
+        seconds = time.perf_counter() - start
+        if digests is not None and hashes != digests:
+            raise RuntimeError("Block hashes depend on the number of workers")
+        digests = hashes
+        rate = len(sample) / seconds
+        results['workers'][workers] = {'blocks_per_second': rate, 'projected_seconds': len(blocks) / rate}
+        print(f"{workers:>3} workers: {rate:8.1f} blocks/s  ({len(blocks) / rate:8.1f}s projected for {len(blocks)} blocks)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Field quantization and Poseidon block hashing benchmark')
+    parser.add_argument('--parameters', type=int, default=1000000)
+    parser.add_argument('--max-blocks', type=int, default=400, help='Blocks hashed per run, 0 for all')
+    parser.add_argument('--fraction-bits', type=int, default=FRACTION_BITS)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    print(f"{args.parameters} parameters in blocks of {BLOCK_SIZE}")
+    run(args.parameters, args.max_blocks, args.workers, args.fraction_bits)
+
+
+if __name__ == '__main__':
+    main()
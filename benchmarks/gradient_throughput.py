@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.model_trainer import MICRO_BATCH_SIZE, ModelTrainer
+
+
+def run(samples, micro_batch_size, repeats=3, intra_op_threads=None, inter_op_threads=None, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.random((samples, 28, 28, 1), dtype=np.float32)
+    y = rng.integers(0, 10, samples)
+    trainer = ModelTrainer(micro_batch_size, intra_op_threads, inter_op_threads)
+
+    results = {}
+    reference = None
+    for mode, compiled in (('eager', False), ('compiled', True)):
+        # The first call traces the compiled step; it is not timed
+        trainer.get_gradients(x[:micro_batch_size], y[:micro_batch_size], compiled=compiled)
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            gradients = trainer.get_gradients(x, y, compiled=compiled)
+            best = min(best, time.perf_counter() - start)
+        flat = np.concatenate([np.ravel(g) for g in gradients])
+        if reference is not None and not np.allclose(flat, reference, atol=1e-5):
+            raise RuntimeError("Eager and compiled gradients differ")
+        reference = flat
+        results[mode] = {'seconds': best, 'samples_per_second': samples / best}
+        print(f"{mode:>9}: {best:7.3f}s  {samples / best:9.1f} samples/s")
+    print(f"Compiled speed-up: {results['eager']['seconds'] / results['compiled']['seconds']:.2f}x "
+          f"(retraces: {trainer.compiled_step.experimental_get_tracing_count()})")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Eager vs tf.function gradient throughput benchmark')
+    parser.add_argument('--samples', type=int, default=4096)
+    parser.add_argument('--micro-batch', type=int, default=MICRO_BATCH_SIZE)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--intra-op-threads', type=int, default=None)
+    parser.add_argument('--inter-op-threads', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"Gradients over {args.samples} samples in micro-batches of {args.micro_batch}")
+    run(args.samples, args.micro_batch, args.repeats, args.intra_op_threads, args.inter_op_threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.robust_aggregator import RobustAggregator, METHODS
+
+
+def run(participants, params, methods, workers, chunk_mb, spill_dir=None, seed=0):
+    rng = np.random.default_rng(seed)
+    results = {}
+    for method in methods:
+        aggregator = RobustAggregator(
+            method=method,
+            byzantine=max(0, participants // 10 - 1),
+            workers=workers,
+            capacity=participants,
+            chunk_bytes=chunk_mb * 1024 * 1024,
+            spill_dir=spill_dir
+        )
+        try:
+            start = time.perf_counter()
+            for _ in range(participants):
+                aggregator.add_update(rng.standard_normal(params, dtype=np.float32))
+            spill_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            aggregator.aggregate_flat()
+            elapsed = time.perf_counter() - start
+        finally:
+            aggregator.close()
+
+        gigabytes = participants * params * 4 / 1e9
+        results[method] = {
+            'spill_seconds': spill_time,
+            'aggregate_seconds': elapsed,
+            'gb_per_second': gigabytes / elapsed,
+            'params_per_second': params / elapsed
+        }
+        print(f"{method:>13}: {elapsed:8.2f}s  {gigabytes / elapsed:6.2f} GB/s  "
+              f"({params / elapsed / 1e6:.2f}M params/s, spill {spill_time:.1f}s)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Robust aggregation throughput benchmark')
+    parser.add_argument('--participants', type=int, default=1000)
+    parser.add_argument('--params', type=int, default=10_000_000)
+    parser.add_argument('--methods', nargs='+', default=list(METHODS), choices=METHODS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-mb', type=int, default=64)
+    parser.add_argument('--spill-dir', type=str, default=None, help='Directory for the update memmap (needs participants x params x 4 bytes)')
+    args = parser.parse_args()
+
+    print(f"Robust aggregation: {args.participants} participants x {args.params} parameters "
+          f"({args.participants * args.params * 4 / 1e9:.1f} GB), {args.workers} workers")
+    run(args.participants, args.params, args.methods, args.workers, args.chunk_mb, args.spill_dir)
+
+
+if __name__ == '__main__':
+    main()
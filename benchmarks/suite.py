@@ -0,0 +1,374 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.contracts import artifacts_available, get_contract
+from client.model_trainer import ModelTrainer
+from client.tx_engine import TransactionEngine
+from client.zk_prover import ZKProver
+from server.aggregator import Aggregator
+from server.ipfs_handler import IPFSHandler
+from server.ipfs_stub import IPFSStub
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Flat parameter counts of the model sizes in the grid
+MODEL_SIZES = {'small': 100_000, 'medium': 1_000_000, 'large': 10_000_000}
+
+# Gradients are split over this many tensors, like the layers of a model
+LAYERS = 8
+
+# Distinct gradients generated per case; participants beyond this reuse them
+GRADIENT_POOL = 10
+
+# Transactions sent per timed chain call
+TRANSACTIONS = 32
+
+
+class Benchmark:
+    """
+    One timed operation over a grid of parameters, asv style: `setup(**params)`
+    builds the state outside the timer, `func(state)` is what gets timed and
+    `teardown(state)` releases it. `work(**params)` gives the amount of work
+    per call in `unit`s, for a throughput figure next to the timings.
+    `requires()` returns the reason the benchmark cannot run here, or None.
+    """
+    def __init__(self, name, setup, func, params=None, teardown=None, work=None, unit=None, requires=None):
+        self.name = name
+        self.setup = setup
+        self.func = func
+        self.params = params or {}
+        self.teardown = teardown
+        self.work = work
+        self.unit = unit
+        self.requires = requires
+
+    def cases(self):
+        names = list(self.params)
+        for values in itertools.product(*(self.params[name] for name in names)):
+            yield dict(zip(names, values))
+
+
+def case_key(name, params):
+    return name + ''.join(f"[{key}={value}]" for key, value in params.items())
+
+
+def layer_tensors(params, seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = np.full(LAYERS, params // LAYERS)
+    sizes[-1] += params - sizes.sum()
+    return [rng.standard_normal(int(size), dtype=np.float32) for size in sizes]
+
+
+def _close(state):
+    for resource in state.get('close', []):
+        resource()
+
+
+# Aggregator.aggregate
+
+def aggregate_setup(model, participants, streaming):
+    pool = [layer_tensors(MODEL_SIZES[model], seed) for seed in range(min(participants, GRADIENT_POOL))]
+    return {'gradients': [pool[i % len(pool)] for i in range(participants)], 'streaming': streaming}
+
+
+def aggregate(state):
+    aggregator = Aggregator(streaming=state['streaming'])
+    for gradient in state['gradients']:
+        aggregator.add_gradient(gradient)
+    return aggregator.aggregate()
+
+
+# Gradient serialization through IPFSHandler against IPFSStub
+
+def ipfs_setup(model):
+    stub = IPFSStub().start()
+    handler = IPFSHandler(api_url=stub.api_url)
+    tensors = layer_tensors(MODEL_SIZES[model])
+    return {'ipfs': handler, 'tensors': tensors, 'cid': handler.add_tensors(tensors), 'close': [stub.stop]}
+
+
+def ipfs_add(state):
+    return state['ipfs'].add_tensors(state['tensors'])
+
+
+def ipfs_get(state):
+    return state['ipfs'].get_tensors(state['cid'])
+
+
+# ZKProver commitments
+
+def commitment_setup(model, workers):
+    return {'prover': ZKProver(workers=workers), 'tensors': layer_tensors(MODEL_SIZES[model])}
+
+
+def commitment(state):
+    return state['prover'].generate_gradient_proof(state['tensors'])
+
+
+# ModelTrainer.get_gradients
+
+def gradients_setup(samples, compiled):
+    rng = np.random.default_rng(0)
+    return {
+        'trainer': ModelTrainer(),
+        'x': rng.random((samples, 28, 28, 1), dtype=np.float32),
+        'y': rng.integers(0, 10, samples),
+        'compiled': compiled
+    }
+
+
+def gradients(state):
+    return state['trainer'].get_gradients(state['x'], state['y'], compiled=state['compiled'])
+
+
+# Chain I/O against an in-process eth-tester behind RPCStub
+
+def _missing_eth_tester():
+    try:
+        import eth_tester  # noqa: F401
+    except ImportError:
+        return 'eth-tester is not installed'
+    return None
+
+
+def _missing_contracts():
+    contracts = ('FedToken', 'ModelNFT', 'ZKVerifier', 'FedChainCore')
+    if not artifacts_available(contracts):
+        return f"no compiled artifacts for {', '.join(contracts)}"
+    return _missing_eth_tester()
+
+
+def transfer_setup(in_flight):
+    from server.simulation import LocalChain
+    chain = LocalChain()
+    return {'chain': chain, 'engine': TransactionEngine(chain.w3, poll_interval=0.01), 'in_flight': in_flight,
+            'recipient': chain.w3.eth.account.create().address, 'close': [chain.close]}
+
+
+def transfer(state):
+    engine, key = state['engine'], state['chain'].admin_key
+    for begin in range(0, TRANSACTIONS, state['in_flight']):
+        engine.wait([
+            engine.send({'to': state['recipient']}, key, gas=21000, value=1)
+            for _ in range(min(state['in_flight'], TRANSACTIONS - begin))
+        ])
+
+
+def _deployed_client(participants=1):
+    from client.blockchain_client import BlockchainClient
+    from server.simulation import LocalChain
+    chain = LocalChain()
+    address = chain.deploy(max(participants, 1), 3600, 'QmInitialModelHash')
+    client = BlockchainClient(chain.rpc_url, address)
+    return chain, client
+
+
+def transact_setup(in_flight):
+    chain, client = _deployed_client()
+    token = get_contract(client.w3, 'FedToken', chain.addresses['FedToken'])
+    return {'chain': chain, 'client': client, 'in_flight': in_flight,
+            'approve': token.functions.approve(client.contract_address, 1), 'close': [chain.close]}
+
+
+def transact(state):
+    client, key = state['client'], state['chain'].admin_key
+    if state['in_flight'] == 1:
+        # BlockchainClient.transact: one transaction per receipt
+        for _ in range(TRANSACTIONS):
+            client.transact(state['approve'], key)
+        return
+    engine = client.tx_engine
+    for begin in range(0, TRANSACTIONS, state['in_flight']):
+        engine.wait([
+            engine.send(state['approve'], key)
+            for _ in range(min(state['in_flight'], TRANSACTIONS - begin))
+        ])
+
+
+def reads_setup(participants, cached):
+    from server.simulation import participant_keys
+    chain, client = _deployed_client(participants)
+    addresses = [client.w3.eth.account.from_key(key).address for key in participant_keys(participants)]
+    return {'chain': chain, 'client': client, 'addresses': addresses,
+            'block': None if cached else 'latest', 'close': [chain.close]}
+
+
+def reads(state):
+    # A round check as the orchestrator does it: every participant and the round
+    client = state['client']
+    client.get_participants(state['addresses'], state['block'])
+    return client.get_rounds([client.get_current_round()], state['block'])
+
+
+def suite(models, participants, samples, workers):
+    return [
+        Benchmark('aggregate', aggregate_setup, aggregate,
+                  params={'model': models, 'participants': participants, 'streaming': [False, True]},
+                  work=lambda model, participants, streaming: participants * MODEL_SIZES[model], unit='params'),
+        Benchmark('ipfs_add_tensors', ipfs_setup, ipfs_add, params={'model': models}, teardown=_close,
+                  work=lambda model: MODEL_SIZES[model] * 4, unit='bytes'),
+        Benchmark('ipfs_get_tensors', ipfs_setup, ipfs_get, params={'model': models}, teardown=_close,
+                  work=lambda model: MODEL_SIZES[model] * 4, unit='bytes'),
+        Benchmark('commitment', commitment_setup, commitment, params={'model': models, 'workers': workers},
+                  work=lambda model, workers: MODEL_SIZES[model] * 4, unit='bytes'),
+        Benchmark('get_gradients', gradients_setup, gradients, params={'samples': samples, 'compiled': [False, True]},
+                  work=lambda samples, compiled: samples, unit='samples'),
+        Benchmark('tx_transfer', transfer_setup, transfer, params={'in_flight': [1, TRANSACTIONS]}, teardown=_close,
+                  work=lambda in_flight: TRANSACTIONS, unit='tx', requires=_missing_eth_tester),
+        Benchmark('chain_transact', transact_setup, transact, params={'in_flight': [1, TRANSACTIONS]}, teardown=_close,
+                  work=lambda in_flight: TRANSACTIONS, unit='tx', requires=_missing_contracts),
+        Benchmark('chain_reads', reads_setup, reads, params={'participants': participants, 'cached': [False, True]},
+                  teardown=_close, work=lambda participants, cached: participants + 2, unit='calls',
+                  requires=_missing_contracts),
+    ]
+
+
+def time_case(benchmark, params, repeats, warmup=1):
+    """
+    Run one parameter combination: untimed warm-up calls (tracing, connection
+    set-up, caches), then `repeats` timed calls.
+    """
+    state = benchmark.setup(**params)
+    try:
+        for _ in range(warmup):
+            benchmark.func(state)
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            benchmark.func(state)
+            times.append(time.perf_counter() - start)
+    finally:
+        if benchmark.teardown:
+            benchmark.teardown(state)
+
+    result = {
+        'benchmark': benchmark.name,
+        'params': params,
+        'repeats': repeats,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0
+    }
+    if benchmark.work:
+        result['unit'] = benchmark.unit
+        result['per_second'] = benchmark.work(**params) / result['median']
+    return result
+
+
+def environment():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def run(benchmarks, repeats, name_filter=None):
+    results = {}
+    for benchmark in benchmarks:
+        if name_filter and not any(pattern in benchmark.name for pattern in name_filter):
+            continue
+        reason = benchmark.requires() if benchmark.requires else None
+        for params in benchmark.cases():
+            key = case_key(benchmark.name, params)
+            if reason:
+                results[key] = {'benchmark': benchmark.name, 'params': params, 'skipped': reason}
+                print(f"{key:<60} skipped: {reason}")
+                continue
+            result = time_case(benchmark, params, repeats)
+            results[key] = result
+            rate = f"  {result['per_second']:12.4g} {result['unit']}/s" if 'per_second' in result else ''
+            print(f"{key:<60} {result['median'] * 1e3:10.2f} ms{rate}")
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current, threshold=1.2):
+    """
+    Median time ratio current / baseline of every case timed in both runs.
+    Returns the keys whose ratio exceeds `threshold`.
+    """
+    regressions = []
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key)
+        if not before or 'median' not in before or 'median' not in result:
+            continue
+        ratio = result['median'] / before['median']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        elif ratio < 1 / threshold:
+            flag = '  improved'
+        print(f"{key:<60} {before['median'] * 1e3:10.2f} -> {result['median'] * 1e3:10.2f} ms  {ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite with JSON results for regression tracking')
+    parser.add_argument('--models', nargs='+', default=['small', 'medium'], choices=list(MODEL_SIZES))
+    parser.add_argument('--participants', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--samples', type=int, nargs='+', default=[256, 1024], help='Samples per get_gradients call')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1], help='Commitment worker counts')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--filter', nargs='+', default=None, help='Only run benchmarks whose name contains one of these')
+    parser.add_argument('--quick', action='store_true', help='Smallest grid and 2 repeats, e.g. as a smoke test')
+    parser.add_argument('--output', type=str, default=None, help=f'Results file (default {RESULTS_DIR}/<commit>.json)')
+    parser.add_argument('--load', type=str, default=None, help='Compare an existing results file instead of running')
+    parser.add_argument('--baseline', type=str, default=None, help='Results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load) as f:
+            current = json.load(f)
+    else:
+        if args.quick:
+            args.models, args.participants, args.samples, args.repeats = ['small'], [10], [256], 2
+        benchmarks = suite(args.models, args.participants, args.samples, args.workers)
+        current = run(benchmarks, args.repeats, args.filter)
+        output = args.output
+        if output is None:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            commit = (current['environment']['commit'] or 'unknown')[:12]
+            output = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if current['environment']['dirty'] else ''}.json")
+        with open(output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Against {args.baseline} ({(baseline['environment'].get('commit') or 'unknown')[:12]}):")
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.2f}x")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
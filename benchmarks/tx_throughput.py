@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3
+from client.tx_engine import TransactionEngine, raw_transaction
+
+
+def serial_send(w3, account, recipient, count):
+    # The per-transaction pattern BlockchainClient used before TransactionEngine
+    for _ in range(count):
+        tx = {
+            'from': account.address,
+            'to': recipient,
+            'value': 1,
+            'nonce': w3.eth.get_transaction_count(account.address),
+            'gas': w3.eth.estimate_gas({'from': account.address, 'to': recipient, 'value': 1}),
+            'gasPrice': w3.eth.gas_price,
+            'chainId': w3.eth.chain_id
+        }
+        tx_hash = w3.eth.send_raw_transaction(raw_transaction(account.sign_transaction(tx)))
+        w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=0.01)
+
+
+def pipelined_send(w3, account, recipient, count, in_flight):
+    engine = TransactionEngine(w3, poll_interval=0.01)
+    for begin in range(0, count, in_flight):
+        tx_hashes = [
+            engine.send({'to': recipient, 'value': 1}, account.key)
+            for _ in range(min(in_flight, count - begin))
+        ]
+        engine.wait(tx_hashes)
+    return engine.stats
+
+
+def run(w3, account, count, in_flight):
+    recipient = w3.eth.account.create().address
+    results = {}
+    for mode in ('serial', 'pipelined'):
+        start = time.perf_counter()
+        if mode == 'serial':
+            serial_send(w3, account, recipient, count)
+        else:
+            pipelined_send(w3, account, recipient, count, in_flight)
+        elapsed = time.perf_counter() - start
+        results[mode] = {'seconds': elapsed, 'tx_per_second': count / elapsed}
+        print(f"{mode:>10}: {elapsed:7.2f}s  {count / elapsed:8.1f} tx/s")
+    return results
+
+
+def funded_tester_account():
+    from web3 import EthereumTesterProvider
+    w3 = Web3(EthereumTesterProvider())
+    account = w3.eth.account.create()
+    tx_hash = w3.eth.send_transaction({'from': w3.eth.accounts[0], 'to': account.address, 'value': 10 ** 20})
+    w3.eth.wait_for_transaction_receipt(tx_hash)
+    return w3, account
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transaction submission throughput benchmark')
+    parser.add_argument('--transactions', type=int, default=500)
+    parser.add_argument('--in-flight', type=int, default=50, help='Transactions sent before awaiting receipts')
+    parser.add_argument('--rpc-url', type=str, default=None, help='Node to use (e.g. anvil); defaults to in-process eth-tester')
+    parser.add_argument('--private-key', type=str, default=None, help='Funded account key, required with --rpc-url')
+    args = parser.parse_args()
+
+    if args.rpc_url:
+        if not args.private_key:
+            parser.error('--private-key is required with --rpc-url')
+        w3 = Web3(Web3.HTTPProvider(args.rpc_url))
+        account = w3.eth.account.from_key(args.private_key)
+    else:
+        w3, account = funded_tester_account()
+
+    print(f"Transaction throughput: {args.transactions} transfers, {args.in_flight} in flight")
+    run(w3, account, args.transactions, args.in_flight)
+
+
+if __name__ == '__main__':
+    main()
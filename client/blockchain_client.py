@@ -1,59 +1,106 @@
 import os
-import json
-from web3 import Web3
+from collections import namedtuple
+import requests
 from dotenv import load_dotenv
+from common import metrics
+from client.contracts import get_contract
+from client.lazy import LazyModule
+from client.read_cache import BlockReadCache
+from client.rpc_batch import BatchCaller
+from client.tx_engine import TransactionEngine
+
+web3 = LazyModule('web3')
 
 load_dotenv()
 
+# FedChainCore getters whose values are fixed at deployment
+IMMUTABLE_GETTERS = ('fedToken', 'modelNFT', 'zkVerifier', 'minParticipants', 'roundDuration', 'stakingAmount')
+
+# Gas limit of submitGradient(). Not estimated: the submission that reaches
+# minParticipants also finalizes the round and costs far more than the others
+SUBMIT_GRADIENT_GAS = int(os.getenv('SUBMIT_GRADIENT_GAS', '2000000'))
+
+# Decoded FedChainCore getters, as returned by the batch reads
+ParticipantInfo = namedtuple('ParticipantInfo', [
+    'address', 'is_registered', 'staked_amount', 'total_rewards', 'last_active_round'
+])
+RoundInfo = namedtuple('RoundInfo', [
+    'round_id', 'start_time', 'end_time', 'finalized', 'result_model_ipfs_hash', 'participant_count'
+])
+
 class BlockchainClient:
     def __init__(self, node_url=None, contract_address=None):
-        self.w3 = Web3(Web3.HTTPProvider(
-            node_url or os.getenv('ETHEREUM_NODE_URL', 'http://localhost:7545')
+        # JSON-RPC traffic is counted when metrics are enabled
+        self.w3 = web3.Web3(web3.Web3.HTTPProvider(
+            node_url or os.getenv('ETHEREUM_NODE_URL', 'http://localhost:7545'),
+            session=metrics.instrument_rpc(requests.Session())
         ))
         
-        with open('build/contracts/FedChainCore.json') as f:
-            contract_data = json.load(f)
-            self.contract_abi = contract_data['abi']
-        
+        # ABIs are parsed once per process
         self.contract_address = contract_address or os.getenv('CONTRACT_ADDRESS')
-        self.contract = self.w3.eth.contract(
-            address=self.contract_address,
-            abi=self.contract_abi
-        )
+        self.contract = get_contract(self.w3, 'FedChainCore', self.contract_address)
+        self.contract_abi = self.contract.abi
+        self.tx_engine = TransactionEngine(self.w3)
+        self.batch = BatchCaller(self.w3)
+        self.read_cache = BlockReadCache(self.w3, pinned=IMMUTABLE_GETTERS)
+
+    def transact(self, function, private_key, gas=None):
+        engine = self.tx_engine
+        receipt = engine.wait([engine.send(function, private_key, gas)])[0]
+        # Our own transaction changed state: reads must not be served from
+        # before its block
+        self.read_cache.observe_block(receipt['blockNumber'])
+        return engine.check(receipt)
 
     def register_participant(self, address, private_key):
-        nonce = self.w3.eth.get_transaction_count(address)
-        txn = self.contract.functions.register().build_transaction({
-            'from': address,
-            'nonce': nonce,
-            'gas': 2000000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-        signed_txn = self.w3.eth.account.sign_transaction(txn, private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        return self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        return self.transact(self.contract.functions.register(), private_key)
+
+    def read(self, function):
+        return self.read_cache.call(function)
 
     def get_current_round(self):
-        return self.contract.functions.roundId().call()
+        return self.read(self.contract.functions.roundId())
 
-    def submit_gradient(self, address, private_key, round_id, gradient_ipfs_hash, zk_proof, public_inputs):
-        nonce = self.w3.eth.get_transaction_count(address)
-        
-        proof_bytes = Web3.to_bytes(hexstr=zk_proof)
-        inputs_bytes = Web3.to_bytes(hexstr=public_inputs)
+    def get_current_model(self):
+        return self.read(self.contract.functions.currentModelIpfsHash())
+
+    def get_min_participants(self):
+        return self.read(self.contract.functions.minParticipants())
+
+    def batch_call(self, functions, block_identifier=None):
+        """
+        Read several contract values in one round-trip. Without an explicit
+        block the reads go through the block-keyed read cache.
+        """
+        if block_identifier is None:
+            return self.read_cache.call_many(functions, fetch=self.batch.call)
+        return self.batch.call(functions, block_identifier)
+
+    def get_participants(self, addresses, block_identifier=None):
+        addresses = list(addresses)
+        results = self.batch_call([self.contract.functions.participants(a) for a in addresses], block_identifier)
+        return [ParticipantInfo(address, *result) for address, result in zip(addresses, results)]
+
+    def get_rounds(self, round_ids, block_identifier=None):
+        round_ids = list(round_ids)
+        results = self.batch_call([self.contract.functions.rounds(i) for i in round_ids], block_identifier)
+        return [RoundInfo(round_id, *result) for round_id, result in zip(round_ids, results)]
+
+    def get_round_participants(self, round_ids, block_identifier=None):
+        round_ids = list(round_ids)
+        functions = [self.contract.functions.getRoundParticipants(i) for i in round_ids]
+        return dict(zip(round_ids, self.batch_call(functions, block_identifier)))
+
+    def submit_gradient(self, address, private_key, round_id, gradient_ipfs_hash, zk_proof, public_inputs, wait=True):
+        proof_bytes = web3.Web3.to_bytes(hexstr=zk_proof)
+        inputs_bytes = web3.Web3.to_bytes(hexstr=public_inputs)
         
         txn = self.contract.functions.submitGradient(
             round_id,
             gradient_ipfs_hash,
             proof_bytes,
             inputs_bytes
-        ).build_transaction({
-            'from': address,
-            'nonce': nonce,
-            'gas': 2000000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-        
-        signed_txn = self.w3.eth.account.sign_transaction(txn, private_key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        return self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        )
+        if not wait:
+            return self.tx_engine.send(txn, private_key, gas=SUBMIT_GRADIENT_GAS)
+        return self.transact(txn, private_key, gas=SUBMIT_GRADIENT_GAS)
@@ -0,0 +1,142 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Largest chunk of a tensor stored as one IPFS object; smaller tensors are one chunk
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _bytes(tensor):
+    # A flat uint8 view of the tensor's buffer (a copy only if not contiguous)
+    return np.ascontiguousarray(tensor).reshape(-1).view(np.uint8)
+
+
+def _chunks(tensor, chunk_size):
+    data = memoryview(_bytes(tensor))
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+    if not len(data):
+        yield data
+
+
+class ChunkedStore:
+    """
+    Tensors stored as a manifest plus content-addressed chunks. Each tensor
+    is cut into chunks of at most `chunk_size` bytes, each chunk is its own
+    IPFS object, and the manifest (a tensor container without tensors)
+    lists the dtype, shape and chunk CIDs and SHA-256 digests of every
+    tensor in its metadata.
+
+    A chunk that did not change, e.g. of a frozen layer, keeps its CID, so
+    IPFS and the local IPFSCache hold it once. put() does not upload chunks
+    this store has uploaded before. get() with `have` (the tensors the
+    client holds) only downloads chunks whose digests differ, concurrently
+    over the handler's connection pool.
+    """
+    def __init__(self, ipfs_handler, chunk_size=None, max_concurrency=None):
+        self.ipfs_handler = ipfs_handler
+        self.chunk_size = chunk_size or int(os.getenv('MODEL_CHUNK_SIZE', str(CHUNK_SIZE)))
+        self.max_concurrency = max_concurrency or getattr(ipfs_handler, 'max_concurrency', 8)
+        # SHA-256 -> CID of the chunks put() has uploaded
+        self.uploaded = {}
+        self.stats = {'chunks_uploaded': 0, 'chunks_skipped': 0, 'chunks_fetched': 0, 'chunks_reused': 0,
+                      'bytes_uploaded': 0, 'bytes_fetched': 0}
+
+    @staticmethod
+    def is_manifest(meta):
+        return 'chunked' in (meta or {})
+
+    def put(self, tensors, meta=None):
+        """
+        Store `tensors` and return the CID of their manifest.
+        """
+        chunk_size = self.chunk_size
+        entries = []
+        pending = {}
+        for tensor in tensors:
+            tensor = np.asarray(tensor)
+            chunks = []
+            for chunk in _chunks(tensor, chunk_size):
+                digest = _digest(chunk)
+                chunks.append({'sha256': digest, 'nbytes': len(chunk)})
+                if digest in self.uploaded:
+                    self.stats['chunks_skipped'] += 1
+                else:
+                    pending.setdefault(digest, chunk)
+            entries.append({'dtype': tensor.dtype.str, 'shape': list(tensor.shape), 'chunks': chunks})
+
+        if pending:
+            workers = min(self.max_concurrency, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                cids = pool.map(lambda chunk: self.ipfs_handler.add_bytes(chunk, name='chunk.bin'), pending.values())
+                for (digest, chunk), cid in zip(pending.items(), cids):
+                    self.uploaded[digest] = cid
+                    self.stats['chunks_uploaded'] += 1
+                    self.stats['bytes_uploaded'] += len(chunk)
+
+        for entry in entries:
+            for chunk in entry['chunks']:
+                chunk['cid'] = self.uploaded[chunk['sha256']]
+        manifest = dict(meta or {})
+        manifest['chunked'] = {'chunk_size': chunk_size, 'tensors': entries}
+        return self.ipfs_handler.add_tensors([], manifest)
+
+    def assemble(self, meta, have=None):
+        """
+        Rebuild the tensors of a manifest's metadata. Chunks that match the
+        same position in `have` are copied from there instead of fetched.
+        Returns read-only arrays.
+        """
+        manifest = meta['chunked']
+        chunk_size = manifest['chunk_size']
+        tensors = []
+        # CID -> [(target view, expected digest)]
+        wanted = {}
+        for i, entry in enumerate(manifest['tensors']):
+            tensor = np.empty(entry['shape'], dtype=np.dtype(entry['dtype']))
+            target = _bytes(tensor)
+            held = None
+            if have is not None and i < len(have):
+                candidate = np.asarray(have[i])
+                if candidate.dtype == tensor.dtype and candidate.shape == tensor.shape:
+                    held = list(_chunks(candidate, chunk_size))
+            offset = 0
+            for j, chunk in enumerate(entry['chunks']):
+                nbytes = chunk['nbytes']
+                if not nbytes:
+                    continue
+                view = target[offset:offset + nbytes]
+                offset += nbytes
+                if held is not None and j < len(held) and _digest(held[j]) == chunk['sha256']:
+                    view[:] = held[j]
+                    self.stats['chunks_reused'] += 1
+                else:
+                    wanted.setdefault(chunk['cid'], []).append((view, chunk['sha256']))
+            tensors.append(tensor)
+
+        for cid, data in self.ipfs_handler.get_many(list(wanted), self.max_concurrency):
+            for view, digest in wanted[cid]:
+                if len(data) != len(view) or _digest(data) != digest:
+                    raise RuntimeError(f"Chunk {cid} does not match its manifest digest")
+                view[:] = np.frombuffer(data, dtype=np.uint8)
+            self.stats['chunks_fetched'] += 1
+            self.stats['bytes_fetched'] += len(data)
+
+        for tensor in tensors:
+            tensor.flags.writeable = False
+        return tensors
+
+    def get(self, cid, have=None, with_meta=False):
+        """
+        Tensors of the manifest at `cid`; see assemble() for `have`.
+        """
+        _, meta = self.ipfs_handler.get_tensors(cid, with_meta=True)
+        if not self.is_manifest(meta):
+            raise ValueError(f"{cid} is not a chunked manifest")
+        tensors = self.assemble(meta, have)
+        return (tensors, meta) if with_meta else tensors
@@ -0,0 +1,86 @@
+import numpy as np
+from common.compression import (
+    METHODS, QUANTIZED_BITS, SPARSE_METHODS, CompressedGradient, decompress, flatten_gradient
+)
+
+
+class GradientCompressor:
+    """
+    Client-side gradient compression with per-client error feedback: whatever
+    is dropped by sparsification or quantization in one round is carried in a
+    residual and added back to the next round's gradient.
+    """
+    def __init__(self, method='topk', ratio=0.01, threshold=None, block_size=4096,
+                 error_feedback=True, seed=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown compression method: {method}")
+        if method == 'threshold' and threshold is None:
+            raise ValueError("threshold compression needs a threshold")
+        if method == 'int4' and block_size % 2:
+            raise ValueError("int4 compression needs an even block_size")
+        self.method = method
+        self.ratio = ratio
+        self.threshold = threshold
+        self.block_size = block_size
+        self.error_feedback = error_feedback
+        self.residual = None
+        self.last_ratio = None
+        self._rng = np.random.default_rng(seed)
+
+    def compress(self, gradient):
+        shapes = [tuple(np.shape(g)) for g in gradient]
+        flat = flatten_gradient(gradient)
+
+        if self.error_feedback and self.residual is not None:
+            if self.residual.size != flat.size:
+                raise ValueError("Gradient size changed; call reset() before compressing a new model")
+            flat += self.residual
+
+        if self.method in SPARSE_METHODS:
+            compressed = self._sparsify(flat)
+        elif self.method in QUANTIZED_BITS:
+            compressed = self._quantize(flat, QUANTIZED_BITS[self.method])
+        else:
+            compressed = CompressedGradient('none', flat.size, [flat.copy()])
+        compressed.shapes = shapes
+
+        if self.error_feedback:
+            # Whatever the receiver will not see is kept for the next round
+            self.residual = flat
+            self.residual -= decompress(compressed)
+
+        self.last_ratio = flat.nbytes / max(compressed.nbytes, 1)
+        return compressed
+
+    def reset(self):
+        self.residual = None
+
+    def _sparsify(self, flat):
+        if self.method == 'topk':
+            k = max(1, int(flat.size * self.ratio))
+            indices = np.argpartition(np.abs(flat), flat.size - k)[flat.size - k:]
+            indices.sort()
+        else:
+            indices = np.flatnonzero(np.abs(flat) >= self.threshold)
+        indices = indices.astype(np.uint32)
+        return CompressedGradient(self.method, flat.size, [indices, flat[indices]])
+
+    def _quantize(self, flat, bits):
+        levels = 2 ** (bits - 1) - 1
+        num_blocks = -(-flat.size // self.block_size)
+        padded = np.zeros(num_blocks * self.block_size, dtype=np.float32)
+        padded[:flat.size] = flat
+        blocks = padded.reshape(num_blocks, self.block_size)
+
+        scales = (np.abs(blocks).max(axis=1) / levels).astype(np.float32)
+        safe_scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+
+        # Stochastic rounding keeps the quantizer unbiased
+        scaled = blocks / safe_scales[:, None]
+        scaled += self._rng.random(scaled.shape, dtype=np.float32)
+        codes = np.clip(np.floor(scaled), -levels, levels).astype(np.int8)
+
+        if bits == 4:
+            nibbles = (codes + 8).astype(np.uint8).reshape(-1, 2)
+            codes = nibbles[:, 0] | (nibbles[:, 1] << 4)
+        return CompressedGradient(self.method, flat.size, [scales, codes.reshape(-1)], block_size=self.block_size)
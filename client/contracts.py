@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import pickle
+import threading
+
+BUILD_DIR = 'build/contracts'
+
+_lock = threading.Lock()
+_abis = {}
+_bundle = None
+
+
+def _build_dir():
+    return os.getenv('CONTRACTS_BUILD_DIR', BUILD_DIR)
+
+
+def _artifact_path(name):
+    return os.path.join(_build_dir(), f"{name}.json")
+
+
+def artifacts_available(names):
+    """
+    Whether a compiled artifact exists for every contract in `names`, e.g.
+    before deploying them.
+    """
+    return all(os.path.exists(_artifact_path(name)) for name in names)
+
+
+def _load_bundle():
+    """
+    ABIs precompiled by build_bundle(), or {} when there is no bundle. An
+    entry is ignored once its artifact is newer than the bundle.
+    """
+    global _bundle
+    if _bundle is None:
+        path = os.getenv('CONTRACTS_ABI_BUNDLE', os.path.join(_build_dir(), 'abis.pickle'))
+        try:
+            with open(path, 'rb') as f:
+                _bundle = pickle.load(f)
+            _bundle['_mtime'] = os.path.getmtime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            _bundle = {'abis': {}, '_mtime': 0}
+    return _bundle
+
+
+def load_abi(name):
+    """
+    ABI of a compiled contract artifact (e.g. 'FedChainCore'), parsed once
+    per process.
+    """
+    with _lock:
+        abi = _abis.get(name)
+        if abi is not None:
+            return abi
+        bundle = _load_bundle()
+        path = _artifact_path(name)
+        abi = bundle['abis'].get(name)
+        if abi is None or (os.path.exists(path) and os.path.getmtime(path) > bundle['_mtime']):
+            # Truffle artifacts also carry bytecode, sources and ASTs; only
+            # the ABI is kept
+            with open(path) as f:
+                abi = json.load(f)['abi']
+        _abis[name] = abi
+        return abi
+
+
+def load_bytecode(name):
+    """
+    Deployment bytecode of a compiled contract artifact. Only deployments
+    need it, so it is neither cached nor bundled.
+    """
+    with open(_artifact_path(name)) as f:
+        return json.load(f)['bytecode']
+
+
+def get_contract(w3, name, address):
+    """
+    Contract object for `name` at `address`. Only the ABI is cached: a
+    cached Contract would keep its Web3 instance (and provider) alive.
+    """
+    return w3.eth.contract(address=address, abi=load_abi(name))
+
+
+def clear_cache():
+    global _bundle
+    with _lock:
+        _abis.clear()
+        _bundle = None
+
+
+def build_bundle(build_dir=None, out_path=None):
+    """
+    Strip every artifact in `build_dir` down to its ABI and pickle them into
+    one small file, so start-up never parses the full Truffle JSON.
+    """
+    build_dir = build_dir or _build_dir()
+    out_path = out_path or os.path.join(build_dir, 'abis.pickle')
+    abis = {}
+    for filename in sorted(os.listdir(build_dir)):
+        if filename.endswith('.json'):
+            with open(os.path.join(build_dir, filename)) as f:
+                artifact = json.load(f)
+            if 'abi' in artifact:
+                abis[filename[:-5]] = artifact['abi']
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'abis': abis}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, out_path)
+    return out_path, sorted(abis)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompile contract ABIs into a pickle bundle')
+    parser.add_argument('--build-dir', type=str, default=None, help=f'Artifact directory (default {BUILD_DIR})')
+    parser.add_argument('--out', type=str, default=None, help='Bundle path (default <build-dir>/abis.pickle)')
+    args = parser.parse_args()
+    path, names = build_bundle(args.build_dir, args.out)
+    print(f"Wrote {len(names)} ABIs to {path}: {', '.join(names)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,226 @@
+import glob
+import os
+import zipfile
 import numpy as np
-from sklearn.model_selection import train_test_split
-from keras.utils import to_categorical
+from client.lazy import LazyModule
+
+# TensorFlow costs seconds to import; load it once a pipeline is built
+tf = LazyModule('tensorflow')
+
+# Rows read from a memory-mapped shard per step of its generator
+READ_ROWS = 1024
 
 class DataHandler:
-    def __init__(self, data_path):
+    """
+    Training data as tf.data pipelines streamed from sharded files.
+
+    `data_path` holds shards in `train/` and `test/` subdirectories (or
+    files whose names start with `train` / `test`):
+
+    - `<name>_x.npy` + `<name>_y.npy` pairs, read through memory maps
+    - `<name>.npz` archives with `x` and `y` arrays, one shard in memory at a time
+    - `<name>.tfrecord` files with a raw uint8 `image` and an int64 `label`
+
+    Only file names are listed up front, so start-up does not grow with the
+    dataset, and batches are produced lazily: datasets larger than RAM are
+    never fully materialised. Labels are sparse class indices; uint8 images
+    are scaled to [0, 1] inside the pipeline. When `data_path` does not
+    exist a small random dataset is generated in memory instead.
+    """
+    def __init__(self, data_path, batch_size=32, shuffle_buffer=None, input_shape=(28, 28, 1),
+                 num_classes=10, seed=42):
         self.data_path = data_path
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer or int(os.getenv('DATA_SHUFFLE_BUFFER', '10000'))
+        self.input_shape = tuple(input_shape)
+        self.num_classes = num_classes
+        self.seed = seed
+        self.shards = {}
         self.x_train = None
         self.y_train = None
         self.x_test = None
         self.y_test = None
+        self._datasets = {}
+
+    def _find_shards(self, split):
+        directory = os.path.join(self.data_path, split)
+        if os.path.isdir(directory):
+            pattern = os.path.join(directory, '*')
+        else:
+            pattern = os.path.join(self.data_path, f"{split}*")
+        shards = {'npy': [], 'npz': [], 'tfrecord': []}
+        for path in sorted(glob.glob(pattern)):
+            if path.endswith('_x.npy'):
+                labels = path[:-len('_x.npy')] + '_y.npy'
+                if not os.path.exists(labels):
+                    raise ValueError(f"Shard {path} has no labels file {labels}")
+                shards['npy'].append((path, labels))
+            elif path.endswith('.npz'):
+                shards['npz'].append(path)
+            elif path.endswith(('.tfrecord', '.tfrecords')):
+                shards['tfrecord'].append(path)
+        return shards
 
     def load_data(self):
-        # This is a placeholder. In a real-world scenario, you'd load your actual dataset.
-        # For this example, we'll generate some random data.
-        x = np.random.rand(1000, 28, 28, 1)  # Simulating image data
-        y = np.random.randint(0, 10, 1000)  # 10 classes
+        if not os.path.exists(self.data_path):
+            self._generate_data()
+            return
+
+        self.shards = {split: self._find_shards(split) for split in ('train', 'test')}
+        for split, shards in self.shards.items():
+            if not any(shards.values()):
+                raise ValueError(f"No npy, npz or tfrecord {split} shards in {self.data_path}")
+        self._datasets = {}
+
+    def _generate_data(self):
+        # Placeholder data for demos and tests without a dataset on disk
+        rng = np.random.default_rng(self.seed)
+        x = rng.integers(0, 256, (1000,) + self.input_shape, dtype=np.uint8)
+        y = rng.integers(0, self.num_classes, 1000).astype(np.int64)
+        self.x_train, self.x_test = x[:800], x[800:]
+        self.y_train, self.y_test = y[:800], y[800:]
+        self.shards = {}
+        self._datasets = {}
+
+    def _normalize(self, x, y):
+        if x.dtype == tf.uint8:
+            x = tf.cast(x, tf.float32) / 255.0
+        else:
+            x = tf.cast(x, tf.float32)
+        return tf.reshape(x, self.input_shape), tf.cast(y, tf.int64)
+
+    def _read_npy(self, x_path, y_path):
+        x = np.load(x_path, mmap_mode='r')
+        y = np.load(y_path, mmap_mode='r')
+        for start in range(0, len(x), READ_ROWS):
+            yield x[start:start + READ_ROWS], y[start:start + READ_ROWS]
+
+    def _read_npz(self, path):
+        with np.load(path) as shard:
+            x, y = shard['x'], shard['y']
+        for start in range(0, len(x), READ_ROWS):
+            yield x[start:start + READ_ROWS], y[start:start + READ_ROWS]
 
-        self.x_train, self.x_test, self.y_train, self.y_test = train_test_split(x, y, test_size=0.2, random_state=42)
+    def _shard_signature(self, split):
+        kind, paths = next((kind, paths) for kind, paths in self.shards[split].items() if paths and kind != 'tfrecord')
+        if kind == 'npy':
+            x_dtype = np.load(paths[0][0], mmap_mode='r').dtype
+        else:
+            # Only the header of the x member is read, not the array
+            with zipfile.ZipFile(paths[0]) as archive, archive.open('x.npy') as f:
+                version = np.lib.format.read_magic(f)
+                read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+                x_dtype = read_header(f)[2]
+        return (
+            tf.TensorSpec((None,) + self.input_shape, tf.as_dtype(x_dtype)),
+            tf.TensorSpec((None,), tf.int64)
+        )
+
+    def _file_dataset(self, split, shuffle):
+        shards = self.shards[split]
+        parts = []
+        if shards['npy'] or shards['npz']:
+            signature = self._shard_signature(split)
+            sources = [('npy', x, y) for x, y in shards['npy']] + [('npz', path, '') for path in shards['npz']]
+
+            def read(kind, x_path, y_path):
+                kind, x_path, y_path = kind.decode(), x_path.decode(), y_path.decode()
+                for x, y in (self._read_npy(x_path, y_path) if kind == 'npy' else self._read_npz(x_path)):
+                    # Rows may be stored flat; reshaping a slice is a view, not a copy
+                    yield x.reshape((len(x),) + self.input_shape), y.astype(np.int64)
+
+            files = tf.data.Dataset.from_tensor_slices(tuple(map(list, zip(*sources))))
+            if shuffle:
+                files = files.shuffle(len(sources), seed=self.seed, reshuffle_each_iteration=True)
+            parts.append(files.interleave(
+                lambda kind, x_path, y_path: tf.data.Dataset.from_generator(
+                    read, args=(kind, x_path, y_path), output_signature=signature
+                ).unbatch(),
+                cycle_length=min(len(sources), 4),
+                num_parallel_calls=tf.data.AUTOTUNE,
+                deterministic=not shuffle
+            ))
+
+        if shards['tfrecord']:
+            files = tf.data.Dataset.from_tensor_slices(shards['tfrecord'])
+            if shuffle:
+                files = files.shuffle(len(shards['tfrecord']), seed=self.seed, reshuffle_each_iteration=True)
+            features = {
+                'image': tf.io.FixedLenFeature([], tf.string),
+                'label': tf.io.FixedLenFeature([], tf.int64)
+            }
+
+            def parse(record):
+                example = tf.io.parse_single_example(record, features)
+                return tf.io.decode_raw(example['image'], tf.uint8), example['label']
+
+            parts.append(files.interleave(
+                tf.data.TFRecordDataset,
+                cycle_length=min(len(shards['tfrecord']), 4),
+                num_parallel_calls=tf.data.AUTOTUNE,
+                deterministic=not shuffle
+            ).map(parse, num_parallel_calls=tf.data.AUTOTUNE))
+
+        dataset = parts[0]
+        for part in parts[1:]:
+            dataset = dataset.concatenate(part)
+        return dataset
+
+    def _dataset(self, split):
+        if split in self._datasets:
+            return self._datasets[split]
+        shuffle = split == 'train'
+        if self.shards:
+            dataset = self._file_dataset(split, shuffle)
+        else:
+            x, y = (self.x_train, self.y_train) if shuffle else (self.x_test, self.y_test)
+            dataset = tf.data.Dataset.from_tensor_slices((x, y))
+        dataset = dataset.map(self._normalize, num_parallel_calls=tf.data.AUTOTUNE)
+        if shuffle:
+            dataset = dataset.shuffle(self.shuffle_buffer, seed=self.seed, reshuffle_each_iteration=True)
+        dataset = dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+        self._datasets[split] = dataset
+        return dataset
 
     def preprocess_data(self):
-        # Normalize the data
-        self.x_train = self.x_train.astype('float32') / 255
-        self.x_test = self.x_test.astype('float32') / 255
+        # Normalization happens inside the tf.data pipelines; only the small
+        # in-memory placeholder arrays are scaled here, for callers that
+        # slice them directly
+        if not self.shards and self.x_train is not None and self.x_train.dtype == np.uint8:
+            self.x_train = self.x_train.astype('float32') / 255
+            self.x_test = self.x_test.astype('float32') / 255
+        self._datasets = {}
 
-        # Convert class vectors to binary class matrices
-        self.y_train = to_categorical(self.y_train, 10)
-        self.y_test = to_categorical(self.y_test, 10)
+    def train_dataset(self):
+        return self._dataset('train')
+
+    def test_dataset(self):
+        return self._dataset('test')
 
     def get_train_data(self):
+        """
+        (x, y) arrays for in-memory data, (dataset, None) for shards on disk;
+        ModelTrainer.train and evaluate accept both.
+        """
+        if self.shards:
+            return self.train_dataset(), None
         return self.x_train, self.y_train
 
     def get_test_data(self):
+        if self.shards:
+            return self.test_dataset(), None
         return self.x_test, self.y_test
+
+    def get_sample(self, count=32):
+        """
+        First `count` normalized training examples as NumPy arrays, e.g.
+        for computing the gradients that are submitted. Read without
+        shuffling, so the shuffle buffer is not filled for a few rows.
+        """
+        if self.shards:
+            source = self._file_dataset('train', shuffle=False)
+        else:
+            source = tf.data.Dataset.from_tensor_slices((self.x_train, self.y_train))
+        for x, y in source.take(count).map(self._normalize).batch(count):
+            return x.numpy(), y.numpy()
+        raise ValueError("The training set is empty")
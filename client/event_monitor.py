@@ -0,0 +1,182 @@
+import os
+import time
+from collections import namedtuple
+
+ROUND_EVENTS = ('RoundStarted', 'GradientSubmitted', 'RoundFinalized')
+
+# Outcome of waiting on one round: gradient CIDs keyed by participant, whether
+# the round was finalized on chain, and the id of the round opened after it
+RoundStatus = namedtuple('RoundStatus', ['gradient_hashes', 'finalized', 'next_round'])
+
+
+class RoundEventMonitor:
+    """
+    Follows FedChainCore round events (RoundStarted, GradientSubmitted,
+    RoundFinalized) instead of re-reading contract state on a timer.
+
+    Catch-up uses eth_getLogs over block ranges of `batch_size` blocks. After
+    that, if the node supports it, a log filter is installed so that each poll
+    is a single eth_getFilterChanges call; with a WebsocketProvider those polls
+    reuse the persistent socket. Polling every `poll_interval` seconds (about
+    one block time) bounds reaction latency to roughly one block.
+
+    Blocks and events seen while polling are reported to `read_cache` (a
+    BlockReadCache), so cached contract reads are dropped as soon as the
+    chain moves on.
+    """
+    def __init__(self, w3, contract, from_block=None, batch_size=2000, poll_interval=None, use_filter=True,
+                 read_cache=None):
+        self.w3 = w3
+        self.read_cache = read_cache
+        self.contract = contract
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval or float(os.getenv('EVENT_POLL_INTERVAL', '1'))
+        self.use_filter = use_filter
+        self.next_block = w3.eth.block_number + 1 if from_block is None else from_block
+        # Block of each RoundStarted event polled so far, by round id
+        self.round_start_blocks = {}
+        self._filter = None
+        self._events = {}
+        for name in ROUND_EVENTS:
+            event = getattr(contract.events, name)()
+            self._events[self._topic(event)] = event
+
+    def _topic(self, event):
+        abi = event.abi
+        signature = f"{abi['name']}({','.join(i['type'] for i in abi['inputs'])})"
+        return self.w3.to_hex(self.w3.keccak(text=signature))
+
+    def _decode(self, log):
+        return self._events[self.w3.to_hex(log['topics'][0])].process_log(log)
+
+    def _log_params(self, from_block, to_block, topics=None):
+        return {
+            'address': self.contract.address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': topics or [list(self._events)]
+        }
+
+    def get_logs(self, from_block, to_block=None, topics=None):
+        """
+        Fetch and decode round events in [from_block, to_block] with one
+        eth_getLogs call per `batch_size` blocks.
+        """
+        to_block = self.w3.eth.block_number if to_block is None else to_block
+        events = []
+        while from_block <= to_block:
+            end = min(from_block + self.batch_size - 1, to_block)
+            events.extend(self._decode(log) for log in self.w3.eth.get_logs(self._log_params(from_block, end, topics)))
+            from_block = end + 1
+        return events
+
+    def _poll_filter(self):
+        events = []
+        for log in self._filter.get_new_entries():
+            if log['blockNumber'] >= self.next_block:
+                events.append(self._decode(log))
+        if events:
+            self.next_block = max(self.next_block, events[-1]['blockNumber'] + 1)
+            self._observe_block(events[-1]['blockNumber'])
+        return events
+
+    def _observe_block(self, block):
+        if self.read_cache is not None:
+            self.read_cache.observe_block(block)
+
+    def _track(self, events):
+        for event in events:
+            if event['event'] == 'RoundStarted':
+                self.round_start_blocks[event['args']['roundId']] = event['blockNumber']
+        return events
+
+    def poll(self):
+        """
+        Return the round events seen since the previous poll, in chain order.
+        """
+        if self._filter is not None:
+            try:
+                return self._track(self._poll_filter())
+            except Exception:
+                # Filters are dropped by nodes after inactivity or restarts
+                self._filter = None
+
+        head = self.w3.eth.block_number
+        self._observe_block(head)
+        events = []
+        if head >= self.next_block:
+            events = self.get_logs(self.next_block, head)
+            self.next_block = head + 1
+
+        if self.use_filter and self._filter is None:
+            try:
+                self._filter = self.w3.eth.filter(self._log_params(self.next_block, 'latest'))
+            except Exception:
+                self.use_filter = False
+        return self._track(events)
+
+    def round_submissions(self, round_id, from_block=0):
+        """
+        Gradient CIDs already submitted to `round_id`, keyed by participant.
+        """
+        round_topic = '0x' + round_id.to_bytes(32, 'big').hex()
+        topic = self._topic(self.contract.events.GradientSubmitted())
+        events = self.get_logs(from_block, self.next_block - 1, [topic, round_topic])
+        return {e['args']['participant']: e['args']['gradientIpfsHash'] for e in events}
+
+    def wait_for_round(self, round_id, min_participants, end_time, gradient_hashes=None):
+        """
+        Block until `round_id` is finalized on chain, reaches
+        `min_participants` submissions, or passes `end_time`.
+        """
+        gradient_hashes = dict(gradient_hashes or {})
+        finalized = False
+        next_round = None
+        while True:
+            for event in self.poll():
+                args = event['args']
+                if event['event'] == 'GradientSubmitted' and args['roundId'] == round_id:
+                    gradient_hashes[args['participant']] = args['gradientIpfsHash']
+                elif event['event'] == 'RoundFinalized' and args['roundId'] == round_id:
+                    finalized = True
+                elif event['event'] == 'RoundStarted' and args['roundId'] > round_id:
+                    next_round = args['roundId']
+
+            if finalized or len(gradient_hashes) >= min_participants or time.time() >= end_time:
+                return RoundStatus(gradient_hashes, finalized, next_round)
+            time.sleep(min(self.poll_interval, max(end_time - time.time(), 0)))
+
+    def wait_for_round_start(self, after_round, timeout=None, fallback=None, fallback_interval=None):
+        """
+        Block until a round newer than `after_round` is opened and return its
+        id, or None after `timeout` seconds.
+
+        `fallback`, if given, is called every `fallback_interval` seconds and
+        must return the current round id. It only matters when events are
+        missed, e.g. while a dropped filter is being reinstalled.
+        """
+        now = time.time()
+        deadline = None if timeout is None else now + timeout
+        fallback_interval = fallback_interval or float(os.getenv('EVENT_FALLBACK_INTERVAL', '30'))
+        next_fallback = now + fallback_interval
+        while True:
+            started = [
+                event['args']['roundId'] for event in self.poll()
+                if event['event'] == 'RoundStarted' and event['args']['roundId'] > after_round
+            ]
+            if started:
+                return max(started)
+
+            now = time.time()
+            if fallback is not None and now >= next_fallback:
+                round_id = fallback()
+                if round_id > after_round:
+                    return round_id
+                next_fallback = now + fallback_interval
+            if deadline is not None and now >= deadline:
+                return None
+
+            wake = next_fallback if fallback is not None else now + self.poll_interval
+            if deadline is not None:
+                wake = min(wake, deadline)
+            time.sleep(max(min(self.poll_interval, wake - now), 0))
@@ -0,0 +1,135 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from client.poseidon import FIELD_MODULUS, poseidon_chain
+
+# Parameters per block; the circuits hash model[100] and gradient[100]
+BLOCK_SIZE = 100
+
+# Fixed-point scale of the quantized values, x -> round(x * 2**FRACTION_BITS)
+FRACTION_BITS = 16
+
+# Quantized values must stay well inside int64 so the limb arithmetic is exact
+_MAX_MAGNITUDE = 2 ** 62
+
+# FIELD_MODULUS as four little-endian 64-bit limbs
+_MODULUS_LIMBS = np.array([(FIELD_MODULUS >> (64 * i)) & (2 ** 64 - 1) for i in range(4)], dtype=np.uint64)
+
+
+def _fraction_bits(fraction_bits):
+    if fraction_bits is None:
+        fraction_bits = int(os.getenv('FIELD_FRACTION_BITS', str(FRACTION_BITS)))
+    return fraction_bits
+
+
+def quantize(values, fraction_bits=None):
+    """
+    Fixed-point quantization of float values to int64, rounding to the
+    nearest multiple of 2**-fraction_bits.
+    """
+    scaled = np.rint(np.asarray(values, dtype=np.float64).reshape(-1) * 2.0 ** _fraction_bits(fraction_bits))
+    if not np.all(np.abs(scaled) < _MAX_MAGNITUDE):
+        raise ValueError("Values are not finite or too large for the fixed-point scale")
+    return scaled.astype(np.int64)
+
+
+def dequantize(quantized, fraction_bits=None):
+    return np.asarray(quantized, dtype=np.float64) / 2.0 ** _fraction_bits(fraction_bits)
+
+
+def to_limbs(quantized):
+    """
+    Field elements of int64 values as an (n, 4) array of little-endian
+    uint64 limbs; a negative value q maps to FIELD_MODULUS - |q|, as in circom.
+    """
+    quantized = np.asarray(quantized, dtype=np.int64).reshape(-1)
+    negative = quantized < 0
+    magnitude = np.abs(quantized).astype(np.uint64)
+
+    limbs = np.zeros((len(quantized), 4), dtype=np.uint64)
+    limbs[:, 0] = magnitude
+    subtrahend = np.zeros(len(quantized), dtype=np.uint64)
+    subtrahend[negative] = magnitude[negative]
+    borrow = np.zeros(len(quantized), dtype=np.uint64)
+    for i in range(4):
+        # FIELD_MODULUS - magnitude for the negative rows, limb by limb with borrow
+        difference = _MODULUS_LIMBS[i] - subtrahend - borrow
+        borrow = ((subtrahend > _MODULUS_LIMBS[i]) | ((subtrahend == _MODULUS_LIMBS[i]) & (borrow > 0))).astype(np.uint64)
+        limbs[negative, i] = difference[negative]
+        subtrahend[:] = 0
+    return limbs
+
+
+def from_limbs(limbs):
+    """
+    Python ints of an (n, 4) limb array.
+    """
+    data = np.ascontiguousarray(limbs, dtype='<u8').tobytes()
+    return [int.from_bytes(data[i:i + 32], 'little') for i in range(0, len(data), 32)]
+
+
+def field_elements(tensors, fraction_bits=None):
+    """
+    Limbs of the quantized parameters of `tensors`, flattened in order.
+    """
+    parts = [quantize(tensor, fraction_bits) for tensor in tensors]
+    return to_limbs(np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64))
+
+
+def to_blocks(limbs, block_size=BLOCK_SIZE):
+    """
+    (blocks, block_size, 4) view of the limbs, zero-padded at the end.
+    """
+    padding = -len(limbs) % block_size
+    if padding:
+        limbs = np.concatenate([limbs, np.zeros((padding, 4), dtype=np.uint64)])
+    return limbs.reshape(-1, block_size, 4)
+
+
+def _hash_blocks(blocks):
+    return [poseidon_chain(from_limbs(block)) for block in blocks]
+
+
+def hash_blocks(blocks, workers=None):
+    """
+    PoseidonChain hash of every block. Blocks are split into contiguous
+    ranges hashed by a pool of `workers` processes; limbs are sent to the
+    workers as NumPy arrays rather than lists of big ints.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(blocks) < 2:
+        return _hash_blocks(blocks)
+
+    ranges = np.array_split(blocks, min(len(blocks), workers * 4))
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        return [digest for part in pool.map(_hash_blocks, ranges) for digest in part]
+
+
+def hash_tensors(tensors, fraction_bits=None, block_size=BLOCK_SIZE, workers=None):
+    return hash_blocks(to_blocks(field_elements(tensors, fraction_bits), block_size), workers)
+
+
+def gradient_circuit_input(model_block, gradient_block):
+    """
+    Input for gradient_verification.circom from one block of model and
+    gradient limbs; field elements are decimal strings as snarkjs expects.
+    """
+    model = from_limbs(model_block)
+    gradient = from_limbs(gradient_block)
+    return {
+        'modelHash': str(poseidon_chain(model)),
+        'gradientHash': str(poseidon_chain(gradient)),
+        'model': [str(x) for x in model],
+        'gradient': [str(x) for x in gradient]
+    }
+
+
+def gradient_circuit_inputs(model_weights, gradients, fraction_bits=None):
+    """
+    Circuit input for every block of the model and its gradients.
+    """
+    model_blocks = to_blocks(field_elements(model_weights, fraction_bits))
+    gradient_blocks = to_blocks(field_elements(gradients, fraction_bits))
+    if len(model_blocks) != len(gradient_blocks):
+        raise ValueError("Model and gradients have a different number of parameters")
+    return [gradient_circuit_input(m, g) for m, g in zip(model_blocks, gradient_blocks)]
@@ -0,0 +1,55 @@
+import importlib
+import os
+import sys
+import time
+
+# Reference point for the startup profile: when the first project module that
+# cares about start-up cost was imported
+_STARTED = time.perf_counter()
+
+# Seconds spent importing each lazily loaded module, in load order
+import_times = {}
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    so heavy dependencies (TensorFlow, scikit-learn, web3) are not paid for
+    by processes that never touch them.
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            import_times.setdefault(self._name, time.perf_counter() - start)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def profiling_enabled():
+    return os.getenv('PROFILE_STARTUP', '0').lower() in ('1', 'true', 'yes')
+
+
+def report_startup(label, out=None):
+    """
+    Print how long start-up took and which lazy imports were paid for.
+    """
+    out = out or sys.stderr
+    print(f"[startup] {label} ready after {time.perf_counter() - _STARTED:.3f}s", file=out)
+    for name, seconds in import_times.items():
+        print(f"[startup]   import {name}: {seconds:.3f}s", file=out)
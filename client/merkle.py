@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Bytes of tensor data per Merkle leaf
+CHUNK_SIZE = 1024 * 1024
+
+# Domain separation so a leaf can never be passed off as an inner node
+_LEAF = b'\x00'
+_NODE = b'\x01'
+_ROOT = b'\x02'
+
+_LEAF_HEADER = struct.Struct('<IQ')  # tensor index, byte offset
+
+
+def _byte_view(tensor):
+    array = np.ascontiguousarray(np.asarray(tensor))
+    return array, memoryview(array.reshape(-1).view(np.uint8))
+
+
+def _layout_digest(arrays, chunk_size):
+    layout = {
+        'chunk_size': chunk_size,
+        'tensors': [{'dtype': array.dtype.str, 'shape': list(array.shape)} for array in arrays]
+    }
+    return hashlib.sha256(json.dumps(layout, sort_keys=True).encode()).digest()
+
+
+def hash_leaf(tensor_index, offset, data):
+    h = hashlib.sha256(_LEAF)
+    h.update(_LEAF_HEADER.pack(tensor_index, offset))
+    # hashlib releases the GIL for large buffers, so leaves hash in parallel
+    h.update(data)
+    return h.digest()
+
+
+def hash_node(left, right):
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def hash_root(layout_digest, tree_root):
+    return hashlib.sha256(_ROOT + layout_digest + tree_root).digest()
+
+
+class MerkleCommitment:
+    """
+    Merkle commitment over the raw bytes of a list of tensors.
+
+    Each tensor is cut into `chunk_size` byte leaves (a leaf never spans two
+    tensors); a leaf hash binds its tensor index and byte offset, and the
+    root binds the dtypes and shapes. An odd node at the end of a level is
+    promoted unchanged instead of being paired with itself.
+    """
+    def __init__(self, levels, leaves, layout_digest, chunk_size):
+        self.levels = levels
+        self.leaves = leaves  # (tensor index, byte offset, length) per leaf
+        self.layout_digest = layout_digest
+        self.chunk_size = chunk_size
+        tree_root = levels[-1][0] if levels and levels[-1] else hashlib.sha256(b'').digest()
+        self.root = hash_root(layout_digest, tree_root)
+
+    @property
+    def root_hex(self):
+        return self.root.hex()
+
+    def leaf_index(self, tensor_index, offset):
+        """
+        Index of the leaf holding byte `offset` of tensor `tensor_index`.
+        """
+        for i, (t, start, length) in enumerate(self.leaves):
+            if t == tensor_index and start <= offset < start + length:
+                return i
+        raise IndexError(f"No leaf covers byte {offset} of tensor {tensor_index}")
+
+    def proof(self, leaf_index):
+        """
+        Inclusion proof for one leaf: its position plus the sibling hashes on
+        the way up, each tagged with the side the sibling sits on.
+        """
+        tensor_index, offset, length = self.leaves[leaf_index]
+        path = []
+        index = leaf_index
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(('left' if sibling < index else 'right', level[sibling].hex()))
+            index //= 2
+        return {
+            'leaf': leaf_index,
+            'tensor': tensor_index,
+            'offset': offset,
+            'length': length,
+            'layout': self.layout_digest.hex(),
+            'path': path
+        }
+
+
+def verify_chunk(root_hex, proof, data):
+    """
+    Check that `data` is the chunk described by `proof` under `root_hex`,
+    without access to the rest of the tensors.
+    """
+    data = memoryview(data).cast('B')
+    if len(data) != proof['length']:
+        return False
+    node = hash_leaf(proof['tensor'], proof['offset'], data)
+    for side, sibling in proof['path']:
+        sibling = bytes.fromhex(sibling)
+        node = hash_node(sibling, node) if side == 'left' else hash_node(node, sibling)
+    return hash_root(bytes.fromhex(proof['layout']), node).hex() == root_hex
+
+
+def commit_tensors(tensors, chunk_size=None, workers=None):
+    """
+    Build a MerkleCommitment over `tensors` (NumPy arrays or anything
+    np.asarray accepts, e.g. eager TF tensors). Leaves are hashed by
+    `workers` threads straight from the tensor memory, without copies.
+    """
+    chunk_size = chunk_size or int(os.getenv('COMMITMENT_CHUNK_SIZE', str(CHUNK_SIZE)))
+    workers = workers or os.cpu_count() or 1
+
+    arrays = []
+    jobs = []
+    leaves = []
+    for tensor_index, tensor in enumerate(tensors):
+        array, data = _byte_view(tensor)
+        arrays.append(array)
+        for offset in range(0, len(data), chunk_size):
+            chunk = data[offset:offset + chunk_size]
+            jobs.append((tensor_index, offset, chunk))
+            leaves.append((tensor_index, offset, len(chunk)))
+
+    if workers > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            level = list(pool.map(lambda job: hash_leaf(*job), jobs))
+    else:
+        level = [hash_leaf(*job) for job in jobs]
+
+    levels = [level] if level else []
+    while len(level) > 1:
+        level = [
+            hash_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(level)
+    return MerkleCommitment(levels, leaves, _layout_digest(arrays, chunk_size), chunk_size)
@@ -1,45 +1,223 @@
-import tensorflow as tf
-from keras.models import Sequential
-from keras.layers import Conv2D, MaxPooling2D, Flatten, Dense
+import os
+from collections import namedtuple
+import numpy as np
+from client.lazy import LazyModule
+
+# TensorFlow is only imported once a model is actually built
+tf = LazyModule('tensorflow')
+losses = LazyModule('keras.losses')
+models = LazyModule('keras.models')
+layers = LazyModule('keras.layers')
+
+# Position of one model variable inside the flat parameter vector
+LayerSlice = namedtuple('LayerSlice', ['name', 'shape', 'slice'])
+
+# Samples per compiled gradient step; activations of one micro-batch are live at a time
+MICRO_BATCH_SIZE = 256
+
+
+def configure_threads(intra_op_threads=None, inter_op_threads=None):
+    """
+    Size TensorFlow's CPU thread pools (TF_INTRA_OP_THREADS and
+    TF_INTER_OP_THREADS by default; 0 lets TensorFlow decide). Only takes
+    effect before the TensorFlow runtime has started.
+    """
+    intra = intra_op_threads if intra_op_threads is not None else int(os.getenv('TF_INTRA_OP_THREADS', '0'))
+    inter = inter_op_threads if inter_op_threads is not None else int(os.getenv('TF_INTER_OP_THREADS', '0'))
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra)
+        tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError:
+        return False
+    return True
+
 
 class ModelTrainer:
-    def __init__(self):
-        self.model = self.build_model()
+    def __init__(self, micro_batch_size=None, intra_op_threads=None, inter_op_threads=None):
+        self._model = None
+        self._layout = None
+        self._trainable_layout = None
+        self._compiled_step = None
+        self.micro_batch_size = micro_batch_size or int(os.getenv('GRADIENT_MICRO_BATCH', str(MICRO_BATCH_SIZE)))
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+    @property
+    def model(self):
+        # Built (and TensorFlow imported) on first use rather than at start-up
+        if self._model is None:
+            self._model = self.build_model()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._layout = None
+        self._trainable_layout = None
+        self._compiled_step = None
 
     def build_model(self):
-        model = Sequential([
-            Conv2D(32, (3, 3), activation='relu', input_shape=(28, 28, 1)),
-            MaxPooling2D((2, 2)),
-            Conv2D(64, (3, 3), activation='relu'),
-            MaxPooling2D((2, 2)),
-            Conv2D(64, (3, 3), activation='relu'),
-            Flatten(),
-            Dense(64, activation='relu'),
-            Dense(10, activation='softmax')
+        configure_threads(self.intra_op_threads, self.inter_op_threads)
+        model = models.Sequential([
+            layers.Conv2D(32, (3, 3), activation='relu', input_shape=(28, 28, 1)),
+            layers.MaxPooling2D((2, 2)),
+            layers.Conv2D(64, (3, 3), activation='relu'),
+            layers.MaxPooling2D((2, 2)),
+            layers.Conv2D(64, (3, 3), activation='relu'),
+            layers.Flatten(),
+            layers.Dense(64, activation='relu'),
+            layers.Dense(10, activation='softmax')
         ])
         model.compile(optimizer='adam',
-                      loss='categorical_crossentropy',
+                      loss='sparse_categorical_crossentropy',
                       metrics=['accuracy'])
         return model
 
-    def train(self, x_train, y_train, epochs=5, batch_size=32):
+    def train(self, x_train, y_train=None, epochs=5, batch_size=32):
+        # Without labels x_train is a batched tf.data pipeline (see DataHandler)
+        if y_train is None:
+            return self.model.fit(x_train, epochs=epochs)
         history = self.model.fit(x_train, y_train, epochs=epochs, batch_size=batch_size, validation_split=0.2)
         return history
 
-    def evaluate(self, x_test, y_test):
+    def evaluate(self, x_test, y_test=None):
+        if y_test is None:
+            return self.model.evaluate(x_test)
         return self.model.evaluate(x_test, y_test)
 
-    def get_gradients(self, x, y):
+    def _batch_gradients(self, x, y):
+        # Loss summed (not averaged) over the batch, so micro-batch gradients
+        # add up to the gradient of the whole dataset
         with tf.GradientTape() as tape:
             predictions = self.model(x)
-            loss = self.model.loss(y, predictions)
+            loss = tf.reduce_sum(losses.get(self.model.loss)(y, predictions))
         return tape.gradient(loss, self.model.trainable_variables)
 
+    @property
+    def compiled_step(self):
+        """
+        _batch_gradients compiled with tf.function. The input signature has
+        an open batch dimension, so a short last micro-batch does not retrace.
+        """
+        if self._compiled_step is None:
+            input_shape = tuple(self.model.input_shape[1:])
+            self._compiled_step = tf.function(self._batch_gradients, input_signature=[
+                tf.TensorSpec((None,) + input_shape, tf.float32),
+                tf.TensorSpec((None,), tf.int64)
+            ])
+        return self._compiled_step
+
+    def _micro_batches(self, x, y):
+        if y is None:
+            # A batched tf.data pipeline, e.g. from DataHandler, rebatched
+            # from its training batch size to micro-batches
+            for batch_x, batch_y in x.unbatch().batch(self.micro_batch_size).prefetch(tf.data.AUTOTUNE):
+                yield batch_x, batch_y
+            return
+        for start in range(0, len(x), self.micro_batch_size):
+            yield x[start:start + self.micro_batch_size], y[start:start + self.micro_batch_size]
+
+    def get_gradients(self, x, y=None, compiled=True):
+        """
+        Mean loss gradient over all of `x`, accumulated one micro-batch at a
+        time. `x` and `y` are arrays with sparse labels, or `x` is a batched
+        tf.data pipeline and `y` is None.
+        """
+        step = self.compiled_step if compiled else self._batch_gradients
+        total = None
+        samples = 0
+        for batch_x, batch_y in self._micro_batches(x, y):
+            batch_x = tf.cast(batch_x, tf.float32)
+            batch_y = tf.reshape(tf.cast(batch_y, tf.int64), [-1])
+            gradients = step(batch_x, batch_y)
+            total = gradients if total is None else [t + g for t, g in zip(total, gradients)]
+            samples += int(batch_x.shape[0])
+        if not samples:
+            raise ValueError("No samples to compute gradients on")
+        return [g / samples for g in total]
+
     def apply_gradients(self, gradients):
         self.model.optimizer.apply_gradients(zip(gradients, self.model.trainable_variables))
 
     def get_weights(self):
-        return [w.numpy() for w in self.model.get_weights()]
+        return [w.numpy() for w in self.model.weights]
+
+    def get_trainable_weights(self):
+        # The variables get_gradients() differentiates, in the same order
+        return [w.numpy() for w in self.model.trainable_variables]
 
     def set_weights(self, weights):
         self.model.set_weights(weights)
+
+    @staticmethod
+    def _build_layout(variables):
+        layout = []
+        offset = 0
+        for var in variables:
+            shape = tuple(var.shape)
+            size = int(np.prod(shape))
+            layout.append(LayerSlice(var.name, shape, slice(offset, offset + size)))
+            offset += size
+        return layout
+
+    @property
+    def layout(self):
+        """
+        Cached layout of all model weights (same order as get_weights) in the
+        flat parameter vector.
+        """
+        if self._layout is None:
+            self._layout = self._build_layout(self.model.weights)
+        return self._layout
+
+    @property
+    def trainable_layout(self):
+        """
+        Cached layout of the trainable variables, i.e. of the gradients.
+        """
+        if self._trainable_layout is None:
+            self._trainable_layout = self._build_layout(self.model.trainable_variables)
+        return self._trainable_layout
+
+    @staticmethod
+    def flat_size(layout):
+        return layout[-1].slice.stop if layout else 0
+
+    def flatten(self, tensors, layout=None, out=None):
+        """
+        Copy a list of per-layer tensors into one contiguous float32 vector.
+        Pass `out` to reuse a preallocated buffer.
+        """
+        layout = layout or self.layout
+        if out is None:
+            out = np.empty(self.flat_size(layout), dtype=np.float32)
+        for entry, tensor in zip(layout, tensors):
+            np.copyto(out[entry.slice].reshape(entry.shape), np.asarray(tensor), casting='same_kind')
+        return out
+
+    def unflatten(self, flat, layout=None):
+        """
+        Split a flat vector into per-layer arrays. The arrays are views over
+        `flat`, so no data is copied.
+        """
+        layout = layout or self.layout
+        flat = np.asarray(flat)
+        if flat.size != self.flat_size(layout):
+            raise ValueError(f"Expected {self.flat_size(layout)} parameters, got {flat.size}")
+        return [flat[entry.slice].reshape(entry.shape) for entry in layout]
+
+    def get_flat_weights(self, out=None):
+        return self.flatten(self.model.weights, self.layout, out)
+
+    def assign_flat(self, flat):
+        """
+        Write a flat parameter vector straight into the model variables.
+        """
+        for var, view in zip(self.model.weights, self.unflatten(flat, self.layout)):
+            var.assign(view)
+
+    def get_flat_gradients(self, x, y, out=None):
+        return self.flatten(self.get_gradients(x, y), self.trainable_layout, out)
+
+    def apply_flat_gradients(self, flat_gradients):
+        self.apply_gradients(self.unflatten(flat_gradients, self.trainable_layout))
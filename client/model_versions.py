@@ -0,0 +1,207 @@
+import os
+import zlib
+import numpy as np
+from client.chunked_store import ChunkedStore
+
+# Every SNAPSHOT_INTERVAL-th version is stored in full; the rest as deltas
+SNAPSHOT_INTERVAL = 10
+
+# zlib level of the deltas. The low mantissa bytes of a dense update are
+# close to random, and higher levels gain little on them for several times
+# the CPU time
+DELTA_LEVEL = 1
+
+
+def _bits(tensor):
+    # The raw bit patterns of a tensor as unsigned integers of the same width
+    arr = np.ascontiguousarray(tensor)
+    return arr.reshape(-1).view(np.dtype(f'<u{arr.dtype.itemsize}'))
+
+
+def encode_delta(old, new, level=DELTA_LEVEL):
+    """
+    Lossless delta from `old` to `new` (same shape and dtype) as a uint8
+    array: the XOR of their bit patterns, split into byte planes and
+    deflated. Sign, exponent and leading mantissa bits of a weight rarely
+    change between rounds, so the high byte planes are long zero runs.
+    """
+    old, new = np.asarray(old), np.asarray(new)
+    if old.shape != new.shape or old.dtype != new.dtype:
+        raise ValueError(f"Cannot encode a delta from {old.dtype}{old.shape} to {new.dtype}{new.shape}")
+    xor = np.bitwise_xor(_bits(new), _bits(old))
+    planes = xor.view(np.uint8).reshape(-1, xor.itemsize).T
+    return np.frombuffer(zlib.compress(planes.tobytes(), level), dtype=np.uint8)
+
+
+def apply_delta(old, delta):
+    """
+    Rebuild the tensor encode_delta(old, new) was made from.
+    """
+    old = np.asarray(old)
+    itemsize = old.dtype.itemsize
+    planes = np.frombuffer(zlib.decompress(delta), dtype=np.uint8)
+    if planes.size != old.size * itemsize:
+        raise ValueError(f"Delta of {planes.size} bytes does not match a base of {old.nbytes} bytes")
+    xor = np.ascontiguousarray(planes.reshape(itemsize, -1).T).view(_bits(old).dtype).reshape(-1)
+    return np.bitwise_xor(_bits(old), xor).view(old.dtype).reshape(old.shape)
+
+
+def _read_only(tensors):
+    for tensor in tensors:
+        tensor.flags.writeable = False
+    return tensors
+
+
+class ModelPublisher:
+    """
+    Publish side of the global model versions. Each new version is stored in
+    IPFS as a delta against the previous one, and every `snapshot_interval`
+    versions in full. A delta's container metadata names its base version,
+    the last snapshot and the deltas since that snapshot, so a client that
+    missed versions can catch up from the snapshot. Snapshots are stored
+    through a ChunkedStore (unless `chunked` is off), so layers that did not
+    change since the last snapshot are neither uploaded nor downloaded again.
+    """
+    def __init__(self, ipfs_handler, snapshot_interval=None, level=None, chunked=None, chunk_size=None):
+        self.ipfs_handler = ipfs_handler
+        if chunked is None:
+            chunked = os.getenv('MODEL_CHUNKED', '1').lower() in ('1', 'true', 'yes')
+        self.store = ChunkedStore(ipfs_handler, chunk_size) if chunked else None
+        self.snapshot_interval = snapshot_interval or int(os.getenv('MODEL_SNAPSHOT_INTERVAL', str(SNAPSHOT_INTERVAL)))
+        self.level = level if level is not None else int(os.getenv('MODEL_DELTA_LEVEL', str(DELTA_LEVEL)))
+        self.version = 0
+        self.cid = None
+        self.weights = None
+        self.snapshot_cid = None
+        self.snapshot_version = 0
+        self.deltas = []
+        self.last_ratio = 1.0
+
+    def resume(self, cid):
+        """
+        Continue the version chain of an already published model (e.g. the
+        current one on chain) after a restart.
+        """
+        fetcher = ModelFetcher(self.ipfs_handler)
+        self.weights = fetcher.fetch(cid)
+        info = fetcher.info
+        self.version, self.cid = info.get('version', 0), cid
+        if info['kind'] == 'snapshot':
+            self.snapshot_cid, self.snapshot_version, self.deltas = cid, self.version, []
+        else:
+            self.snapshot_cid, self.deltas = info['snapshot'], info['chain'] + [cid]
+            self.snapshot_version = self.version - len(self.deltas)
+        return self.weights
+
+    def publish(self, weights):
+        """
+        Store `weights` as the next model version and return its CID.
+        """
+        # A private copy is the base of the next delta
+        weights = _read_only([np.array(w, copy=True) for w in weights])
+        version = self.version + 1
+        full_bytes = sum(w.nbytes for w in weights)
+        if self.weights is None or version - self.snapshot_version >= self.snapshot_interval:
+            meta = {'model_version': {'version': version, 'kind': 'snapshot'}}
+            if self.store is not None:
+                cid = self.store.put(weights, meta)
+            else:
+                cid = self.ipfs_handler.add_tensors(weights, meta)
+            self.snapshot_cid, self.snapshot_version, self.deltas = cid, version, []
+            self.last_ratio = 1.0
+        else:
+            if len(weights) != len(self.weights):
+                raise ValueError(f"Expected {len(self.weights)} tensors, got {len(weights)}")
+            deltas = [encode_delta(old, new, self.level) for old, new in zip(self.weights, weights)]
+            cid = self.ipfs_handler.add_tensors(deltas, {'model_version': {
+                'version': version,
+                'kind': 'delta',
+                'base': self.cid,
+                'snapshot': self.snapshot_cid,
+                'chain': list(self.deltas)
+            }})
+            self.deltas.append(cid)
+            self.last_ratio = full_bytes / max(1, sum(d.nbytes for d in deltas))
+        self.version, self.cid, self.weights = version, cid, weights
+        return cid
+
+
+class ModelFetcher:
+    """
+    Client side: keeps the last fetched model version and rebuilds the next
+    one from its delta. After a gap (a base the client does not hold) it
+    starts over from the snapshot named in the delta, or from the newest
+    version in between it still holds. Chunked snapshots only download the
+    chunks that differ from the weights the client holds. Objects without
+    version metadata, e.g. models published with add_tensors, are read as
+    snapshots.
+
+    The returned weights are read-only: they are the base of the next delta.
+    """
+    def __init__(self, ipfs_handler):
+        self.ipfs_handler = ipfs_handler
+        self.store = ChunkedStore(ipfs_handler)
+        self.cid = None
+        self.weights = None
+        self.info = None
+        self.last_source = None
+        self.stats = {'snapshots': 0, 'deltas': 0, 'gaps': 0, 'bytes': 0, 'model_bytes': 0}
+
+    def _get(self, cid):
+        tensors, meta = self.ipfs_handler.get_tensors(cid, with_meta=True)
+        if ChunkedStore.is_manifest(meta):
+            fetched = self.store.stats['bytes_fetched']
+            tensors = self.store.assemble(meta, have=self.weights)
+            self.stats['bytes'] += self.store.stats['bytes_fetched'] - fetched
+        else:
+            self.stats['bytes'] += sum(t.nbytes for t in tensors)
+        info = meta.get('model_version') or {'version': 0, 'kind': 'snapshot'}
+        if info['kind'] not in ('snapshot', 'delta'):
+            raise ValueError(f"Unknown model version kind: {info['kind']}")
+        return tensors, info
+
+    def _snapshot(self, tensors):
+        self.stats['snapshots'] += 1
+        # Container tensors are views over the download; assembled ones are already private
+        return _read_only([t if t.flags.owndata else np.array(t, copy=True) for t in tensors])
+
+    def _apply(self, weights, deltas):
+        if len(weights) != len(deltas):
+            raise ValueError(f"Delta has {len(deltas)} tensors, the base model {len(weights)}")
+        self.stats['deltas'] += 1
+        return _read_only([apply_delta(w, d) for w, d in zip(weights, deltas)])
+
+    def _catch_up(self, info):
+        chain = info['chain']
+        if self.cid in chain:
+            weights, pending = self.weights, chain[chain.index(self.cid) + 1:]
+        elif self.cid == info['snapshot']:
+            weights, pending = self.weights, chain
+        else:
+            weights, pending = self._snapshot(self._get(info['snapshot'])[0]), chain
+        for cid in pending:
+            weights = self._apply(weights, self._get(cid)[0])
+        return weights, len(pending)
+
+    def fetch(self, cid):
+        """
+        Weights of the model version at `cid`.
+        """
+        if cid == self.cid:
+            self.last_source = 'cached'
+            return self.weights
+        tensors, info = self._get(cid)
+        if info['kind'] == 'snapshot':
+            weights = self._snapshot(tensors)
+            self.last_source = 'snapshot'
+        elif info['base'] == self.cid:
+            weights = self._apply(self.weights, tensors)
+            self.last_source = 'delta'
+        else:
+            self.stats['gaps'] += 1
+            base, applied = self._catch_up(info)
+            weights = self._apply(base, tensors)
+            self.last_source = f"catch-up over {applied + 1} deltas"
+        self.stats['model_bytes'] += sum(w.nbytes for w in weights)
+        self.cid, self.weights, self.info = cid, weights, info
+        return weights
@@ -0,0 +1,135 @@
+from functools import lru_cache
+
+# BN254 scalar field, the field circom circuits work over
+FIELD_MODULUS = 21888242871839275222246405745257275088548364400416034343698204186575808495617
+
+# Round numbers used by circomlib for t = 2..17 (1..16 inputs)
+FULL_ROUNDS = 8
+PARTIAL_ROUNDS = [56, 57, 56, 60, 60, 63, 64, 63, 60, 66, 60, 65, 70, 60, 64, 68]
+
+_FIELD_BITS = 254
+
+
+def _grain_bits(t, full_rounds, partial_rounds):
+    """
+    Bit stream of the Grain LFSR from the Poseidon reference parameter
+    generator (prime field, x^5 S-box), with its self-shrinking output.
+    """
+    state = []
+    for value, width in ((1, 2), (0, 4), (_FIELD_BITS, 12), (t, 12), (full_rounds, 10), (partial_rounds, 10)):
+        state.extend((value >> (width - 1 - i)) & 1 for i in range(width))
+    state.extend([1] * 30)
+
+    def step():
+        bit = state[62] ^ state[51] ^ state[38] ^ state[23] ^ state[13] ^ state[0]
+        state.pop(0)
+        state.append(bit)
+        return bit
+
+    for _ in range(160):
+        step()
+    while True:
+        # Self-shrinking: of each pair of bits, emit the second when the first is 1
+        while step() == 0:
+            step()
+        yield step()
+
+
+def _field_elements(bits, count, reject):
+    values = []
+    while len(values) < count:
+        value = 0
+        for _ in range(_FIELD_BITS):
+            value = (value << 1) | next(bits)
+        if reject and value >= FIELD_MODULUS:
+            continue
+        values.append(value % FIELD_MODULUS)
+    return values
+
+
+@lru_cache(maxsize=None)
+def parameters(num_inputs):
+    """
+    Round constants and MDS matrix of circomlib's Poseidon(num_inputs).
+    """
+    if not 1 <= num_inputs <= len(PARTIAL_ROUNDS):
+        raise ValueError(f"Poseidon takes 1 to {len(PARTIAL_ROUNDS)} inputs, got {num_inputs}")
+    t = num_inputs + 1
+    partial_rounds = PARTIAL_ROUNDS[num_inputs - 1]
+    bits = _grain_bits(t, FULL_ROUNDS, partial_rounds)
+
+    constants = _field_elements(bits, (FULL_ROUNDS + partial_rounds) * t, reject=True)
+    while True:
+        points = _field_elements(bits, 2 * t, reject=False)
+        if len(set(points)) == len(points):
+            break
+    xs, ys = points[:t], points[t:]
+    mds = [[pow(x + y, -1, FIELD_MODULUS) for y in ys] for x in xs]
+    return constants, mds, partial_rounds
+
+
+@lru_cache(maxsize=None)
+def _rounds(num_inputs):
+    # Constants grouped per round and split into the first full rounds, the
+    # partial rounds and the last full rounds
+    constants, mds, partial_rounds = parameters(num_inputs)
+    t = num_inputs + 1
+    rounds = [tuple(constants[r * t:(r + 1) * t]) for r in range(FULL_ROUNDS + partial_rounds)]
+    half = FULL_ROUNDS // 2
+    return rounds[:half], rounds[half:half + partial_rounds], rounds[half + partial_rounds:], tuple(map(tuple, mds))
+
+
+def poseidon(inputs):
+    """
+    Poseidon hash of 1..16 field elements, equal to circomlib's
+    Poseidon(len(inputs)) output.
+    """
+    if len(inputs) == 2:
+        return _hash2(int(inputs[0]) % FIELD_MODULUS, int(inputs[1]) % FIELD_MODULUS)
+    p = FIELD_MODULUS
+    first, partial, last, mds = _rounds(len(inputs))
+    state = [0] + [int(x) % p for x in inputs]
+
+    for constants in first:
+        state = [pow(x + c, 5, p) for x, c in zip(state, constants)]
+        state = [sum(m * x for m, x in zip(row, state)) % p for row in mds]
+    for constants in partial:
+        state = [x + c for x, c in zip(state, constants)]
+        state[0] = pow(state[0], 5, p)
+        state = [sum(m * x for m, x in zip(row, state)) % p for row in mds]
+    for constants in last:
+        state = [pow(x + c, 5, p) for x, c in zip(state, constants)]
+        state = [sum(m * x for m, x in zip(row, state)) % p for row in mds]
+    return state[0]
+
+
+def _hash2(a, b):
+    # Poseidon(2) unrolled for t = 3; it is the inner loop of poseidon_chain
+    p = FIELD_MODULUS
+    first, partial, last, ((m00, m01, m02), (m10, m11, m12), (m20, m21, m22)) = _rounds(2)
+    s0, s1, s2 = 0, a, b
+    for c0, c1, c2 in first:
+        s0, s1, s2 = pow(s0 + c0, 5, p), pow(s1 + c1, 5, p), pow(s2 + c2, 5, p)
+        s0, s1, s2 = (m00 * s0 + m01 * s1 + m02 * s2) % p, (m10 * s0 + m11 * s1 + m12 * s2) % p, (m20 * s0 + m21 * s1 + m22 * s2) % p
+    for c0, c1, c2 in partial:
+        s0, s1, s2 = pow(s0 + c0, 5, p), s1 + c1, s2 + c2
+        s0, s1, s2 = (m00 * s0 + m01 * s1 + m02 * s2) % p, (m10 * s0 + m11 * s1 + m12 * s2) % p, (m20 * s0 + m21 * s1 + m22 * s2) % p
+    for c0, c1, c2 in last:
+        s0, s1, s2 = pow(s0 + c0, 5, p), pow(s1 + c1, 5, p), pow(s2 + c2, 5, p)
+        s0, s1, s2 = (m00 * s0 + m01 * s1 + m02 * s2) % p, (m10 * s0 + m11 * s1 + m12 * s2) % p, (m20 * s0 + m21 * s1 + m22 * s2) % p
+    return s0
+
+
+def poseidon_chain(inputs):
+    """
+    Left-to-right chain of 2-input Poseidon hashes,
+    h = P(in[0], in[1]), h = P(h, in[i]) for i >= 2; the PoseidonChain
+    template in zk-circuits computes the same value.
+    """
+    if len(inputs) < 2:
+        raise ValueError("poseidon_chain needs at least two inputs")
+    p = FIELD_MODULUS
+    digest = _hash2(int(inputs[0]) % p, int(inputs[1]) % p)
+    for value in inputs[2:]:
+        digest = _hash2(digest, int(value) % p)
+    return digest
@@ -0,0 +1,304 @@
+import json
+import multiprocessing
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from client.lazy import LazyModule
+
+eth_abi = LazyModule('eth_abi')
+
+# Circuit of the gradient proofs of an external prover (zk-circuits/gradient_verification.circom)
+GRADIENT_CIRCUIT = 'gradient_verification'
+
+# Proving keys (or whatever the prover loads per circuit) of this worker
+# process, loaded on a worker's first job for a circuit
+_worker_keys = {}
+
+
+def _run_job(prover, circuit, inputs):
+    start = time.perf_counter()
+    cache_key = prover.cache_key(circuit)
+    loaded = cache_key not in _worker_keys
+    if loaded:
+        _worker_keys[cache_key] = prover.load_key(circuit)
+    result = prover.prove(_worker_keys[cache_key], circuit, inputs)
+    return result, {'pid': os.getpid(), 'key_loaded': loaded, 'seconds': time.perf_counter() - start}
+
+
+class LocalProver:
+    """
+    Runs ZKProver inside the worker process. Jobs are ('gradient',
+    gradients) or ('training', (model_weights, accuracy)).
+    """
+    def cache_key(self, circuit):
+        return ('local', circuit)
+
+    def load_key(self, circuit):
+        from client.zk_prover import ZKProver
+        return ZKProver(workers=1)
+
+    def gradient_job(self, model_weights, tensors, meta=None):
+        # Commits to the uploaded tensors as they are
+        return 'gradient', tensors
+
+    def prove(self, prover, circuit, inputs):
+        if circuit == 'gradient':
+            return prover.generate_gradient_proof(inputs)
+        if circuit == 'training':
+            return prover.generate_training_proof(*inputs)
+        raise ValueError(f"Unknown circuit: {circuit}")
+
+
+class CommandProver:
+    """
+    Runs an external prover binary on JSON circuit inputs and returns
+    (proof, public_signals) as parsed from its output.
+
+    `command` may use the placeholders {circuit} and {key} (the proving key
+    `<key_dir>/<circuit>.zkey`). In one-shot mode it also gets {input},
+    {proof} and {public} file paths, like `snarkjs groth16 fullprove`. With
+    `persistent=True` the command is started once per worker and circuit, so
+    the proving key is loaded once; it then reads one JSON object
+    {"input": ...} per line on stdin and answers with one
+    {"proof": ..., "public": ...} line on stdout.
+
+    Inputs that are a list (one witness per block, as gradient_job() builds
+    them) are proven one block at a time; the result is then the list of
+    proofs and the public signals of all blocks in order.
+    """
+    def __init__(self, command, key_dir=None, persistent=False, timeout=None):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.key_dir = key_dir or os.getenv('PROVING_KEY_DIR', os.path.join('build', 'keys'))
+        self.persistent = persistent
+        self.timeout = timeout
+
+    def _key_path(self, circuit):
+        return os.path.join(self.key_dir, f"{circuit}.zkey")
+
+    def _format(self, **fields):
+        return [part.format(**fields) for part in self.command]
+
+    def cache_key(self, circuit):
+        return ('command', tuple(self.command), self._key_path(circuit), self.persistent)
+
+    def load_key(self, circuit):
+        key = self._key_path(circuit)
+        if not os.path.exists(key):
+            raise RuntimeError(f"No proving key for circuit {circuit}: {key}")
+        if not self.persistent:
+            return key
+        return subprocess.Popen(
+            self._format(circuit=circuit, key=key),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1
+        )
+
+    def gradient_job(self, model_weights, tensors, meta=None):
+        """
+        (circuit, witness) of a gradient proof: gradient_verification inputs
+        for every block of the model and of the gradient a verifier rebuilds
+        from the uploaded `tensors` (decompressed if `meta` says so).
+        """
+        from client.zk_prover import ZKProver
+        from common.compression import CompressedGradient, decompress
+        if CompressedGradient.is_compressed(meta):
+            tensors = [decompress(CompressedGradient.from_tensors(tensors, meta))]
+        return GRADIENT_CIRCUIT, ZKProver(workers=1).circuit_inputs(model_weights, tensors)
+
+    def prove(self, key, circuit, inputs):
+        if isinstance(inputs, list):
+            results = [self.prove(key, circuit, block) for block in inputs]
+            return [proof for proof, _ in results], [signal for _, public in results for signal in public]
+        if self.persistent:
+            return self._prove_persistent(key, inputs)
+
+        with tempfile.TemporaryDirectory() as workdir:
+            paths = {name: os.path.join(workdir, f"{name}.json") for name in ('input', 'proof', 'public')}
+            with open(paths['input'], 'w') as f:
+                json.dump(inputs, f)
+            completed = subprocess.run(
+                self._format(circuit=circuit, key=key, **paths),
+                capture_output=True, text=True, timeout=self.timeout
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f"Prover failed for circuit {circuit}: {completed.stderr.strip()}")
+            with open(paths['proof']) as f:
+                proof = json.load(f)
+            with open(paths['public']) as f:
+                public = json.load(f)
+        return proof, public
+
+    def _prove_persistent(self, process, inputs):
+        if process.poll() is not None:
+            raise RuntimeError(f"Prover process exited with status {process.returncode}")
+        process.stdin.write(json.dumps({'input': inputs}) + '\n')
+        process.stdin.flush()
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("Prover process closed its output")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise RuntimeError(f"Prover failed: {reply['error']}")
+        return reply['proof'], reply['public']
+
+
+def _groth16_words(proof):
+    # snarkjs JSON to the uint256[8] a, b, c of a Solidity Groth16 verifier;
+    # the coordinates of b are swapped there
+    (b00, b01), (b10, b11) = proof['pi_b'][0][:2], proof['pi_b'][1][:2]
+    return [int(x) for x in (*proof['pi_a'][:2], b01, b00, b11, b10, *proof['pi_c'][:2])]
+
+
+def encode_proof(result):
+    """
+    A prover's (proof, public signals) result as the hex strings
+    BlockchainClient.submit_gradient() takes. LocalProver results already
+    are; Groth16 proofs are ABI-encoded as uint256[8][] and their public
+    signals as uint256[]. Proofs of other protocols are sent as canonical
+    JSON.
+    """
+    proof, public = result
+    if isinstance(proof, str):
+        return proof, public
+    proofs = proof if isinstance(proof, list) else [proof]
+    if all('pi_a' in p for p in proofs):
+        proof_bytes = eth_abi.encode(['uint256[8][]'], [[_groth16_words(p) for p in proofs]])
+    else:
+        proof_bytes = json.dumps(proofs, sort_keys=True, separators=(',', ':')).encode()
+    public_bytes = eth_abi.encode(['uint256[]'], [[int(signal) for signal in public]])
+    return '0x' + proof_bytes.hex(), '0x' + public_bytes.hex()
+
+
+def default_prover():
+    """
+    CommandProver for PROVER_COMMAND when it is set, LocalProver otherwise.
+    """
+    command = os.getenv('PROVER_COMMAND')
+    if command:
+        return CommandProver(command, persistent=os.getenv('PROVER_PERSISTENT', 'false').lower() == 'true')
+    return LocalProver()
+
+
+class _Job:
+    def __init__(self, circuit, inputs, round_id):
+        self.future = Future()
+        self.circuit = circuit
+        self.inputs = inputs
+        self.round_id = round_id
+
+
+class ProofScheduler:
+    """
+    Runs proving jobs in a process pool, off the training critical path.
+
+    At most `max_pending` jobs are queued or running; submit() blocks while
+    the queue is full. Jobs are handed to the pool only when a worker is
+    free, so everything still queued can be cancelled, e.g. with
+    cancel_round() once a round ends early. A job that is already running
+    cannot be interrupted: its future is cancelled at once and its result
+    dropped when it completes.
+    """
+    def __init__(self, prover=None, workers=None, max_pending=None, start_method=None):
+        self.prover = prover or default_prover()
+        self.workers = workers or int(os.getenv('PROOF_WORKERS', '1'))
+        self.max_pending = max_pending or int(os.getenv('PROOF_QUEUE_SIZE', str(2 * self.workers)))
+        # Workers are spawned rather than forked: the parent may already run
+        # TensorFlow threads, which do not survive a fork
+        self.start_method = start_method or os.getenv('PROOF_START_METHOD', 'spawn')
+        self._pool = None
+        self._queue = deque()
+        self._running = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'key_loads': 0, 'prove_seconds': 0.0}
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._pool
+
+    def _pending(self):
+        return sum(1 for job in self._queue if not job.future.done()) + len(self._running)
+
+    def submit(self, circuit, inputs, round_id=None, timeout=None):
+        """
+        Queue a proving job and return a Future of the prover's result.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ProofScheduler is shut down")
+            if not self._condition.wait_for(lambda: self._pending() < self.max_pending, timeout):
+                raise RuntimeError(f"Proof queue is full ({self.max_pending} jobs pending)")
+            job = _Job(circuit, inputs, round_id)
+            self._queue.append(job)
+            self.stats['submitted'] += 1
+            self._dispatch()
+        return job.future
+
+    def _dispatch(self):
+        while self._queue and len(self._running) < self.workers:
+            job = self._queue.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            pool_future = self._executor().submit(_run_job, self.prover, job.circuit, job.inputs)
+            self._running[pool_future] = job
+            pool_future.add_done_callback(self._finished)
+
+    def _finished(self, pool_future):
+        with self._condition:
+            job = self._running.pop(pool_future)
+            if not job.future.done():
+                error = pool_future.exception()
+                if error is not None:
+                    self.stats['failed'] += 1
+                    job.future.set_exception(error)
+                else:
+                    result, info = pool_future.result()
+                    self.stats['completed'] += 1
+                    self.stats['key_loads'] += info['key_loaded']
+                    self.stats['prove_seconds'] += info['seconds']
+                    job.future.set_result(result)
+            if not self._closed:
+                self._dispatch()
+            self._condition.notify_all()
+
+    def cancel_round(self, round_id):
+        """
+        Cancel every job of `round_id`; returns how many were cancelled.
+        """
+        cancelled = 0
+        with self._condition:
+            for job in list(self._queue):
+                if job.round_id == round_id and job.future.cancel():
+                    self._queue.remove(job)
+                    cancelled += 1
+            for job in self._running.values():
+                if job.round_id == round_id and not job.future.done():
+                    job.future.set_exception(CancelledError(f"Round {round_id} was cancelled"))
+                    cancelled += 1
+            self.stats['cancelled'] += cancelled
+            self._condition.notify_all()
+        return cancelled
+
+    def shutdown(self, wait=True):
+        with self._condition:
+            self._closed = True
+            for job in self._queue:
+                if job.future.cancel():
+                    self.stats['cancelled'] += 1
+            self._queue.clear()
+            self._condition.notify_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
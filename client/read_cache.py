@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from client.rpc_batch import encode_call
+
+
+class BlockReadCache:
+    """
+    Read-through cache for contract view calls, keyed by the head block.
+
+    Every cached read is executed against one block number, so all values
+    served together are consistent with each other. Each call()/call_many()
+    first reads the head block (one eth_blockNumber, shared by all functions
+    of a call_many) and the whole cache is dropped as soon as the head
+    advances, or when observe_block() reports a newer block, e.g. from an
+    event or a transaction receipt. A read of nothing but pinned functions
+    skips the head read.
+
+    A positive `head_ttl` (READ_CACHE_HEAD_TTL) skips the head read for that
+    many seconds after the last one. That saves a round-trip per read but
+    can serve the previous block's state for up to `head_ttl` seconds, so it
+    is off by default.
+
+    Functions named in `pinned` read immutable state (constructor-set
+    addresses, constants) and are cached for the lifetime of the object;
+    their misses are fetched at the last known block.
+    """
+    def __init__(self, w3, pinned=(), head_ttl=None):
+        self.w3 = w3
+        self.pinned = set(pinned)
+        self.head_ttl = head_ttl if head_ttl is not None else float(os.getenv('READ_CACHE_HEAD_TTL', '0'))
+        self.block = None
+        self._head_time = 0.0
+        self._entries = {}
+        self._pinned_entries = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.head_reads = 0
+        self.invalidations = 0
+
+    def _key(self, function):
+        return function.address, encode_call(self.w3, function)
+
+    def _advance(self, block):
+        if self.block is not None and block > self.block:
+            self._entries.clear()
+            self.invalidations += 1
+        if self.block is None or block >= self.block:
+            self.block = block
+            self._head_time = time.monotonic()
+
+    def observe_block(self, block):
+        """
+        Report a block known to exist, invalidating the cache if it is newer
+        than the cached head.
+        """
+        with self._lock:
+            self._advance(block)
+
+    def head(self):
+        with self._lock:
+            fresh = (self.head_ttl > 0 and self.block is not None
+                     and time.monotonic() - self._head_time <= self.head_ttl)
+        if not fresh:
+            block = self.w3.eth.block_number
+            with self._lock:
+                self.head_reads += 1
+                self._advance(block)
+        return self.block
+
+    def _lookup(self, function):
+        key = self._key(function)
+        entries = self._pinned_entries if function.fn_name in self.pinned else self._entries
+        with self._lock:
+            if key in entries:
+                self.hits += 1
+                return True, entries[key]
+            self.misses += 1
+        return False, key
+
+    def _store(self, function, key, value, block):
+        with self._lock:
+            if function.fn_name in self.pinned:
+                self._pinned_entries[key] = value
+            elif block == self.block:
+                # A result for an older head must not outlive the invalidation
+                self._entries[key] = value
+
+    def call(self, function):
+        return self.call_many([function])[0]
+
+    def call_many(self, functions, fetch=None):
+        """
+        Resolve `functions` from the cache, fetching the misses at the cached
+        head block. `fetch(functions, block_identifier)` defaults to one
+        .call() per function; pass a batch caller to fetch misses together.
+        """
+        functions = list(functions)
+        if all(function.fn_name in self.pinned for function in functions):
+            # Immutable values do not depend on the head; blocks reported
+            # through observe_block() keep self.block current enough
+            block = self.block if self.block is not None else 'latest'
+        else:
+            block = self.head()
+        results = [None] * len(functions)
+        missing = []
+        for i, function in enumerate(functions):
+            found, value = self._lookup(function)
+            if found:
+                results[i] = value
+            else:
+                missing.append((i, value))
+
+        if missing:
+            to_fetch = [functions[i] for i, _ in missing]
+            if fetch is None:
+                values = [function.call(block_identifier=block) for function in to_fetch]
+            else:
+                values = fetch(to_fetch, block)
+            for (i, key), value in zip(missing, values):
+                self._store(functions[i], key, value, block)
+                results[i] = value
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned_entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'head_reads': self.head_reads,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries) + len(self._pinned_entries),
+            'block': self.block
+        }
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common import metrics
+from client.proof_scheduler import encode_proof
+from client.model_versions import ModelFetcher
+
+
+class StageTimings:
+    """
+    Start and end of each pipeline stage, in seconds since the round began.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = {}
+
+    def record(self, name, start, end):
+        self.stages[name] = (start - self.origin, end - self.origin)
+        # Stages overlap, so each gets its own row in the round trace
+        metrics.span(name, start, end, lane=name)
+
+    @property
+    def total(self):
+        return max((end for _, end in self.stages.values()), default=0.0)
+
+    @property
+    def busy(self):
+        # What the round would take with the stages run one after another
+        return sum(end - start for start, end in self.stages.values())
+
+    def summary(self):
+        stages = ', '.join(
+            f"{name} {end - start:.2f}s" for name, (start, end) in sorted(self.stages.items(), key=lambda item: item[1])
+        )
+        return f"{stages}; total {self.total:.2f}s (stages sum {self.busy:.2f}s)"
+
+
+class RoundPipeline:
+    """
+    One training round of the client node as a staged asyncio pipeline.
+
+    The model download starts as soon as the round is opened, alongside the
+    round eligibility checks. After training, the gradients are compressed
+    (if a compressor is set), then the uploaded form is proven (in the
+    ProofScheduler's process pool), serialized and uploaded to IPFS, and
+    the local model is evaluated, all at the same time; the submission waits
+    only for the proof and the upload. Blocking calls run on a small thread
+    pool so network stages overlap the CPU-bound ones.
+    """
+    def __init__(self, blockchain_client, ipfs_handler, model_trainer, data_handler, proof_scheduler,
+                 compressor=None, workers=4):
+        self.blockchain_client = blockchain_client
+        self.ipfs_handler = ipfs_handler
+        self.model_trainer = model_trainer
+        self.data_handler = data_handler
+        self.proof_scheduler = proof_scheduler
+        self.compressor = compressor
+        # Keeps the last global model, so new versions arrive as deltas
+        self.model_fetcher = ModelFetcher(ipfs_handler)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='round-pipeline')
+        self.last_timings = None
+
+    async def _stage(self, timings, name, func, *args):
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            timings.record(name, start, time.perf_counter())
+
+    async def _wait_stage(self, timings, name, future):
+        start = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            timings.record(name, start, time.perf_counter())
+
+    def _check_round(self, round_id, address):
+        contract = self.blockchain_client.contract
+        round_info, round_participants = self.blockchain_client.batch_call([
+            contract.functions.rounds(round_id),
+            contract.functions.getRoundParticipants(round_id)
+        ])
+        return round_info, address in round_participants
+
+    def _fetch_model(self):
+        model_hash = self.blockchain_client.get_current_model()
+        if not model_hash:
+            return None
+        try:
+            weights = self.model_fetcher.fetch(model_hash)
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            # Continue with the current local model
+            return None
+        source = self.model_fetcher.last_source
+        if self.ipfs_handler.cache is not None:
+            source += f", cache hit rate: {self.ipfs_handler.cache.stats()['hit_rate']:.0%}"
+        print(f"Loaded model from IPFS: {model_hash} ({source})")
+        return weights
+
+    def _train(self, weights):
+        if weights is not None:
+            self.model_trainer.set_weights(weights)
+        x_train, y_train = self.data_handler.get_train_data()
+        print("Training local model...")
+        self.model_trainer.train(x_train, y_train, epochs=1)
+
+    def _gradients(self):
+        # Accumulated over the whole local dataset in compiled micro-batches;
+        # workers get NumPy arrays so they never import TensorFlow
+        x, y = self.data_handler.get_train_data()
+        gradients = [g.numpy() for g in self.model_trainer.get_gradients(x, y)]
+        # The weights the gradients were taken at, for the proof's witness
+        return self.model_trainer.get_trainable_weights(), gradients
+
+    def _evaluate(self):
+        x_test, y_test = self.data_handler.get_test_data()
+        loss, accuracy = self.model_trainer.evaluate(x_test, y_test)
+        print(f"Local model evaluation - Loss: {loss}, Accuracy: {accuracy}")
+        return loss, accuracy
+
+    def _compress(self, gradients):
+        # The tensors (and container metadata) that go to IPFS, so the proof
+        # commits to exactly what a verifier can fetch
+        if not self.compressor:
+            return gradients, None
+        tensors, meta = self.compressor.compress(gradients).to_tensors()
+        print(f"Compressed gradients with {self.compressor.method}: {self.compressor.last_ratio:.1f}x smaller")
+        return tensors, meta
+
+    def _upload(self, tensors, meta):
+        gradient_hash = self.ipfs_handler.add_tensors(tensors, meta)
+        print(f"Gradients saved to IPFS: {gradient_hash}")
+        return gradient_hash
+
+    async def run_round(self, round_id, address, private_key):
+        """
+        Take part in round `round_id`. Returns 'submitted', 'already_submitted'
+        or 'ended'; the stage timings are kept in `last_timings`.
+        """
+        timings = StageTimings()
+        self.last_timings = timings
+        fetch = asyncio.ensure_future(self._stage(timings, 'fetch_model', self._fetch_model))
+        round_info, has_submitted = await self._stage(timings, 'check_round', self._check_round, round_id, address)
+        end_time = round_info[1]
+        if has_submitted or time.time() > end_time:
+            # The download keeps its thread busy until done; let it finish
+            await asyncio.gather(fetch, return_exceptions=True)
+            return 'already_submitted' if has_submitted else 'ended'
+
+        print(f"Participating in round {round_id}...")
+        weights = await fetch
+        await self._stage(timings, 'train', self._train, weights)
+        model_weights, gradients = await self._stage(timings, 'gradients', self._gradients)
+        tensors, meta = await self._stage(timings, 'compress', self._compress, gradients)
+        circuit, witness = await self._stage(
+            timings, 'witness', self.proof_scheduler.prover.gradient_job, model_weights, tensors, meta
+        )
+
+        print("Generating ZK proof and uploading gradients...")
+        proof = self._wait_stage(
+            timings, 'prove', self.proof_scheduler.submit(circuit, witness, round_id=round_id)
+        )
+        upload = self._stage(timings, 'upload', self._upload, tensors, meta)
+        evaluate = asyncio.ensure_future(self._stage(timings, 'evaluate', self._evaluate))
+        try:
+            # A proof that is not ready when the round ends is of no use
+            result, gradient_hash = await asyncio.wait_for(
+                asyncio.gather(proof, upload), timeout=max(0, end_time - time.time())
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.proof_scheduler.cancel_round(round_id)
+            await asyncio.gather(evaluate, return_exceptions=True)
+            return 'ended'
+
+        zk_proof, public_inputs = encode_proof(result)
+        print("Submitting to blockchain...")
+        await self._stage(
+            timings, 'submit', self.blockchain_client.submit_gradient,
+            address, private_key, round_id, gradient_hash, zk_proof, public_inputs
+        )
+        await evaluate
+        return 'submitted'
+
+    def run(self, round_id, address, private_key):
+        metrics.begin_round(round_id)
+        status = None
+        try:
+            status = asyncio.run(self.run_round(round_id, address, private_key))
+        finally:
+            # A skipped round must not overwrite the trace of the attempt at it
+            metrics.end_round(keep=status in (None, 'submitted'))
+        metrics.count('client_rounds', status=status)
+        return status
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from common import metrics
+from client.lazy import LazyModule
+
+web3_exceptions = LazyModule('web3.exceptions')
+
+# Headroom added on top of eth_estimateGas, since memoized estimates are
+# reused for calls whose arguments (e.g. string lengths) differ slightly
+GAS_MARGIN = 1.2
+
+
+def raw_transaction(signed):
+    # eth-account renamed rawTransaction to raw_transaction in 0.13
+    return getattr(signed, 'raw_transaction', None) or signed.rawTransaction
+
+
+class TransactionEngine:
+    """
+    Signs and sends transactions without the per-transaction bookkeeping
+    round-trips. Nonces are tracked locally per account, the gas price is
+    fetched at most once per block and gas estimates are memoized per
+    (contract, function selector). Calls whose cost depends on contract
+    state, e.g. a submission that also finalizes the round, must pass an
+    explicit `gas` so no memoized estimate is applied to them.
+
+    send() returns as soon as the node accepts a transaction, so several can
+    be in flight at once; wait() then polls all of their receipts in a single
+    loop instead of blocking on each one in turn.
+    """
+    def __init__(self, w3, gas_margin=GAS_MARGIN, fee_ttl=None, poll_interval=0.1, timeout=120):
+        self.w3 = w3
+        self.gas_margin = gas_margin
+        self.fee_ttl = fee_ttl if fee_ttl is not None else float(os.getenv('BLOCK_TIME', '2'))
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._nonces = {}
+        self._accounts = {}
+        self._gas_estimates = {}
+        self._pending_keys = {}
+        self._chain_id = None
+        self._gas_price = None
+        self._fee_block = -1
+        self._fee_time = 0.0
+        self._head_block = -1
+        self.stats = {
+            'sent': 0,
+            'confirmed': 0,
+            'failed': 0,
+            'nonce_resyncs': 0,
+            'gas_estimates': 0,
+            'fee_fetches': 0
+        }
+
+    def _account(self, private_key):
+        account = self._accounts.get(private_key)
+        if account is None:
+            account = self._accounts[private_key] = self.w3.eth.account.from_key(private_key)
+        return account
+
+    @property
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def next_nonce(self, address):
+        with self._lock:
+            nonce = self._nonces.get(address)
+            if nonce is None:
+                nonce = self.w3.eth.get_transaction_count(address, 'pending')
+            self._nonces[address] = nonce + 1
+            return nonce
+
+    def resync_nonce(self, address):
+        """
+        Forget the local nonce of `address`; the next send re-reads it from
+        the node. Needed after a rejected send or when the account is also
+        used outside this engine.
+        """
+        with self._lock:
+            self._nonces.pop(address, None)
+            self.stats['nonce_resyncs'] += 1
+
+    def gas_price(self):
+        with self._lock:
+            stale = self._fee_block < self._head_block or time.monotonic() - self._fee_time > self.fee_ttl
+            if self._gas_price is None or stale:
+                self._gas_price = self.w3.eth.gas_price
+                self._fee_block = self._head_block
+                self._fee_time = time.monotonic()
+                self.stats['fee_fetches'] += 1
+            return self._gas_price
+
+    def _estimate_key(self, tx):
+        return tx.get('to'), (tx.get('data') or '0x')[:10]
+
+    def estimate_gas(self, tx):
+        key = self._estimate_key(tx)
+        gas = self._gas_estimates.get(key)
+        if gas is None:
+            estimate = self.w3.eth.estimate_gas({k: tx[k] for k in ('from', 'to', 'data', 'value') if k in tx})
+            gas = self._gas_estimates[key] = int(estimate * self.gas_margin)
+            self.stats['gas_estimates'] += 1
+        return gas
+
+    def build(self, transaction, sender, value=0):
+        """
+        Turn a contract function call (or a plain transaction dict) into an
+        unsigned transaction with fees and chain id filled from the caches.
+        """
+        params = {'from': sender, 'value': value, 'chainId': self.chain_id, 'gasPrice': self.gas_price()}
+        if hasattr(transaction, 'build_transaction'):
+            # A placeholder gas and nonce keep web3 from fetching them itself
+            tx = transaction.build_transaction(dict(params, gas=0, nonce=0))
+        else:
+            tx = dict(params, **transaction)
+        tx.pop('nonce', None)
+        return tx
+
+    def send(self, transaction, private_key, gas=None, value=0):
+        """
+        Sign and broadcast without waiting for it to be mined; returns the
+        transaction hash. Pass `gas` for calls that cannot be estimated yet,
+        e.g. ones that depend on a transaction still in flight.
+        """
+        start = time.perf_counter()
+        account = self._account(private_key)
+        tx = self.build(transaction, account.address, value)
+        key = self._estimate_key(tx)
+        tx['gas'] = gas or self.estimate_gas(tx)
+        tx['nonce'] = self.next_nonce(account.address)
+
+        signed = account.sign_transaction(tx)
+        try:
+            tx_hash = self.w3.eth.send_raw_transaction(raw_transaction(signed))
+        except Exception:
+            # The nonce was not consumed (or was already stale)
+            self.resync_nonce(account.address)
+            raise
+        with self._lock:
+            self.stats['sent'] += 1
+            if gas is None:
+                self._pending_keys[tx_hash] = (key, tx['gas'])
+        metrics.span('tx_submit', start, time.perf_counter())
+        return tx_hash
+
+    def _observe(self, tx_hash, receipt):
+        with self._lock:
+            self._head_block = max(self._head_block, receipt['blockNumber'])
+            estimate = self._pending_keys.pop(tx_hash, None)
+            if receipt['status'] == 1:
+                self.stats['confirmed'] += 1
+                metrics.count('transactions', status='confirmed')
+                return
+            self.stats['failed'] += 1
+            metrics.count('transactions', status='failed')
+            if estimate is not None and receipt['gasUsed'] >= estimate[1]:
+                # Ran out of memoized gas: estimate afresh next time
+                self._gas_estimates.pop(estimate[0], None)
+
+    def wait(self, tx_hashes, timeout=None):
+        """
+        Wait for all `tx_hashes` to be mined and return their receipts in the
+        same order.
+        """
+        start = time.perf_counter()
+        receipts = [None] * len(tx_hashes)
+        pending = {tx_hash: i for i, tx_hash in enumerate(tx_hashes)}
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while pending:
+            for tx_hash in list(pending):
+                try:
+                    receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+                except web3_exceptions.TransactionNotFound:
+                    continue
+                receipts[pending.pop(tx_hash)] = receipt
+                self._observe(tx_hash, receipt)
+            if not pending:
+                break
+            if time.monotonic() > deadline:
+                raise web3_exceptions.TimeExhausted(f"{len(pending)} transactions not mined after {timeout or self.timeout}s")
+            time.sleep(self.poll_interval)
+        metrics.span('receipt_wait', start, time.perf_counter())
+        return receipts
+
+    @staticmethod
+    def check(receipt):
+        """
+        Return `receipt`, or raise RuntimeError if its transaction reverted.
+        """
+        if receipt['status'] != 1:
+            raise RuntimeError(
+                f"Transaction {receipt['transactionHash'].hex()} reverted in block {receipt['blockNumber']} "
+                f"after using {receipt['gasUsed']} gas"
+            )
+        return receipt
+
+    def transact(self, transaction, private_key, gas=None, value=0):
+        """
+        Send and wait for one transaction; raises RuntimeError if it reverted.
+        """
+        return self.check(self.wait([self.send(transaction, private_key, gas, value)])[0])
@@ -1,12 +1,32 @@
-import hashlib
+import numpy as np
+from client.field_encoding import gradient_circuit_inputs, hash_tensors
+from client.merkle import commit_tensors
 
 class ZKProver:
+    def __init__(self, chunk_size=None, workers=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        # Kept so the caller can hand out inclusion proofs for spot checks
+        self.last_commitment = None
+
+    def commit(self, tensors):
+        self.last_commitment = commit_tensors(tensors, self.chunk_size, self.workers)
+        return self.last_commitment
+
     def generate_gradient_proof(self, gradients):
-        data = str(gradients).encode()
-        proof = hashlib.sha256(data).hexdigest()
+        # Commits to the raw gradient bytes; str() of a large tensor is
+        # truncated with '...' and cannot tell gradients apart
+        proof = self.commit(gradients).root_hex
         return f"0x{proof}", f"0x{proof[:8]}"
-    
+
     def generate_training_proof(self, model_weights, accuracy):
-        data = str(model_weights + [accuracy]).encode()
-        proof = hashlib.sha256(data).hexdigest()
+        proof = self.commit(list(model_weights) + [np.float64(accuracy)]).root_hex
         return f"0x{proof}", f"0x{proof[:8]}"
+
+    def field_hashes(self, tensors, fraction_bits=None):
+        # PoseidonChain hash per 100-parameter block, as computed in the circuits
+        return hash_tensors(tensors, fraction_bits, workers=self.workers)
+
+    def circuit_inputs(self, model_weights, gradients, fraction_bits=None):
+        # gradient_verification.circom inputs (modelHash, gradientHash, model, gradient) per block
+        return gradient_circuit_inputs(model_weights, gradients, fraction_bits)
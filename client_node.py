@@ -1,15 +1,20 @@
 import argparse
 import os
 import time
-import json
 from dotenv import load_dotenv
-from web3 import Web3
 
+from common import metrics
 from client.data_handler import DataHandler
 from client.model_trainer import ModelTrainer
-from client.zk_prover import ZKProver
+from client.proof_scheduler import ProofScheduler
+from client.round_pipeline import RoundPipeline
+from client.compression import GradientCompressor, METHODS
 from client.blockchain_client import BlockchainClient
+from client.contracts import get_contract
+from client.lazy import profiling_enabled, report_startup
+from client.event_monitor import RoundEventMonitor
 from server.ipfs_handler import IPFSHandler
+from server.ipfs_cache import IPFSCache
 
 load_dotenv()
 
@@ -18,54 +23,59 @@ def main():
     parser.add_argument('--participant-id', type=int, required=True, help='Participant ID')
     parser.add_argument('--private-key', type=str, required=True, help='Private key for blockchain transactions')
     parser.add_argument('--data-path', type=str, default='data', help='Path to training data')
+    parser.add_argument('--compression', type=str, default='none', choices=METHODS, help='Gradient compression method')
+    parser.add_argument('--topk-ratio', type=float, default=0.01, help='Fraction of gradient entries kept by top-k compression')
+    parser.add_argument('--threshold', type=float, default=None, help='Magnitude threshold for threshold compression')
+    parser.add_argument('--profile-startup', action='store_true', default=profiling_enabled(), help='Report start-up and import times')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Serve Prometheus metrics on this port (METRICS_PORT)')
+    parser.add_argument('--trace-dir', type=str, default=None, help='Write a Chrome trace per round here (METRICS_TRACE_DIR)')
     
     args = parser.parse_args()
+    metrics.configure(f'client-{args.participant_id}', port=args.metrics_port, trace_dir=args.trace_dir)
     
     # Initialize components
     data_handler = DataHandler(args.data_path)
     model_trainer = ModelTrainer()
-    zk_prover = ZKProver()
+    proof_scheduler = ProofScheduler()
+    compressor = None
+    if args.compression != 'none':
+        compressor = GradientCompressor(args.compression, ratio=args.topk_ratio, threshold=args.threshold)
     blockchain_client = BlockchainClient()
-    ipfs_handler = IPFSHandler()
+    ipfs_handler = IPFSHandler(cache=IPFSCache())
     
     # Get participant address from private key
-    w3 = Web3(Web3.HTTPProvider(os.getenv('ETHEREUM_NODE_URL', 'http://localhost:7545')))
-    account = w3.eth.account.from_key(args.private_key)
+    account = blockchain_client.w3.eth.account.from_key(args.private_key)
     participant_address = account.address
+    if args.profile_startup:
+        report_startup('client node')
     
     print(f"Starting client node for participant {args.participant_id} ({participant_address})")
     
     # Register participant if not already registered
     try:
-        participant_info = blockchain_client.contract.functions.participants(participant_address).call()
+        participant_info, token_address = blockchain_client.batch_call([
+            blockchain_client.contract.functions.participants(participant_address),
+            blockchain_client.contract.functions.fedToken()
+        ])
         if not participant_info[0]:  # isRegistered
             print("Registering participant...")
             
             # Approve token spending first
-            token_address = blockchain_client.contract.functions.fedToken().call()
-            token_contract = w3.eth.contract(
-                address=token_address,
-                abi=json.load(open('build/contracts/FedToken.json'))['abi']
-            )
-            
-            # Approve tokens
-            nonce = w3.eth.get_transaction_count(participant_address)
-            txn = token_contract.functions.approve(
-                blockchain_client.contract_address,
-                100 * 10**18  # 100 tokens
-            ).build_transaction({
-                'from': participant_address,
-                'nonce': nonce,
-                'gas': 2000000,
-                'gasPrice': w3.eth.gas_price
-            })
-            
-            signed_txn = w3.eth.account.sign_transaction(txn, args.private_key)
-            tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            w3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            # Register
-            blockchain_client.register_participant(participant_address, args.private_key)
+            token_contract = get_contract(blockchain_client.w3, 'FedToken', token_address)
+            
+            # Approve and register are pipelined so both are in flight at
+            # once; register() cannot be gas-estimated before the approval is
+            # mined, so it gets a fixed gas limit
+            engine = blockchain_client.tx_engine
+            tx_hashes = [
+                engine.send(token_contract.functions.approve(
+                    blockchain_client.contract_address,
+                    100 * 10**18  # 100 tokens
+                ), args.private_key),
+                engine.send(blockchain_client.contract.functions.register(), args.private_key, gas=2000000)
+            ]
+            for receipt in engine.wait(tx_hashes):
+                engine.check(receipt)
             print("Registration successful!")
         else:
             print("Participant already registered")
@@ -78,87 +88,59 @@ def main():
     data_handler.load_data()
     data_handler.preprocess_data()
     
-    # Main loop - participate in training rounds
+    # Main loop - participate in training rounds. Rounds open as soon as the
+    # previous one is finalized, so the client waits on RoundStarted events
+    # rather than sleeping through fixed intervals.
+    monitor = RoundEventMonitor(blockchain_client.w3, blockchain_client.contract, read_cache=blockchain_client.read_cache)
+    round_wait_timeout = float(os.getenv('ROUND_WAIT_TIMEOUT', '300'))
+    idle_since = None
+    idle_total = 0.0
+    idle_rounds = 0
+
+    def wait_for_next_round(current_round):
+        next_round = monitor.wait_for_round_start(
+            current_round, timeout=round_wait_timeout, fallback=blockchain_client.get_current_round
+        )
+        if next_round is not None:
+            print(f"Round {next_round} started")
+
+    # Each round runs as a staged pipeline: the model download starts as
+    # soon as the round opens, and proving, uploading and evaluation overlap
+    pipeline = RoundPipeline(
+        blockchain_client, ipfs_handler, model_trainer, data_handler, proof_scheduler, compressor
+    )
+
     while True:
         try:
             # Get current round
             current_round = blockchain_client.get_current_round()
-            round_info = blockchain_client.contract.functions.rounds(current_round).call()
-            
-            # Check if already submitted for this round
-            has_submitted = blockchain_client.contract.functions.rounds(current_round).call()[participant_address]
-            
-            if has_submitted:
+            run_start = time.perf_counter()
+            status = pipeline.run(current_round, participant_address, args.private_key)
+            if idle_since is not None:
+                # Time spent waiting for this round to open, whatever came of it
+                idle = run_start - idle_since
+                idle_total += idle
+                idle_rounds += 1
+                metrics.span('idle', idle_since, run_start, lane='idle', status=status)
+            idle_since = time.perf_counter()
+            
+            if status == 'already_submitted':
                 print(f"Already submitted for round {current_round}, waiting for next round...")
-                time.sleep(60)  # Check again in 1 minute
+                wait_for_next_round(current_round)
                 continue
             
-            # Check if round is still active
-            if int(time.time()) > round_info[1]:  # endTime
+            if status == 'ended':
                 print(f"Round {current_round} has ended, waiting for next round...")
-                time.sleep(60)  # Check again in 1 minute
+                wait_for_next_round(current_round)
                 continue
             
-            print(f"Participating in round {current_round}...")
-            
-            # Get current model
-            current_model_hash = blockchain_client.get_current_model()
-            
-            # If model exists, load it
-            if current_model_hash and current_model_hash != "":
-                try:
-                    model_weights = ipfs_handler.get_json(current_model_hash)
-                    model_trainer.set_weights(model_weights)
-                    print(f"Loaded model from IPFS: {current_model_hash}")
-                except Exception as e:
-                    print(f"Error loading model: {e}")
-                    # Continue with default model
-            
-            # Train locally
-            x_train, y_train = data_handler.get_train_data()
-            print("Training local model...")
-            model_trainer.train(x_train, y_train, epochs=1)
-            
-            # Evaluate
-            x_test, y_test = data_handler.get_test_data()
-            loss, accuracy = model_trainer.evaluate(x_test, y_test)
-            print(f"Local model evaluation - Loss: {loss}, Accuracy: {accuracy}")
-            
-            # Compute gradients
-            print("Computing gradients...")
-            gradients = model_trainer.get_gradients(x_train[:32], y_train[:32])
-            
-            # Generate ZK proof
-            print("Generating ZK proof...")
-            proof, public_inputs = zk_prover.generate_gradient_proof(gradients)
-            
-            # Save gradients to IPFS
-            print("Saving gradients to IPFS...")
-            gradients_list = [g.tolist() for g in gradients]
-            gradient_hash = ipfs_handler.add_json(gradients_list)
-            print(f"Gradients saved to IPFS: {gradient_hash}")
-            
-            # Submit to blockchain
-            print("Submitting to blockchain...")
-            blockchain_client.submit_gradient(
-                participant_address,
-                args.private_key,
-                current_round,
-                gradient_hash,
-                bytes.fromhex(proof[2:]),  # Remove 0x prefix
-                bytes.fromhex(public_inputs[2:])  # Remove 0x prefix
-            )
-            
-            print(f"Successfully submitted gradient for round {current_round}")
-            
-            # Wait for next round
-            time.sleep(round_info[1] - int(time.time()) + 60)  # Wait until end of round + 1 minute
-            
-        except Exception as e:
             print(f"Successfully submitted gradient for round {current_round}")
+            print(f"Stage timings: {pipeline.last_timings.summary()}")
+            if idle_rounds:
+                print(f"Idle between rounds: {idle:.2f}s (mean {idle_total / idle_rounds:.2f}s)")
             
             # Wait for next round
-            time.sleep(round_info[1] - int(time.time()) + 60)  # Wait until end of round + 1 minute
+            wait_for_next_round(current_round)
             
         except Exception as e:
             print(f"Error during training round: {e}")
@@ -0,0 +1,140 @@
+import time
+import numpy as np
+
+METHODS = ('none', 'topk', 'threshold', 'int8', 'int4')
+SPARSE_METHODS = ('topk', 'threshold')
+QUANTIZED_BITS = {'int8': 8, 'int4': 4}
+
+# Number of quantization blocks dequantized at once by the decoder
+_DECODE_BLOCKS = 64
+
+
+def flatten_gradient(gradient):
+    return np.concatenate([np.asarray(g, dtype=np.float32).reshape(-1) for g in gradient])
+
+
+class CompressedGradient:
+    """
+    Compressed form of one flat gradient, as uploaded to IPFS.
+
+    Sparse methods carry (indices, values); quantized methods carry
+    (per-block scales, packed integer codes).
+    """
+    def __init__(self, method, size, tensors, shapes=None, block_size=None):
+        self.method = method
+        self.size = size
+        self.tensors = tensors
+        self.shapes = shapes
+        self.block_size = block_size
+
+    @property
+    def nbytes(self):
+        return sum(t.nbytes for t in self.tensors)
+
+    def to_tensors(self):
+        meta = {
+            'compression': self.method,
+            'size': self.size,
+            'shapes': [list(shape) for shape in self.shapes or []],
+            'block_size': self.block_size
+        }
+        return self.tensors, meta
+
+    @classmethod
+    def from_tensors(cls, tensors, meta):
+        return cls(
+            meta['compression'],
+            meta['size'],
+            list(tensors),
+            shapes=[tuple(shape) for shape in meta.get('shapes', [])],
+            block_size=meta.get('block_size')
+        )
+
+    @staticmethod
+    def is_compressed(meta):
+        return bool(meta) and 'compression' in meta
+
+
+def _dequantize_blocks(compressed, first, last):
+    scales, codes = compressed.tensors
+    block = compressed.block_size
+    if compressed.method == 'int4':
+        packed = codes[first * block // 2:last * block // 2]
+        values = np.empty(packed.size * 2, dtype=np.int8)
+        values[0::2] = (packed & 0x0F).astype(np.int8) - 8
+        values[1::2] = (packed >> 4).astype(np.int8) - 8
+    else:
+        values = codes[first * block:last * block]
+    values = values.reshape(last - first, block).astype(np.float32)
+    values *= scales[first:last, None]
+    return values.reshape(-1)
+
+
+def accumulate(compressed, out, weight=1.0):
+    """
+    Add `weight * gradient` into the flat buffer `out` straight from the
+    compressed form: sparse updates touch only their indices and quantized
+    updates are dequantized a few blocks at a time, so no dense copy of the
+    update is ever materialised.
+    """
+    if out.size != compressed.size:
+        raise ValueError(f"Expected {out.size} parameters, got {compressed.size}")
+
+    if compressed.method in SPARSE_METHODS:
+        indices, values = compressed.tensors
+        if weight == 1.0:
+            out[indices] += values
+        else:
+            out[indices] += values * weight
+    elif compressed.method in QUANTIZED_BITS:
+        num_blocks = compressed.tensors[0].size
+        for first in range(0, num_blocks, _DECODE_BLOCKS):
+            last = min(first + _DECODE_BLOCKS, num_blocks)
+            start = first * compressed.block_size
+            values = _dequantize_blocks(compressed, first, last)[:compressed.size - start]
+            if weight != 1.0:
+                values *= weight
+            out[start:start + values.size] += values
+    elif compressed.method == 'none':
+        dense = compressed.tensors[0]
+        out += dense if weight == 1.0 else dense * weight
+    else:
+        raise ValueError(f"Unknown compression method: {compressed.method}")
+    return out
+
+
+def decompress(compressed, out=None):
+    if out is None:
+        out = np.zeros(compressed.size, dtype=np.float32)
+    else:
+        out[...] = 0
+    return accumulate(compressed, out)
+
+
+class DecodeStats:
+    """
+    Tracks how fast compressed updates are folded into an accumulator.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.updates = 0
+        self.compressed_bytes = 0
+        self.dense_bytes = 0
+        self.seconds = 0.0
+
+    def record(self, compressed, started):
+        self.updates += 1
+        self.compressed_bytes += compressed.nbytes
+        self.dense_bytes += compressed.size * 4
+        self.seconds += time.perf_counter() - started
+
+    def summary(self):
+        seconds = self.seconds or float('nan')
+        return {
+            'updates': self.updates,
+            'compression_ratio': self.dense_bytes / max(self.compressed_bytes, 1),
+            'decode_mb_per_second': self.dense_bytes / seconds / 1e6,
+            'decode_seconds': self.seconds
+        }
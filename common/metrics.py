@@ -0,0 +1,313 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds of the stage_seconds histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Prefix of every exported metric name
+NAMESPACE = 'fedchain'
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.span(self.name, self.start, time.perf_counter(), **self.labels)
+        return False
+
+
+class Metrics:
+    """
+    Counters and histograms in the Prometheus data model, plus an optional
+    Chrome trace (chrome://tracing, Perfetto) of the stages of one round.
+    Stage durations all go into one `stage_seconds` histogram labelled by
+    stage, so a dashboard can set the stages of a round side by side.
+    """
+    def __init__(self, name='fedchain', trace_dir=None, buckets=BUCKETS):
+        self.name = name
+        self.trace_dir = trace_dir
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._trace = None
+        self._trace_round = None
+        self._lanes = {}
+        self._server = None
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def span(self, name, start, end, lane=None, **labels):
+        """
+        Record a stage that ran from `start` to `end` (time.perf_counter()
+        values). Stages that overlap, e.g. in the round pipeline, should pass
+        a `lane` so each gets its own row in the trace.
+        """
+        self.observe('stage_seconds', end - start, stage=name, **labels)
+        if self._trace is None:
+            return
+        lane = lane or threading.current_thread().name
+        with self._lock:
+            if self._trace is None:
+                return
+            tid = self._lanes.get(lane)
+            if tid is None:
+                tid = self._lanes[lane] = len(self._lanes) + 1
+                self._trace.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                                    'args': {'name': lane}})
+            self._trace.append({
+                'name': name,
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': (start - self._origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': {key: str(value) for key, value in labels.items()}
+            })
+
+    def stage(self, name, **labels):
+        return _Span(self, name, labels)
+
+    def begin_round(self, round_id):
+        if self.trace_dir is None:
+            return
+        with self._lock:
+            self._trace = [{'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': self.name}}]
+            self._trace_round = round_id
+            self._lanes = {}
+
+    def end_round(self, keep=True):
+        """
+        Write the trace of the current round to
+        `<trace_dir>/<name>-round-<id>.json` and return its path, or drop it
+        if not `keep`.
+        """
+        with self._lock:
+            events, round_id = self._trace, self._trace_round
+            self._trace = None
+        if events is None or not keep:
+            return None
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"{self.name}-round-{round_id}.json")
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def record_rpc(self, response, **kwargs):
+        """
+        requests response hook: HTTP requests, JSON-RPC calls per method and
+        bytes in each direction of a JSON-RPC session.
+        """
+        body = response.request.body or b''
+        received = 0 if kwargs.get('stream') else len(response.content)
+        self.count('rpc_http_requests')
+        self.count('rpc_sent_bytes', len(body))
+        self.count('rpc_received_bytes', received)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return
+        calls = payload if isinstance(payload, list) else [payload]
+        for call in calls:
+            if isinstance(call, dict):
+                self.count('rpc_calls', method=call.get('method', 'unknown'))
+        if self._trace is not None:
+            end = time.perf_counter()
+            method = calls[0].get('method') if len(calls) == 1 and isinstance(calls[0], dict) else 'batch'
+            self.span(f"rpc {method}", end - response.elapsed.total_seconds(), end, lane='rpc')
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{NAMESPACE}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{self._labels(labels)} {value}")
+        for (name, labels), (buckets, total, count) in histograms:
+            metric = f"{NAMESPACE}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float('inf'),), buckets):
+                cumulative += hits
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{metric}_bucket{self._labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{metric}_sum{self._labels(labels)} {total}")
+            lines.append(f"{metric}_count{self._labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Export render() at http://host:port/metrics from a daemon thread.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, args=(0.5,), daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# The process-wide registry; None while metrics are disabled, in which case
+# every function below returns right away
+_registry = None
+
+
+def configure(name='fedchain', port=None, trace_dir=None, enabled=None):
+    """
+    Turn metrics on for this process. `port` (METRICS_PORT) serves the
+    Prometheus endpoint, `trace_dir` (METRICS_TRACE_DIR) writes a Chrome
+    trace per round; with neither, metrics stay off unless `enabled`
+    (METRICS_ENABLED) is set. Returns the registry, or None when disabled.
+    """
+    global _registry
+    port = port if port is not None else int(os.getenv('METRICS_PORT', '0')) or None
+    trace_dir = trace_dir or os.getenv('METRICS_TRACE_DIR') or None
+    if enabled is None:
+        enabled = os.getenv('METRICS_ENABLED', '0').lower() in ('1', 'true', 'yes')
+    disable()
+    if not (enabled or port or trace_dir):
+        return None
+    _registry = Metrics(name, trace_dir)
+    if port:
+        _registry.serve(port, os.getenv('METRICS_HOST', '127.0.0.1'))
+    return _registry
+
+
+def disable():
+    global _registry
+    if _registry is not None:
+        _registry.close()
+    _registry = None
+
+
+def registry():
+    return _registry
+
+
+def enabled():
+    return _registry is not None
+
+
+def count(name, value=1, **labels):
+    if _registry is not None:
+        _registry.count(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    if _registry is not None:
+        _registry.observe(name, value, **labels)
+
+
+def span(name, start, end, **labels):
+    if _registry is not None:
+        _registry.span(name, start, end, **labels)
+
+
+def stage(name, **labels):
+    """
+    Context manager timing a stage into `stage_seconds{stage=name}`.
+    """
+    if _registry is None:
+        return _NULL_SPAN
+    return _registry.stage(name, **labels)
+
+
+def begin_round(round_id):
+    if _registry is not None:
+        _registry.begin_round(round_id)
+
+
+def end_round(keep=True):
+    if _registry is not None:
+        return _registry.end_round(keep)
+    return None
+
+
+def _record_rpc(response, *args, **kwargs):
+    if _registry is not None:
+        _registry.record_rpc(response, **kwargs)
+
+
+def instrument_rpc(session):
+    """
+    Count the JSON-RPC traffic of a requests session. The hook checks for a
+    registry per response, so sessions created before configure() count too.
+    """
+    session.hooks['response'].append(_record_rpc)
+    return session
@@ -17,8 +17,8 @@ contract FedChainCore is Ownable, ReentrancyGuard {
     IZKVerifier public zkVerifier;
     
     Counters.Counter public roundId;
-    uint256 public roundDuration = 5 minutes;
-    uint256 public minParticipants = 1;
+    uint256 public roundDuration;
+    uint256 public minParticipants;
     uint256 public stakingAmount = 100 * 10**18;
     
     string public currentModelIpfsHash;
@@ -59,8 +59,15 @@ contract FedChainCore is Ownable, ReentrancyGuard {
         address _fedTokenAddress,
         address _modelNFTAddress,
         address _zkVerifierAddress,
-        string memory _initialModelIpfsHash
+        string memory _initialModelIpfsHash,
+        uint256 _minParticipants,
+        uint256 _roundDuration
     ) {
+        require(_minParticipants > 0, "Invalid minimum participants");
+        require(_roundDuration > 0, "Invalid round duration");
+        minParticipants = _minParticipants;
+        roundDuration = _roundDuration;
+
         fedToken = IFedToken(_fedTokenAddress);
         modelNFT = IModelNFT(_modelNFTAddress);
         zkVerifier = IZKVerifier(_zkVerifierAddress);
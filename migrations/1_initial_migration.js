@@ -24,7 +24,9 @@ module.exports = async function (deployer) {
     fedToken.address,
     modelNFT.address,
     zkVerifier.address,
-    "QmInitialModelHash" // Initial model IPFS hash
+    "QmInitialModelHash", // Initial model IPFS hash
+    1, // Minimum participants per round
+    5 * 60 // Round duration in seconds
   );
 
   // Transfer ownership of token contracts
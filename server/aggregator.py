@@ -1,16 +1,182 @@
+import time
 import numpy as np
+from common.compression import DecodeStats, accumulate, decompress
+
+class StreamingAccumulator:
+    """
+    Running weighted sum of gradients that uses O(model) memory regardless of
+    the number of submissions. Sums are kept in one flat float64 buffer, or in
+    float32 with Kahan compensation when `compensated` is set.
+    """
+    def __init__(self, compensated=False):
+        self.compensated = compensated
+        self.total_weight = 0.0
+        self.count = 0
+        self.shapes = None
+        self.dtypes = None
+        self._sum = None
+        self._compensation = None
+
+    def _init_layout(self, gradient):
+        self.shapes = [g.shape for g in gradient]
+        self.dtypes = [g.dtype if g.dtype.kind == 'f' else np.dtype(np.float32) for g in gradient]
+        size = sum(int(np.prod(shape)) for shape in self.shapes)
+        dtype = np.float32 if self.compensated else np.float64
+        self._sum = np.zeros(size, dtype=dtype)
+        if self.compensated:
+            self._compensation = np.zeros(size, dtype=dtype)
+
+    def _views(self, buffer):
+        views = []
+        offset = 0
+        for shape in self.shapes:
+            size = int(np.prod(shape))
+            views.append(buffer[offset:offset + size].reshape(shape))
+            offset += size
+        return views
+
+    def _kahan_add(self, total, compensation, value):
+        y = value - compensation
+        t = total + y
+        compensation[...] = (t - total) - y
+        total[...] = t
+
+    def add(self, gradient, weight=1.0):
+        gradient = [np.asarray(g) for g in gradient]
+        if self._sum is None:
+            self._init_layout(gradient)
+        elif [g.shape for g in gradient] != self.shapes:
+            raise ValueError("Gradient shapes do not match previous submissions")
+
+        sums = self._views(self._sum)
+        compensations = self._views(self._compensation) if self.compensated else None
+        for i, (total, layer) in enumerate(zip(sums, gradient)):
+            value = layer if weight == 1.0 else layer * weight
+            if self.compensated:
+                self._kahan_add(total, compensations[i], value.astype(np.float32, copy=False))
+            else:
+                np.add(total, value, out=total)
+
+        self.total_weight += weight
+        self.count += 1
+
+    def add_compressed(self, compressed, weight=1.0):
+        """
+        Add a CompressedGradient without densifying it first. The
+        Kahan-compensated mode has no sparse update path and decodes densely.
+        """
+        if self._sum is None:
+            self._init_layout([np.empty(shape, dtype=np.float32) for shape in compressed.shapes])
+        elif compressed.size != self._sum.size:
+            raise ValueError("Gradient shapes do not match previous submissions")
+
+        if self.compensated:
+            dense = decompress(compressed)
+            self._kahan_add(self._sum, self._compensation, dense if weight == 1.0 else dense * weight)
+        else:
+            accumulate(compressed, self._sum, weight)
+
+        self.total_weight += weight
+        self.count += 1
+
+    def merge(self, other):
+        """
+        Fold another accumulator (for example one built in a different
+        process) into this one.
+        """
+        if other._sum is None:
+            return self
+        if self._sum is None:
+            self.shapes = list(other.shapes)
+            self.dtypes = list(other.dtypes)
+            self._sum = np.zeros_like(other._sum, dtype=np.float32 if self.compensated else np.float64)
+            if self.compensated:
+                self._compensation = np.zeros_like(self._sum)
+        elif other.shapes != self.shapes:
+            raise ValueError("Cannot merge accumulators with different layouts")
+
+        if self.compensated:
+            self._kahan_add(self._sum, self._compensation, other._sum.astype(np.float32, copy=False))
+            if other.compensated:
+                self._kahan_add(self._sum, self._compensation, -other._compensation)
+        else:
+            self._sum += other._sum
+            if other.compensated:
+                self._sum -= other._compensation
+
+        self.total_weight += other.total_weight
+        self.count += other.count
+        return self
+
+    def result(self):
+        if self._sum is None or self.total_weight == 0:
+            return []
+        mean = self._sum / self.total_weight
+        return [view.astype(dtype) for view, dtype in zip(self._views(mean), self.dtypes)]
+
+    def reset(self):
+        self.total_weight = 0.0
+        self.count = 0
+        self.shapes = None
+        self.dtypes = None
+        self._sum = None
+        self._compensation = None
+
 
 class Aggregator:
-    def __init__(self):
+    def __init__(self, streaming=False, compensated=False):
         self.gradients = []
+        self.weights = []
+        self.streaming = streaming
+        self.accumulator = StreamingAccumulator(compensated) if streaming else None
+        self.decode_stats = DecodeStats()
 
-    def add_gradient(self, gradient):
+    def add_gradient(self, gradient, weight=1.0):
+        if self.streaming:
+            self.accumulator.add(gradient, weight)
+            return
         self.gradients.append(gradient)
+        self.weights.append(weight)
+
+    def add_compressed(self, compressed, weight=1.0):
+        started = time.perf_counter()
+        if self.streaming:
+            self.accumulator.add_compressed(compressed, weight)
+        else:
+            flat = decompress(compressed)
+            layers = []
+            offset = 0
+            for shape in compressed.shapes:
+                size = int(np.prod(shape))
+                layers.append(flat[offset:offset + size].reshape(shape))
+                offset += size
+            self.add_gradient(layers, weight)
+        self.decode_stats.record(compressed, started)
+
+    def merge(self, other):
+        """
+        Merge the pending submissions of another streaming aggregator (or a
+        bare StreamingAccumulator) into this one.
+        """
+        if not self.streaming:
+            raise RuntimeError("merge() requires a streaming aggregator")
+        accumulator = other.accumulator if isinstance(other, Aggregator) else other
+        self.accumulator.merge(accumulator)
+        return self
 
     def aggregate(self):
-        # Simple FedAvg aggregation
-        avg_gradients = [np.mean(grad, axis=0) for grad in zip(*self.gradients)]
+        # FedAvg aggregation, weighted by e.g. participant sample counts
+        if self.streaming:
+            avg_gradients = self.accumulator.result()
+            self.accumulator.reset()
+            return avg_gradients
+
+        if all(w == 1.0 for w in self.weights):
+            avg_gradients = [np.mean(grad, axis=0) for grad in zip(*self.gradients)]
+        else:
+            avg_gradients = [np.average(grad, axis=0, weights=self.weights) for grad in zip(*self.gradients)]
         self.gradients = []  # Clear gradients after aggregation
+        self.weights = []
         return avg_gradients
 
     def update_model(self, model, aggregated_gradients):
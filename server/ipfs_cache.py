@@ -0,0 +1,159 @@
+import mmap
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+_CID_PATTERN = re.compile(r'^[A-Za-z0-9]+$')
+
+
+class IPFSCache:
+    """
+    Local content-addressed cache for IPFS objects. CIDs are immutable, so an
+    entry never goes stale; the cache is only bounded in size, evicting the
+    least recently used objects once `max_bytes` is exceeded. Writes are
+    atomic (temporary file + rename) and reads are served through read-only
+    memory maps.
+    """
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.getenv(
+            'IPFS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'zk-fedchain', 'ipfs')
+        )
+        self.max_bytes = max_bytes or int(os.getenv('IPFS_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # cid -> size, least recently used first
+        self._size = 0
+        self._load_index()
+
+    def _load_index(self):
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_mtime, name, stat.st_size))
+        for _, cid, size in sorted(found):
+            self._entries[cid] = size
+            self._size += size
+
+    def path(self, cid):
+        if not _CID_PATTERN.match(cid):
+            raise ValueError(f"Invalid CID: {cid!r}")
+        return os.path.join(self.cache_dir, cid[-2:], cid)
+
+    def __contains__(self, cid):
+        return cid in self._entries
+
+    def get(self, cid):
+        """
+        Return a read-only buffer (an mmap, or b'' for empty objects) with the
+        cached object, or None on a miss.
+        """
+        with self._lock:
+            if cid not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cid)
+            self.hits += 1
+        try:
+            # Persist recency so the LRU order survives restarts
+            os.utime(self.path(cid))
+            return self.open(cid)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(cid)
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+    def open(self, cid):
+        """
+        Memory-map a cached object without touching the hit/miss counters.
+        """
+        with open(self.path(cid), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def put(self, cid, data):
+        """
+        Store bytes (or any buffer) under `cid`.
+        """
+        def write(f):
+            f.write(data)
+        return self._store(cid, write)
+
+    def put_file(self, cid, source_path):
+        """
+        Move an already written file (e.g. a streamed download) into the cache.
+        """
+        path = self.path(cid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+        self._register(cid, os.path.getsize(path))
+        return path
+
+    def temp_file(self):
+        """
+        Open a temporary file on the cache filesystem, suitable for put_file.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        return os.fdopen(fd, 'wb'), tmp_path
+
+    def _store(self, cid, write):
+        path = self.path(cid)
+        if cid in self._entries and os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f, tmp_path = self.temp_file()
+        try:
+            with f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._register(cid, os.path.getsize(path))
+        return path
+
+    def _register(self, cid, size):
+        with self._lock:
+            self._forget(cid)
+            self._entries[cid] = size
+            self._size += size
+            self._evict()
+
+    def _forget(self, cid):
+        size = self._entries.pop(cid, None)
+        if size is not None:
+            self._size -= size
+
+    def _evict(self):
+        # The newest entry is kept even if it alone exceeds the budget
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            cid, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(cid))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._size
+        }
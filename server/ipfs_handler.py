@@ -1,29 +1,143 @@
 import requests
+import mmap
 import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 import json
 import sys
+import numpy as np
+from common import metrics
+from server.tensor_codec import iter_encode, decode_tensors, is_tensor_container
+
+# Size of the pieces streamed to and from the IPFS API
+CHUNK_SIZE = 1024 * 1024
 
 class IPFSHandler:
-    def __init__(self, api_url=None):
+    def __init__(self, api_url=None, max_concurrency=None, timeout=None, cache=None):
         # Load environment variables
         load_dotenv()
         
         # Set default API URL if not provided
         self.api_url = api_url or os.getenv('IPFS_API_URL', 'http://127.0.0.1:5001')
+        self.max_concurrency = max_concurrency or int(os.getenv('IPFS_MAX_CONCURRENCY', '8'))
+        self.timeout = timeout or float(os.getenv('IPFS_TIMEOUT', '60'))
+
+        # One keep-alive connection pool shared by all calls (and threads)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Optional content-addressed IPFSCache in front of every read
+        self.cache = cache
+
+    def _post(self, endpoint, timeout=None, **kwargs):
+        metrics.count('ipfs_requests', endpoint=endpoint)
+        response = self.session.post(
+            f"{self.api_url}/api/v0/{endpoint}",
+            timeout=timeout or self.timeout,
+            **kwargs
+        )
+        response.raise_for_status()
+        return response
+
+    def _cat(self, file_hash, timeout=None):
+        if self.cache is not None:
+            cached = self.cache.get(file_hash)
+            if cached is not None:
+                return cached
+        return self._download(file_hash, timeout)
+
+    def _download(self, file_hash, timeout=None):
+        if self.cache is None:
+            data = self._post('cat', timeout=timeout, params={'arg': file_hash}).content
+            metrics.count('ipfs_received_bytes', len(data))
+            return data
+        # Stream into the cache and hand back an mmap, so large objects never
+        # sit in memory as a whole
+        f, tmp_path = self.cache.temp_file()
+        try:
+            with f:
+                self._stream_cat(file_hash, [f], timeout)
+            self.cache.put_file(file_hash, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self.cache.open(file_hash)
+
+    def _stream_cat(self, file_hash, sinks, timeout=None):
+        with self._post('cat', timeout=timeout, stream=True, params={'arg': file_hash}) as response:
+            received = 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                received += len(chunk)
+                for sink in sinks:
+                    sink.write(chunk)
+        metrics.count('ipfs_received_bytes', received)
+
+    def _multipart(self, name, chunks, content_type, boundary, tee=None):
+        yield (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        sent = 0
+        for chunk in chunks:
+            if len(chunk):
+                if tee is not None:
+                    tee.write(chunk)
+                sent += len(chunk)
+                yield chunk
+        metrics.count('ipfs_sent_bytes', sent)
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+    def add_stream(self, chunks, name='data.bin', content_type='application/octet-stream'):
+        """
+        Add data produced by an iterable of bytes-like chunks to IPFS and
+        return its CID. The multipart body is generated on the fly and sent
+        with chunked transfer encoding, so memory use does not grow with the
+        object size. With a cache attached the chunks are also teed into it.
+        """
+        boundary = uuid.uuid4().hex
+        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        tee, tmp_path = self.cache.temp_file() if self.cache is not None else (None, None)
+        try:
+            try:
+                body = self._multipart(name, chunks, content_type, boundary, tee)
+                response = self._post('add', data=body, headers=headers)
+            finally:
+                if tee is not None:
+                    tee.close()
+            file_hash = response.json()['Hash']
+            if tmp_path is not None:
+                self.cache.put_file(file_hash, tmp_path)
+            return file_hash
+        except Exception as e:
+            raise RuntimeError(f"Failed to add data to IPFS: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _add(self, name, data, content_type):
+        return self.add_stream([data], name, content_type)
 
     def add_file(self, file_path):
         """
-        Add a file to IPFS and return its CID (Content Identifier).
+        Add a file to IPFS and return its CID (Content Identifier). The file
+        is streamed in CHUNK_SIZE pieces.
         """
+        def read_chunks(f):
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
         try:
             with open(file_path, 'rb') as f:
-                response = requests.post(
-                    f"{self.api_url}/api/v0/add",
-                    files={'file': f}
-                )
-            response.raise_for_status()
-            return response.json()['Hash']
+                return self.add_stream(read_chunks(f), os.path.basename(file_path))
         except Exception as e:
             raise RuntimeError(f"Failed to add file to IPFS: {e}")
 
@@ -31,41 +145,150 @@ class IPFSHandler:
         """
         Add JSON data to IPFS and return its CID.
         """
+        def encode_chunks():
+            # Serialize incrementally instead of building one big string
+            buffer = []
+            size = 0
+            for piece in json.JSONEncoder().iterencode(json_data):
+                buffer.append(piece)
+                size += len(piece)
+                if size >= CHUNK_SIZE:
+                    yield ''.join(buffer).encode()
+                    buffer = []
+                    size = 0
+            yield ''.join(buffer).encode()
+
         try:
-            response = requests.post(
-                f"{self.api_url}/api/v0/add",
-                files={'file': ('data.json', json.dumps(json_data), 'application/json')}
-            )
-            response.raise_for_status()
-            return response.json()['Hash']
+            return self.add_stream(encode_chunks(), 'data.json', 'application/json')
         except Exception as e:
             raise RuntimeError(f"Failed to add JSON to IPFS: {e}")
 
-    def get_file(self, file_hash, output_path):
+    def add_bytes(self, data, name='data.bin'):
+        """
+        Add raw bytes to IPFS and return their CID.
+        """
+        try:
+            return self._add(name, data, 'application/octet-stream')
+        except Exception as e:
+            raise RuntimeError(f"Failed to add bytes to IPFS: {e}")
+
+    def add_tensors(self, tensors, meta=None):
+        """
+        Add a list of tensors (gradients, model weights) to IPFS using the
+        binary tensor container and return its CID.
+        """
+        return self.add_stream(iter_encode(tensors, meta), name='tensors.bin')
+
+    def get_file(self, file_hash, output_path, mmap_view=False):
         """
         Retrieve a file from IPFS using its CID and save it to the specified output path.
+        The download is streamed to disk in CHUNK_SIZE pieces. Returns the
+        output path, or a read-only mmap of the file when mmap_view is set.
         """
+        tmp_path = f"{output_path}.part"
         try:
-            response = requests.post(
-                f"{self.api_url}/api/v0/cat",
-                params={'arg': file_hash}
-            )
-            response.raise_for_status()
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
+            if self.cache is not None:
+                self._cat(file_hash)
+                shutil.copyfile(self.cache.path(file_hash), tmp_path)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    self._stream_cat(file_hash, [f])
+            os.replace(tmp_path, output_path)
         except Exception as e:
             raise RuntimeError(f"Failed to retrieve file from IPFS: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if not mmap_view:
+            return output_path
+        with open(output_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
     def get_json(self, file_hash):
         """
         Retrieve JSON data from IPFS using its CID.
         """
         try:
-            response = requests.post(
-                f"{self.api_url}/api/v0/cat",
-                params={'arg': file_hash}
-            )
-            response.raise_for_status()
-            return response.json()
+            return json.loads(bytes(self._cat(file_hash)))
         except Exception as e:
             raise RuntimeError(f"Failed to retrieve JSON from IPFS: {e}")
+
+    def get_bytes(self, file_hash):
+        """
+        Retrieve raw bytes from IPFS using their CID. With a cache attached,
+        hits are returned as a read-only mmap instead of bytes.
+        """
+        try:
+            return self._cat(file_hash)
+        except Exception as e:
+            raise RuntimeError(f"Failed to retrieve bytes from IPFS: {e}")
+
+    def get_tensors(self, file_hash, with_meta=False):
+        """
+        Retrieve a list of tensors from IPFS. Binary containers are decoded
+        into read-only NumPy views over the downloaded buffer; objects stored
+        as JSON nested lists by older clients are still accepted.
+        """
+        tensors, meta = self._decode_tensors(self.get_bytes(file_hash))
+        return (tensors, meta) if with_meta else tensors
+
+    def _decode_tensors(self, data):
+        try:
+            if is_tensor_container(data):
+                return decode_tensors(data, with_meta=True)
+            return [np.asarray(t, dtype=np.float32) for t in json.loads(bytes(data))], {}
+        except Exception as e:
+            raise RuntimeError(f"Failed to decode tensors from IPFS: {e}")
+
+    def get_many(self, file_hashes, max_concurrency=None, timeout=None, return_exceptions=False):
+        """
+        Retrieve several objects concurrently over the pooled session and
+        yield (cid, bytes) pairs in completion order, so callers can start
+        processing the first arrival. With return_exceptions=True a failed
+        download is yielded as (cid, exception) instead of raising.
+        """
+        def fetch(file_hash):
+            return self._download(file_hash, timeout)
+
+        file_hashes = list(file_hashes)
+        if self.cache is not None:
+            # Serve cache hits first without touching the thread pool
+            missing = []
+            for file_hash in file_hashes:
+                cached = self.cache.get(file_hash)
+                if cached is None:
+                    missing.append(file_hash)
+                else:
+                    yield file_hash, cached
+            file_hashes = missing
+            if not file_hashes:
+                return
+
+        workers = min(max_concurrency or self.max_concurrency, max(len(file_hashes), 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(fetch, file_hash): file_hash for file_hash in file_hashes}
+            try:
+                for future in as_completed(futures):
+                    file_hash = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = RuntimeError(f"Failed to retrieve {file_hash} from IPFS: {e}")
+                        if not return_exceptions:
+                            raise result
+                    yield file_hash, result
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def get_many_tensors(self, file_hashes, max_concurrency=None, timeout=None):
+        """
+        Concurrent variant of get_tensors(with_meta=True): yields
+        (cid, tensors, meta) in completion order.
+        """
+        for file_hash, data in self.get_many(file_hashes, max_concurrency, timeout):
+            tensors, meta = self._decode_tensors(data)
+            yield file_hash, tensors, meta
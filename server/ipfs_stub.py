@@ -0,0 +1,134 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def fake_cid(data):
+    """
+    CIDv0-looking identifier (base58 sha2-256 multihash) of raw bytes. It is
+    content-addressed like a real CID but skips the UnixFS chunking.
+    """
+    digest = b'\x12\x20' + hashlib.sha256(data).digest()
+    number = int.from_bytes(digest, 'big')
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = _BASE58_ALPHABET[remainder] + encoded
+    return encoded
+
+
+def _parse_multipart(body, content_type):
+    boundary = content_type.split('boundary=', 1)[1].strip('"').encode()
+    parts = []
+    for part in body.split(b'--' + boundary)[1:]:
+        if part.startswith(b'--'):
+            break
+        headers, _, payload = part.partition(b'\r\n\r\n')
+        parts.append(payload[:-2] if payload.endswith(b'\r\n') else payload)
+    return parts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _reply(self, status, body, content_type='application/octet-stream'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        body = self._read_body()
+        stub._record(url.path, self.headers)
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if url.path == '/api/v0/add':
+            parts = _parse_multipart(body, self.headers.get('Content-Type', ''))
+            if not parts:
+                return self._reply(400, b'missing file part', 'text/plain')
+            cid = stub.put(parts[0])
+            reply = json.dumps({'Name': cid, 'Hash': cid, 'Size': str(len(parts[0]))}).encode()
+            return self._reply(200, reply, 'application/json')
+
+        if url.path == '/api/v0/cat':
+            cid = parse_qs(url.query).get('arg', [''])[0]
+            data = stub.objects.get(cid)
+            if data is None:
+                return self._reply(500, json.dumps({'Message': f'{cid} not found'}).encode(), 'application/json')
+            return self._reply(200, data)
+
+        self._reply(404, b'not found', 'text/plain')
+
+
+class IPFSStub:
+    """
+    In-process stand-in for the IPFS HTTP API implementing /api/v0/add and
+    /api/v0/cat, for tests, benchmarks and simulations. `latency` adds a
+    fixed delay to every request.
+    """
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.objects = {}
+        self.latency = latency
+        self.request_counts = {}
+        self.last_headers = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def put(self, data):
+        cid = fake_cid(data)
+        with self._lock:
+            self.objects[cid] = bytes(data)
+        return cid
+
+    def _record(self, path, headers):
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+            self.last_headers = dict(headers)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
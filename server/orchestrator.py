@@ -1,24 +1,75 @@
 import os
 import sys
 import time
+import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
-from web3 import Web3
+from common import metrics
 from client.blockchain_client import BlockchainClient
+from client.data_handler import DataHandler
+from common.compression import CompressedGradient
+from client.event_monitor import RoundEventMonitor
+from client.lazy import profiling_enabled, report_startup
+from client.model_trainer import ModelTrainer
+from client.model_versions import ModelPublisher
+from client.zk_prover import ZKProver
 from server.ipfs_handler import IPFSHandler
+from server.ipfs_cache import IPFSCache
 from server.aggregator import Aggregator
+from server.robust_aggregator import RobustAggregator
 
 load_dotenv()
 
+# updateModel() records the accuracy as an integer, in basis points
+ACCURACY_SCALE = 10000
+
+
+class ModelEvaluator:
+    """
+    Test accuracy (0 to 1) of global model weights on the test split of
+    `data_handler`, recorded with each model version on chain.
+    """
+    def __init__(self, data_handler, model_trainer=None):
+        self.data_handler = data_handler
+        self.model_trainer = model_trainer or ModelTrainer()
+        self._loaded = False
+
+    def __call__(self, weights):
+        if not self._loaded:
+            self.data_handler.load_data()
+            self.data_handler.preprocess_data()
+            self._loaded = True
+        self.model_trainer.set_weights(weights)
+        x_test, y_test = self.data_handler.get_test_data()
+        _, accuracy = self.model_trainer.evaluate(x_test, y_test)
+        return float(accuracy)
+
+
 class Orchestrator:
-    def __init__(self, blockchain_client, ipfs_handler, aggregator):
+    def __init__(self, blockchain_client, ipfs_handler, aggregator, publisher=None, learning_rate=None,
+                 evaluator=None):
         self.blockchain_client = blockchain_client
         self.ipfs_handler = ipfs_handler
         self.aggregator = aggregator
         self.admin_address = os.getenv('ADMIN_ADDRESS')
         self.admin_private_key = os.getenv('ADMIN_PRIVATE_KEY')
-        self.min_participants = self.blockchain_client.contract.functions.minParticipants().call()
+        self.min_participants = self.blockchain_client.get_min_participants()
+        self.aggregated_gradients = None
+
+        # New global models are published as deltas against the previous version
+        self.publisher = publisher or ModelPublisher(ipfs_handler)
+        self.learning_rate = learning_rate if learning_rate is not None else float(os.getenv('LEARNING_RATE', '0.01'))
+        self.global_weights = None
+        # Callable giving the test accuracy of weights, see ModelEvaluator
+        self.evaluator = evaluator
+
+        # Earliest block scanned for submissions made before the orchestrator
+        # started; moved to the start of each round once it is known
+        self.start_block = int(os.getenv('EVENTS_FROM_BLOCK', '0'))
+        self.monitor = RoundEventMonitor(
+            self.blockchain_client.w3, self.blockchain_client.contract, read_cache=self.blockchain_client.read_cache
+        )
 
     def start_round(self):
         current_round = self.blockchain_client.get_current_round()
@@ -27,61 +78,167 @@ class Orchestrator:
         print(f"Initial Model: {current_model}")
         print(f"Target Participants: {self.min_participants}")
 
+    def collect_gradients(self, gradient_hashes):
+        # Downloads run concurrently; each gradient is aggregated as it arrives
+        for _, tensors, meta in self.ipfs_handler.get_many_tensors(gradient_hashes):
+            if CompressedGradient.is_compressed(meta):
+                self.aggregator.add_compressed(CompressedGradient.from_tensors(tensors, meta))
+            else:
+                self.aggregator.add_gradient(tensors)
+        print(f"Collected {len(gradient_hashes)} gradients from IPFS")
+        if getattr(self.aggregator, 'decode_stats', None) and self.aggregator.decode_stats.updates:
+            stats = self.aggregator.decode_stats.summary()
+            print(f"Compression ratio: {stats['compression_ratio']:.1f}x | "
+                  f"Decode throughput: {stats['decode_mb_per_second']:.1f} MB/s")
+            self.aggregator.decode_stats.reset()
+
+    def resume_model(self):
+        """
+        Continue the version chain of the model currently on chain. A model
+        that was not published as a version (e.g. the migration's placeholder
+        hash) is replaced by freshly initialized weights, published as a
+        snapshot after the first round.
+        """
+        model_hash = self.blockchain_client.get_current_model()
+        try:
+            self.global_weights = self.publisher.resume(model_hash)
+            print(f"Resuming from model version {self.publisher.version}: {model_hash}")
+        except Exception as e:
+            print(f"Cannot resume from model {model_hash} ({e}), starting from initialized weights")
+            self.global_weights = ModelTrainer().get_weights()
+
+    def publish_model(self, round_id, update, accuracy=None):
+        """
+        Apply the aggregated `update` to the global model, publish the result
+        as the next model version and record it on chain with its test
+        `accuracy` (0 to 1), measured by the evaluator when not given.
+        """
+        if accuracy is None and self.evaluator is None:
+            raise RuntimeError("Cannot record a model version without an accuracy or an evaluator")
+        if self.global_weights is None:
+            self.resume_model()
+        if len(update) != len(self.global_weights):
+            raise ValueError(f"Update has {len(update)} tensors, the model has {len(self.global_weights)}")
+        for i, (w, g) in enumerate(zip(self.global_weights, update)):
+            if np.shape(w) != np.shape(g):
+                raise ValueError(f"Update tensor {i} has shape {np.shape(g)}, the model's is {np.shape(w)}")
+
+        weights = [w - self.learning_rate * g for w, g in zip(self.global_weights, update)]
+        if accuracy is None:
+            accuracy = self.evaluator(weights)
+        self.global_weights = weights
+        model_hash = self.publisher.publish(self.global_weights)
+        scaled_accuracy = int(round(accuracy * ACCURACY_SCALE))
+        proof, public_inputs = ZKProver(workers=1).generate_training_proof(self.global_weights, scaled_accuracy)
+        self.blockchain_client.transact(self.blockchain_client.contract.functions.updateModel(
+            round_id, model_hash, scaled_accuracy, '', bytes.fromhex(proof[2:]), bytes.fromhex(public_inputs[2:])
+        ), self.admin_private_key)
+        print(f"Published model version {self.publisher.version}: {model_hash} "
+              f"(accuracy {accuracy:.2%}, {self.publisher.last_ratio:.1f}x smaller than a full copy)")
+        return model_hash
+
+    def round_start_block(self, round_id):
+        # Submissions to a round come after its RoundStarted event, so the
+        # scan for them starts there once the event has been seen
+        return max(self.start_block, self.monitor.round_start_blocks.get(round_id, 0))
+
     def finalize_round(self, round_id):
         print(f"\nFinalizing Round {round_id}...")
-        nonce = self.blockchain_client.w3.eth.get_transaction_count(self.admin_address)
-        
-        txn = self.blockchain_client.contract.functions.finalizeRound(round_id).build_transaction({
-            'from': self.admin_address,
-            'nonce': nonce,
-            'gas': 2000000,
-            'gasPrice': self.blockchain_client.w3.eth.gas_price
-        })
-        
-        signed_txn = self.blockchain_client.w3.eth.account.sign_transaction(txn, self.admin_private_key)
-        tx_hash = self.blockchain_client.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = self.blockchain_client.w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = self.blockchain_client.transact(
+            self.blockchain_client.contract.functions.finalizeRound(round_id),
+            self.admin_private_key
+        )
         print(f"Finalized! Block: {receipt.blockNumber}")
 
     def run_federated_learning(self, num_rounds):
+        if self.global_weights is None:
+            self.resume_model()
         for _ in range(num_rounds):
             current_round = self.blockchain_client.get_current_round()
-            round_info = self.blockchain_client.contract.functions.rounds(current_round).call()
+            round_info = self.blockchain_client.read(self.blockchain_client.contract.functions.rounds(current_round))
             
             # Initialize new round if needed
             if round_info[0] == 0:
                 self.start_round()
                 current_round = self.blockchain_client.get_current_round()
-                round_info = self.blockchain_client.contract.functions.rounds(current_round).call()
+                round_info = self.blockchain_client.read(self.blockchain_client.contract.functions.rounds(current_round))
     
             start_time = round_info[0]
             end_time = round_info[1]
             participant_count = round_info[4]
             
+            metrics.begin_round(current_round)
             print(f"\n=== Round {current_round} ===")
             print(f"Start: {start_time} | End: {end_time}")
             print(f"Participants: {participant_count}/{self.min_participants}")
     
-            # Active monitoring
-            while time.time() < end_time and participant_count < self.min_participants:
-                print(f"Waiting... (Remaining: {int(end_time - time.time())}s)")
-                time.sleep(15)
-                round_info = self.blockchain_client.contract.functions.rounds(current_round).call()
-                participant_count = round_info[4]
+            # Event-driven monitoring: wake up on the submission that reaches
+            # the threshold (or on auto-finalization) instead of polling
+            print(f"Waiting for events... (Remaining: {int(end_time - time.time())}s)")
+            with metrics.stage('wait_for_submissions'):
+                from_block = self.round_start_block(current_round)
+                submitted = self.monitor.round_submissions(current_round, from_block)
+                status = self.monitor.wait_for_round(current_round, self.min_participants, end_time, submitted)
+            participant_count = len(status.gradient_hashes)
+            # Later rounds never rescan the history before this one
+            self.start_block = from_block
     
             # Finalization logic
-            if participant_count >= self.min_participants:
-                self.finalize_round(current_round)
+            finalized = status.finalized
+            if finalized:
+                print(f"Round {current_round} finalized on chain with {participant_count} participants")
+            elif participant_count >= self.min_participants:
+                with metrics.stage('finalize'):
+                    self.finalize_round(current_round)
+                finalized = True
             else:
                 print(f"Round {current_round} ended without enough participants")
+
+            if status.gradient_hashes:
+                try:
+                    with metrics.stage('collect_gradients'):
+                        self.collect_gradients(list(status.gradient_hashes.values()))
+                    with metrics.stage('aggregate'):
+                        self.aggregated_gradients = self.aggregator.aggregate()
+                    # updateModel only accepts finalized rounds
+                    if finalized:
+                        with metrics.stage('publish_model'):
+                            self.publish_model(current_round, self.aggregated_gradients)
+                except Exception as e:
+                    print(f"Error aggregating or publishing round {current_round}: {e}")
             
+            cache_stats = self.blockchain_client.read_cache.stats()
+            print(f"Contract read cache: {cache_stats['hit_rate']:.0%} hit rate, {cache_stats['head_reads']} head reads")
+            trace_path = metrics.end_round()
+            if trace_path:
+                print(f"Round trace written to {trace_path}")
             print(f"=== Completed Round {current_round} ===\n{'='*40}")
 
 
 if __name__ == "__main__":
+    # Prometheus endpoint and round traces, if METRICS_PORT / METRICS_TRACE_DIR are set
+    metrics.configure('orchestrator')
     bc = BlockchainClient()
-    ipfs = IPFSHandler()
-    aggregator = Aggregator()
+    ipfs = IPFSHandler(cache=IPFSCache())
+    method = os.getenv('AGGREGATION_METHOD', 'fedavg')
+    if method == 'fedavg':
+        aggregator = Aggregator(streaming=True)
+    else:
+        aggregator = RobustAggregator(
+            method=method,
+            byzantine=int(os.getenv('AGGREGATION_BYZANTINE', '0')),
+            spill_dir=os.getenv('AGGREGATION_SPILL_DIR')
+        )
     
-    orchestrator = Orchestrator(bc, ipfs, aggregator)
-    orchestrator.run_federated_learning(5)
+    # Accuracy recorded with each model version; without a dataset at
+    # EVAL_DATA_PATH, DataHandler's generated placeholder data is used
+    evaluator = ModelEvaluator(DataHandler(os.getenv('EVAL_DATA_PATH', 'dummy_path')))
+    orchestrator = Orchestrator(bc, ipfs, aggregator, evaluator=evaluator)
+    if profiling_enabled():
+        report_startup('orchestrator')
+    try:
+        orchestrator.run_federated_learning(5)
+    finally:
+        # Removes the memmapped updates spilled to disk
+        if isinstance(aggregator, RobustAggregator):
+            aggregator.close()
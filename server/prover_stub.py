@@ -0,0 +1,74 @@
+import argparse
+import hashlib
+import json
+import sys
+import time
+
+# Public signals of each circuit, in the order snarkjs writes public.json
+PUBLIC_SIGNALS = {
+    'gradient_verification': ['modelHash', 'gradientHash'],
+    'training_verification': ['oldModelHash', 'newModelHash', 'accuracy']
+}
+
+
+def stub_proof(circuit, key, inputs):
+    """
+    Deterministic stand-in for a Groth16 proof: a digest of the proving key
+    and the inputs, plus the circuit's public signals taken from the inputs.
+    """
+    digest = hashlib.sha256(key + json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    public = [inputs[name] for name in PUBLIC_SIGNALS.get(circuit, []) if name in inputs]
+    return {'protocol': 'stub', 'circuit': circuit, 'digest': digest}, public
+
+
+def _load_key(path, delay):
+    time.sleep(delay)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def main(argv=None):
+    """
+    Stand-in prover binary for tests and benchmarks, driven like a real one
+    through CommandProver:
+
+        prove <circuit> <key> <input.json> <proof.json> <public.json>
+        serve <circuit> <key>    (JSON lines on stdin/stdout)
+    """
+    parser = argparse.ArgumentParser(description='Stand-in ZK prover')
+    parser.add_argument('mode', choices=['prove', 'serve'])
+    parser.add_argument('circuit')
+    parser.add_argument('key')
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds spent per proof')
+    parser.add_argument('--load-delay', type=float, default=0.0, help='Seconds spent loading the proving key')
+    args = parser.parse_args(argv)
+
+    key = _load_key(args.key, args.load_delay)
+    if args.mode == 'prove':
+        input_path, proof_path, public_path = args.files
+        with open(input_path) as f:
+            inputs = json.load(f)
+        time.sleep(args.delay)
+        proof, public = stub_proof(args.circuit, key, inputs)
+        with open(proof_path, 'w') as f:
+            json.dump(proof, f)
+        with open(public_path, 'w') as f:
+            json.dump(public, f)
+        return 0
+
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+            time.sleep(args.delay)
+            proof, public = stub_proof(args.circuit, key, request['input'])
+            reply = {'proof': proof, 'public': public}
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {'error': str(e)}
+        sys.stdout.write(json.dumps(reply) + '\n')
+        sys.stdout.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
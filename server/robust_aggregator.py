@@ -0,0 +1,238 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from common.compression import decompress
+
+METHODS = ('median', 'trimmed_mean', 'krum')
+
+
+def _open_updates(path, rows, cols):
+    return np.memmap(path, dtype=np.float32, mode='r', shape=(rows, cols))
+
+
+def _chunks(start, stop, chunk_cols):
+    for begin in range(start, stop, chunk_cols):
+        yield begin, min(begin + chunk_cols, stop)
+
+
+def _coordinate_task(path, rows, cols, count, span, chunk_cols, method, trim, selected):
+    """
+    Reduce the participant axis for the parameter range `span` and write the
+    result into the output file next to the update matrix.
+    """
+    updates = _open_updates(path, rows, cols)
+    out = np.memmap(path + '.out', dtype=np.float32, mode='r+', shape=(cols,))
+    for begin, end in _chunks(span[0], span[1], chunk_cols):
+        if selected is not None:
+            block = updates[selected, begin:end]
+        else:
+            block = np.array(updates[:count, begin:end])
+
+        if method == 'median':
+            out[begin:end] = np.median(block, axis=0)
+        elif method == 'trimmed_mean':
+            block.sort(axis=0)
+            out[begin:end] = block[trim:count - trim].mean(axis=0, dtype=np.float64)
+        else:
+            out[begin:end] = block.mean(axis=0, dtype=np.float64)
+    out.flush()
+
+
+def _distance_task(path, rows, cols, count, span, chunk_cols):
+    """
+    Partial pairwise squared distances between participants over `span`.
+    """
+    updates = _open_updates(path, rows, cols)
+    distances = np.zeros((count, count), dtype=np.float64)
+    for begin, end in _chunks(span[0], span[1], chunk_cols):
+        block = updates[:count, begin:end].astype(np.float64)
+        gram = block @ block.T
+        norms = np.diag(gram)
+        distances += norms[:, None] + norms[None, :] - 2.0 * gram
+    return distances
+
+
+class RobustAggregator:
+    """
+    Byzantine-robust aggregation over participant updates spilled to an
+    on-disk memmap (participants x parameters). Coordinate-wise median,
+    trimmed mean and multi-Krum are computed in parameter-axis chunks of at
+    most `chunk_bytes`, spread across a process pool.
+
+    Exposes the same add_gradient/aggregate interface as Aggregator.
+    """
+    def __init__(self, method='median', trim_ratio=0.1, byzantine=0, krum_selected=None,
+                 spill_dir=None, capacity=64, chunk_bytes=64 * 1024 * 1024, workers=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown robust aggregation method: {method}")
+        self.method = method
+        self.trim_ratio = trim_ratio
+        self.byzantine = byzantine
+        self.krum_selected = krum_selected
+        self.chunk_bytes = chunk_bytes
+        self.workers = os.cpu_count() if workers is None else workers
+        self.capacity = capacity
+        self.count = 0
+        self.num_params = None
+        self.shapes = None
+        self.dtypes = None
+        self.last_selected = None
+
+        self._owns_dir = spill_dir is None
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix='zkfed-updates-')
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.path = os.path.join(self.spill_dir, 'updates.f32')
+        self._updates = None
+
+    def _allocate(self, rows):
+        # Growing the backing file is cheap: it is sparse until rows are written
+        with open(self.path, 'ab') as f:
+            f.truncate(rows * self.num_params * 4)
+        self._updates = np.memmap(self.path, dtype=np.float32, mode='r+', shape=(rows, self.num_params))
+        self.capacity = rows
+
+    def _next_row(self, size):
+        if self.num_params is None:
+            self.num_params = size
+            self._allocate(self.capacity)
+        elif size != self.num_params:
+            raise ValueError(f"Expected {self.num_params} parameters, got {size}")
+
+        if self.count == self.capacity:
+            self._updates.flush()
+            self._allocate(self.capacity * 2)
+
+        row = self._updates[self.count]
+        self.count += 1
+        return row
+
+    def add_update(self, flat_update):
+        flat_update = np.asarray(flat_update).reshape(-1)
+        self._next_row(flat_update.size)[:] = flat_update
+
+    def add_gradient(self, gradient, weight=1.0):
+        # Robust rules are unweighted by design: a large claimed weight must
+        # not let one participant outvote the others.
+        gradient = [np.asarray(g) for g in gradient]
+        if self.shapes is None:
+            self.shapes = [g.shape for g in gradient]
+            self.dtypes = [g.dtype for g in gradient]
+        elif [g.shape for g in gradient] != self.shapes:
+            raise ValueError("Gradient shapes do not match previous submissions")
+
+        row = self._next_row(sum(g.size for g in gradient))
+        offset = 0
+        for g in gradient:
+            row[offset:offset + g.size] = g.reshape(-1)
+            offset += g.size
+
+    def add_compressed(self, compressed, weight=1.0):
+        if self.shapes is None:
+            self.shapes = list(compressed.shapes)
+            self.dtypes = [np.dtype(np.float32)] * len(self.shapes)
+        # Decode straight into the participant's row of the memmap
+        decompress(compressed, out=self._next_row(compressed.size))
+
+    def _chunk_cols(self, rows):
+        return max(1, self.chunk_bytes // (4 * max(rows, 1)))
+
+    def _spans(self, rows):
+        # A few spans per worker keeps the pool balanced
+        chunk_cols = self._chunk_cols(rows)
+        num_spans = max(1, min(4 * max(self.workers, 1), -(-self.num_params // chunk_cols)))
+        bounds = np.linspace(0, self.num_params, num_spans + 1).astype(np.int64)
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    def _run(self, fn, tasks):
+        if self.workers <= 1:
+            return [fn(*task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(fn, *task) for task in tasks]
+            return [f.result() for f in futures]
+
+    def _reduce_coordinates(self, method, trim=0, selected=None):
+        rows = self.count if selected is None else len(selected)
+        out = np.memmap(self.path + '.out', dtype=np.float32, mode='w+', shape=(self.num_params,))
+        del out
+        chunk_cols = self._chunk_cols(rows)
+        tasks = [
+            (self.path, self.capacity, self.num_params, self.count, span, chunk_cols, method, trim, selected)
+            for span in self._spans(rows)
+        ]
+        self._run(_coordinate_task, tasks)
+        result = np.array(np.memmap(self.path + '.out', dtype=np.float32, mode='r', shape=(self.num_params,)))
+        os.remove(self.path + '.out')
+        return result
+
+    def pairwise_distances(self):
+        chunk_cols = self._chunk_cols(self.count)
+        tasks = [
+            (self.path, self.capacity, self.num_params, self.count, span, chunk_cols)
+            for span in self._spans(self.count)
+        ]
+        distances = sum(self._run(_distance_task, tasks))
+        return np.maximum(distances, 0.0)
+
+    def _multi_krum_selection(self):
+        f = self.byzantine
+        if self.count <= 2 * f + 2:
+            raise ValueError(f"Krum needs more than {2 * f + 2} participants, got {self.count}")
+        m = self.krum_selected or self.count - f
+        distances = self.pairwise_distances()
+
+        remaining = list(range(self.count))
+        selected = []
+        while len(selected) < m and len(remaining) > 2 * f + 2:
+            sub = distances[np.ix_(remaining, remaining)]
+            neighbours = len(remaining) - f - 2
+            scores = np.sort(sub, axis=1)[:, 1:neighbours + 1].sum(axis=1)
+            selected.append(remaining.pop(int(np.argmin(scores))))
+        if not selected:
+            selected = remaining[:1]
+        return sorted(selected)
+
+    def aggregate_flat(self):
+        if self.count == 0:
+            return None
+        self._updates.flush()
+
+        if self.method == 'median':
+            result = self._reduce_coordinates('median')
+        elif self.method == 'trimmed_mean':
+            trim = int(self.trim_ratio * self.count)
+            if 2 * trim >= self.count:
+                raise ValueError("trim_ratio removes every participant")
+            result = self._reduce_coordinates('trimmed_mean', trim=trim)
+        else:
+            self.last_selected = self._multi_krum_selection()
+            result = self._reduce_coordinates('mean', selected=self.last_selected)
+
+        self.count = 0
+        return result
+
+    def aggregate(self):
+        flat = self.aggregate_flat()
+        if flat is None:
+            return []
+        if self.shapes is None:
+            return [flat]
+        layers = []
+        offset = 0
+        for shape, dtype in zip(self.shapes, self.dtypes):
+            size = int(np.prod(shape))
+            layers.append(flat[offset:offset + size].reshape(shape).astype(dtype, copy=False))
+            offset += size
+        return layers
+
+    def update_model(self, model, aggregated_gradients):
+        model.apply_gradients(aggregated_gradients)
+        return model
+
+    def close(self):
+        self._updates = None
+        if self._owns_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
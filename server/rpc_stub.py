@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from collections.abc import Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        stub._record(body)
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if isinstance(body, list):
+            reply = [stub.handle(request) for request in body]
+        else:
+            reply = stub.handle(body)
+        data = json.dumps(reply, default=_json_default).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class RPCStub:
+    """
+    In-process Ethereum JSON-RPC endpoint backed by eth-tester, for tests,
+    benchmarks and simulations that need a real HTTP transport (including
+    JSON-RPC batches). Counts HTTP requests and calls per method; `latency`
+    adds a fixed delay to every HTTP request.
+    """
+    def __init__(self, w3=None, host='127.0.0.1', port=0, latency=0.0):
+        if w3 is None:
+            from web3 import Web3, EthereumTesterProvider
+            w3 = Web3(EthereumTesterProvider())
+        self.w3 = w3
+        self.latency = latency
+        self.http_requests = 0
+        self.method_counts = {}
+        self._lock = threading.Lock()
+        self._chain_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def endpoint_uri(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, request):
+        # eth-tester is not thread-safe, so requests reach it one at a time
+        with self._chain_lock:
+            try:
+                response = self.w3.manager._make_request(request['method'], request.get('params', []))
+            except Exception as e:
+                response = {'error': {'code': -32000, 'message': str(e)}}
+        return dict(response, jsonrpc='2.0', id=request.get('id'))
+
+    def _record(self, body):
+        with self._lock:
+            self.http_requests += 1
+            for request in body if isinstance(body, list) else [body]:
+                method = request.get('method')
+                self.method_counts[method] = self.method_counts.get(method, 0) + 1
+
+    def reset_counts(self):
+        with self._lock:
+            self.http_requests = 0
+            self.method_counts = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,360 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+
+from client.blockchain_client import BlockchainClient
+from client.contracts import get_contract, load_abi, load_bytecode
+from client.data_handler import DataHandler
+from client.lazy import LazyModule
+from client.model_trainer import ModelTrainer
+from client.model_versions import ModelFetcher, ModelPublisher
+from client.tx_engine import TransactionEngine
+from client.zk_prover import ZKProver
+from server.aggregator import Aggregator
+from server.ipfs_handler import IPFSHandler
+from server.ipfs_stub import IPFSStub
+from server.orchestrator import ModelEvaluator, Orchestrator
+from server.rpc_stub import RPCStub
+
+web3 = LazyModule('web3')
+
+# FedChainCore.stakingAmount
+STAKE = 100 * 10**18
+
+# Contract deployments are not gas-estimated (their estimates would share one memo entry)
+DEPLOY_GAS = 6000000
+
+# Gas limit of register(), which cannot be estimated before the approval is mined
+REGISTER_GAS = 2000000
+
+
+def participant_keys(count, seed='participant'):
+    """
+    Deterministic private keys for `count` virtual participants.
+    """
+    w3 = web3.Web3()
+    return ['0x' + bytes(w3.keccak(text=f"{seed}-{i}")).hex() for i in range(count)]
+
+
+class LocalChain:
+    """
+    The FedChain contract suite on a local chain: an in-process eth-tester
+    behind RPCStub (so clients talk real JSON-RPC over HTTP and every call is
+    counted), or any node at `rpc_url`, e.g. anvil, with a funded admin key.
+    """
+    def __init__(self, rpc_url=None, admin_key=None, latency=0.0):
+        self.stub = None
+        if rpc_url is None:
+            self.stub = RPCStub(latency=latency).start()
+            rpc_url = self.stub.endpoint_uri
+            admin_key = admin_key or self.stub.w3.provider.ethereum_tester.backend.account_keys[0].to_hex()
+        if admin_key is None:
+            raise ValueError("An admin private key is needed to deploy on an external node")
+        self.rpc_url = rpc_url
+        self.admin_key = admin_key
+        self.w3 = web3.Web3(web3.Web3.HTTPProvider(rpc_url))
+        self.engine = TransactionEngine(self.w3, poll_interval=0.01)
+        self.admin_address = self.w3.eth.account.from_key(admin_key).address
+        self.addresses = {}
+
+    def _deploy(self, name, *args):
+        factory = self.w3.eth.contract(abi=load_abi(name), bytecode=load_bytecode(name))
+        receipt = self.engine.transact(factory.constructor(*args), self.admin_key, gas=DEPLOY_GAS)
+        self.addresses[name] = receipt['contractAddress']
+        return get_contract(self.w3, name, receipt['contractAddress'])
+
+    def deploy(self, min_participants, round_duration, initial_model_hash):
+        """
+        Deploy the contracts as migrations/1_initial_migration.js does, with
+        rounds sized for the simulation. Returns the FedChainCore address.
+        """
+        fed_token = self._deploy('FedToken')
+        model_nft = self._deploy('ModelNFT')
+        zk_verifier = self._deploy('ZKVerifier', b'gradient-dummy-key', b'training-dummy-key')
+        core = self._deploy(
+            'FedChainCore', fed_token.address, model_nft.address, zk_verifier.address, initial_model_hash,
+            min_participants, round_duration
+        )
+        for receipt in self.engine.wait([
+            self.engine.send(fed_token.functions.transferOwnership(core.address), self.admin_key),
+            self.engine.send(model_nft.functions.transferOwnership(core.address), self.admin_key)
+        ]):
+            self.engine.check(receipt)
+        return core.address
+
+    def fund(self, addresses, ether=10**18, tokens=STAKE):
+        """
+        Give each address gas money and its staking tokens, all in flight at once.
+        """
+        token = get_contract(self.w3, 'FedToken', self.addresses['FedToken'])
+        tx_hashes = []
+        for address in addresses:
+            tx_hashes.append(self.engine.send({'to': address}, self.admin_key, gas=21000, value=ether))
+            tx_hashes.append(self.engine.send(token.functions.transfer(address, tokens), self.admin_key))
+        self.engine.wait(tx_hashes)
+
+    def rpc_counts(self):
+        if self.stub is None:
+            return 0, {}
+        return self.stub.http_requests, dict(self.stub.method_counts)
+
+    def reset_counts(self):
+        if self.stub is not None:
+            self.stub.reset_counts()
+
+    def close(self):
+        if self.stub is not None:
+            self.stub.stop()
+
+
+class ParticipantGroup:
+    """
+    Virtual participants hosted by one process. They share one dataset copy
+    and one compiled model: each participant trains on its own slice (a
+    view) of the data, gradients are computed one participant after another
+    on the shared trainer, and uploads and submissions run on a thread pool
+    while the next participant's gradients are computed. Each participant
+    has its own BlockchainClient, as separate clients would.
+    """
+    def __init__(self, config, keys, first_index=0):
+        self.config = config
+        self.data_handler = DataHandler(config['data_path'])
+        self.data_handler.load_data()
+        self.data_handler.preprocess_data()
+        self.trainer = ModelTrainer()
+        self.ipfs = IPFSHandler(api_url=config['ipfs_url'], max_concurrency=config['concurrency'])
+        self.model_fetcher = ModelFetcher(self.ipfs)
+        self.executor = ThreadPoolExecutor(max_workers=config['concurrency'])
+        self.participants = []
+        for i, key in enumerate(keys):
+            client = BlockchainClient(config['rpc_url'], config['contract_address'])
+            address = client.w3.eth.account.from_key(key).address
+            self.participants.append((first_index + i, key, address, client))
+
+    def _local_data(self, index):
+        x, y = self.data_handler.get_train_data()
+        samples = self.config['samples_per_participant']
+        start = (index * samples) % max(1, len(x) - samples)
+        return x[start:start + samples], y[start:start + samples]
+
+    def _register(self, participant):
+        _, key, address, client = participant
+        token = get_contract(client.w3, 'FedToken', client.read(client.contract.functions.fedToken()))
+        engine = client.tx_engine
+        _, receipt = engine.wait([
+            engine.send(token.functions.approve(client.contract_address, STAKE), key),
+            engine.send(client.contract.functions.register(), key, gas=REGISTER_GAS)
+        ])
+        return receipt['status'] == 1
+
+    def register(self):
+        return sum(self.executor.map(self._register, self.participants))
+
+    def _submit(self, participant, round_id, gradients, compute_seconds):
+        index, key, address, client = participant
+        start = time.perf_counter()
+        result = {'participant': index, 'address': address, 'compute_seconds': compute_seconds, 'error': None}
+        try:
+            gradient_hash = self.ipfs.add_tensors(gradients)
+            # A prover per call: ZKProver keeps its last commitment
+            proof, public_inputs = ZKProver(workers=1).generate_gradient_proof(gradients)
+            # Raises if the submission reverted
+            client.submit_gradient(address, key, round_id, gradient_hash, proof, public_inputs)
+            result['status'] = 'accepted'
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        result['submit_seconds'] = time.perf_counter() - start
+        return result
+
+    def run_round(self, round_id, model_hash):
+        # Participants in one process share the model download
+        self.trainer.set_weights(self.model_fetcher.fetch(model_hash))
+        futures = []
+        for participant in self.participants:
+            start = time.perf_counter()
+            gradients = [np.asarray(g) for g in self.trainer.get_gradients(*self._local_data(participant[0]))]
+            futures.append(self.executor.submit(
+                self._submit, participant, round_id, gradients, time.perf_counter() - start
+            ))
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.executor.shutdown()
+
+
+# ParticipantGroup of a worker process in process-pool mode
+_group = None
+
+
+def _init_group(config, keys, first_index):
+    global _group
+    _group = ParticipantGroup(config, keys, first_index)
+
+
+def _group_call(method, *args):
+    return getattr(_group, method)(*args)
+
+
+class Simulation:
+    """
+    Load test of full rounds with `participants` virtual clients against a
+    local chain and an IPFSStub, all driven from one process.
+
+    Participants run in-process (workers=1) or are split over `workers`
+    spawned processes, each hosting one ParticipantGroup. Every round the
+    participants download the global model, compute and upload gradients
+    and submit them concurrently; the round auto-finalizes on the last
+    submission. The orchestrator then collects and aggregates the gradients,
+    and publishes the updated model with updateModel(). run_round() reports
+    round latency, aggregation time and RPC/IPFS request counts.
+    """
+    def __init__(self, participants, workers=1, concurrency=16, samples_per_participant=64, data_path='dummy_path',
+                 rpc_url=None, admin_key=None, rpc_latency=0.0, ipfs_latency=0.0, learning_rate=0.01,
+                 round_duration=None):
+        self.participants = participants
+        self.workers = max(1, min(workers, participants))
+        self.concurrency = concurrency
+        self.samples_per_participant = samples_per_participant
+        self.data_path = data_path
+        self.rpc_url = rpc_url
+        self.admin_key = admin_key
+        self.rpc_latency = rpc_latency
+        self.ipfs_latency = ipfs_latency
+        self.learning_rate = learning_rate
+        self.round_duration = round_duration or int(os.getenv('SIMULATION_ROUND_DURATION', '3600'))
+        self.ipfs_stub = None
+        self.chain = None
+        self.groups = []
+        self.global_weights = None
+        self.setup_seconds = None
+
+    def setup(self):
+        start = time.perf_counter()
+        self.ipfs_stub = IPFSStub(latency=self.ipfs_latency).start()
+        self.ipfs = IPFSHandler(api_url=self.ipfs_stub.api_url, max_concurrency=self.concurrency)
+        self.chain = LocalChain(self.rpc_url, self.admin_key, self.rpc_latency)
+
+        # New model versions are published as deltas against the previous one
+        self.publisher = ModelPublisher(self.ipfs)
+        self.global_weights = ModelTrainer().get_weights()
+        initial_model_hash = self.publisher.publish(self.global_weights)
+        contract_address = self.chain.deploy(self.participants, self.round_duration, initial_model_hash)
+
+        keys = participant_keys(self.participants)
+        self.chain.fund([self.chain.w3.eth.account.from_key(key).address for key in keys])
+
+        config = {
+            'rpc_url': self.chain.rpc_url,
+            'ipfs_url': self.ipfs_stub.api_url,
+            'contract_address': contract_address,
+            'data_path': self.data_path,
+            'samples_per_participant': self.samples_per_participant,
+            'concurrency': self.concurrency
+        }
+        if self.workers == 1:
+            self.groups = [ParticipantGroup(config, keys)]
+        else:
+            context = multiprocessing.get_context('spawn')
+            for part in np.array_split(np.arange(self.participants), self.workers):
+                self.groups.append(ProcessPoolExecutor(
+                    max_workers=1, mp_context=context, initializer=_init_group,
+                    initargs=(config, [keys[i] for i in part], int(part[0]))
+                ))
+        registered = sum(self._call_groups('register'))
+        if registered != self.participants:
+            raise RuntimeError(f"Only {registered} of {self.participants} participants registered")
+
+        self.admin_client = BlockchainClient(self.chain.rpc_url, contract_address)
+        self.orchestrator = Orchestrator(
+            self.admin_client, self.ipfs, Aggregator(streaming=True), self.publisher, self.learning_rate,
+            evaluator=ModelEvaluator(DataHandler(self.data_path))
+        )
+        self.orchestrator.admin_address = self.chain.admin_address
+        self.orchestrator.admin_private_key = self.chain.admin_key
+        self.orchestrator.global_weights = self.global_weights
+        self.setup_seconds = time.perf_counter() - start
+        return self
+
+    def _call_groups(self, method, *args):
+        if self.workers == 1:
+            return [getattr(self.groups[0], method)(*args)]
+        futures = [group.submit(_group_call, method, *args) for group in self.groups]
+        return [future.result() for future in futures]
+
+    def run_round(self):
+        self.chain.reset_counts()
+        ipfs_before = dict(self.ipfs_stub.request_counts)
+        start = time.perf_counter()
+
+        round_id = self.admin_client.get_current_round()
+        model_hash = self.admin_client.get_current_model()
+        start_block = self.admin_client.w3.eth.block_number
+        results = [result for group_results in self._call_groups('run_round', round_id, model_hash)
+                   for result in group_results]
+        round_seconds = time.perf_counter() - start
+
+        # Orchestrator side: gradients named in the round's events are
+        # downloaded and aggregated, then the new model is published
+        aggregation_start = time.perf_counter()
+        gradient_hashes = self.orchestrator.monitor.round_submissions(round_id, start_block)
+        update = None
+        if gradient_hashes:
+            self.orchestrator.collect_gradients(list(gradient_hashes.values()))
+            update = self.orchestrator.aggregator.aggregate()
+        aggregation_seconds = time.perf_counter() - aggregation_start
+
+        update_start = time.perf_counter()
+        finalized = self.admin_client.read(self.admin_client.contract.functions.rounds(round_id))[2]
+        if finalized and update is not None:
+            self.orchestrator.publish_model(round_id, update)
+            self.global_weights = self.orchestrator.global_weights
+        update_seconds = time.perf_counter() - update_start
+
+        http_requests, method_counts = self.chain.rpc_counts()
+        statuses = [result['status'] for result in results]
+        return {
+            'participants': self.participants,
+            'workers': self.workers,
+            'round': round_id,
+            'accepted': statuses.count('accepted'),
+            'failed': len(statuses) - statuses.count('accepted'),
+            'errors': sorted({result['error'] for result in results if result['error']}),
+            'finalized': bool(finalized),
+            'round_seconds': round_seconds,
+            'aggregation_seconds': aggregation_seconds,
+            'update_seconds': update_seconds,
+            'model_version': self.publisher.version,
+            'model_delta_ratio': self.publisher.last_ratio,
+            'total_seconds': time.perf_counter() - start,
+            'mean_compute_seconds': float(np.mean([result['compute_seconds'] for result in results])),
+            'mean_submit_seconds': float(np.mean([result['submit_seconds'] for result in results])),
+            'rpc_http_requests': http_requests,
+            'rpc_calls': sum(method_counts.values()),
+            'rpc_methods': method_counts,
+            'ipfs_requests': {
+                path: count - ipfs_before.get(path, 0) for path, count in self.ipfs_stub.request_counts.items()
+            }
+        }
+
+    def run(self, rounds):
+        return [self.run_round() for _ in range(rounds)]
+
+    def close(self):
+        for group in self.groups:
+            if self.workers == 1:
+                group.close()
+            else:
+                group.shutdown()
+        if self.chain is not None:
+            self.chain.close()
+        if self.ipfs_stub is not None:
+            self.ipfs_stub.stop()
+
+    def __enter__(self):
+        return self.setup()
+
+    def __exit__(self, *exc):
+        self.close()
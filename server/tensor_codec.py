@@ -0,0 +1,111 @@
+import json
+import struct
+import numpy as np
+
+# Layout of a tensor container:
+#   magic (4s) | format version (H) | reserved (H) | header length (I)
+#   JSON header: {"tensors": [{"dtype", "shape", "offset", "nbytes"}, ...], "meta": {...}}
+#   zero padding up to ALIGNMENT, then the raw little-endian tensor buffers,
+#   each starting at an ALIGNMENT-byte boundary relative to the data section.
+MAGIC = b'ZKFT'
+VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<4sHHI')
+_SUPPORTED_KINDS = 'fiub'
+
+
+def _pad(n):
+    return (-n) % ALIGNMENT
+
+
+def _as_little_endian(tensor):
+    arr = np.asarray(tensor)
+    if arr.dtype.kind not in _SUPPORTED_KINDS:
+        raise ValueError(f"Unsupported tensor dtype: {arr.dtype}")
+    return np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+
+
+def is_tensor_container(data):
+    """
+    Return True if the given bytes-like object starts with the container magic.
+    """
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def iter_encode(tensors, meta=None):
+    """
+    Yield the encoded container piece by piece, without concatenating the
+    tensor buffers. Useful for streaming uploads.
+    """
+    arrays = [_as_little_endian(t) for t in tensors]
+
+    entries = []
+    offset = 0
+    for arr in arrays:
+        entries.append({
+            'dtype': arr.dtype.str,
+            'shape': list(arr.shape),
+            'offset': offset,
+            'nbytes': arr.nbytes
+        })
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    header = json.dumps({'tensors': entries, 'meta': meta or {}}, separators=(',', ':')).encode()
+    prefix = _PREFIX.pack(MAGIC, VERSION, 0, len(header))
+    yield prefix + header + b'\x00' * _pad(len(prefix) + len(header))
+
+    for arr in arrays:
+        if arr.nbytes:
+            yield memoryview(arr).cast('B')
+        padding = _pad(arr.nbytes)
+        if padding:
+            yield b'\x00' * padding
+
+
+def encode_tensors(tensors, meta=None):
+    """
+    Encode a list of numeric tensors into a single binary container.
+    """
+    return b''.join(iter_encode(tensors, meta))
+
+
+def decode_header(data):
+    """
+    Parse the container prefix and header. Returns (header, data_start).
+    """
+    view = memoryview(data)
+    if len(view) < _PREFIX.size:
+        raise ValueError("Buffer too small to be a tensor container")
+
+    magic, version, _, header_len = _PREFIX.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a tensor container (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported tensor container version: {version}")
+
+    header_end = _PREFIX.size + header_len
+    header = json.loads(bytes(view[_PREFIX.size:header_end]))
+    return header, header_end + _pad(header_end)
+
+
+def decode_tensors(data, with_meta=False):
+    """
+    Decode a container into a list of NumPy arrays. The arrays are views over
+    `data` (no copy), so they are read-only when `data` is immutable.
+    """
+    header, data_start = decode_header(data)
+
+    tensors = []
+    for entry in header['tensors']:
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        count = entry['nbytes'] // dtype.itemsize
+        start = data_start + entry['offset']
+        if start + entry['nbytes'] > len(data):
+            raise ValueError("Tensor container is truncated")
+        arr = np.frombuffer(data, dtype=dtype, count=count, offset=start)
+        tensors.append(arr.reshape(shape))
+
+    if with_meta:
+        return tensors, header.get('meta', {})
+    return tensors
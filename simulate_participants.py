@@ -1,82 +1,57 @@
-import os
-import time
+import argparse
 import json
-from web3 import Web3
-from client.blockchain_client import BlockchainClient
-from client.zk_prover import ZKProver
+import os
+
+from server.simulation import Simulation
+
+
+def print_report(report):
+    methods = ', '.join(f"{method} {count}" for method, count in sorted(report['rpc_methods'].items(), key=lambda item: -item[1]))
+    print(f"  Round {report['round']}: {report['accepted']}/{report['participants']} accepted"
+          f"{' (finalized)' if report['finalized'] else ''}")
+    print(f"    Round latency {report['round_seconds']:.2f}s | aggregation {report['aggregation_seconds']:.2f}s | "
+          f"model update {report['update_seconds']:.2f}s (version {report['model_version']}, "
+          f"{report['model_delta_ratio']:.1f}x smaller than in full)")
+    print(f"    Per participant: compute {report['mean_compute_seconds']:.3f}s, upload+submit {report['mean_submit_seconds']:.3f}s")
+    print(f"    RPC: {report['rpc_calls']} calls in {report['rpc_http_requests']} HTTP requests ({methods})")
+    print(f"    IPFS: {report['ipfs_requests']}")
+    for error in report['errors']:
+        print(f"    Error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate rounds with many virtual participants on a local chain')
+    parser.add_argument('--participants', type=int, nargs='+', default=[1, 10, 100], help='Participant counts to scale over')
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=1, help='Processes hosting the participants')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent uploads/submissions per process')
+    parser.add_argument('--samples', type=int, default=64, help='Training samples per participant')
+    parser.add_argument('--data-path', type=str, default='dummy_path')
+    parser.add_argument('--rpc-url', type=str, default=None, help='External node (e.g. anvil) instead of eth-tester')
+    parser.add_argument('--admin-key', type=str, default=os.getenv('ADMIN_PRIVATE_KEY'), help='Funded deployer key for --rpc-url')
+    parser.add_argument('--rpc-latency', type=float, default=0.0, help='Seconds added to every RPC request (eth-tester only)')
+    parser.add_argument('--ipfs-latency', type=float, default=0.0, help='Seconds added to every IPFS request')
+    parser.add_argument('--json', type=str, default=None, help='Write all round reports to this file')
+    args = parser.parse_args()
+
+    reports = []
+    for participants in args.participants:
+        simulation = Simulation(
+            participants, workers=args.workers, concurrency=args.concurrency,
+            samples_per_participant=args.samples, data_path=args.data_path,
+            rpc_url=args.rpc_url, admin_key=args.admin_key if args.rpc_url else None,
+            rpc_latency=args.rpc_latency, ipfs_latency=args.ipfs_latency
+        )
+        with simulation:
+            print(f"\n=== {participants} participants ({simulation.workers} processes), setup {simulation.setup_seconds:.2f}s ===")
+            for report in simulation.run(args.rounds):
+                print_report(report)
+                reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
 
-def simulate_participant(participant_address, private_key):
-    bc = BlockchainClient()
-    zk = ZKProver()
-    
-    print("\n=== Participant Simulation ===")
-    
-    # Get current round before any actions
-    initial_round = bc.get_current_round()
-    print(f"Initial Round: {initial_round}")
-    
-    # Check registration
-    is_registered = bc.contract.functions.participants(participant_address).call()[0]
-    
-    if not is_registered:
-        print("\n[1/3] Registering Participant...")
-        
-        # Approve tokens
-        token_address = bc.contract.functions.fedToken().call()
-        with open('build/contracts/FedToken.json') as f:
-            token_abi = json.load(f)['abi']
-        
-        token_contract = bc.w3.eth.contract(address=token_address, abi=token_abi)
-        
-        approve_txn = token_contract.functions.approve(
-            bc.contract_address,
-            100 * 10**18
-        ).build_transaction({
-            'from': participant_address,
-            'nonce': bc.w3.eth.get_transaction_count(participant_address),
-            'gas': 200000,
-            'gasPrice': bc.w3.eth.gas_price
-        })
-        
-        signed_approve = bc.w3.eth.account.sign_transaction(approve_txn, private_key)
-        bc.w3.eth.send_raw_transaction(signed_approve.rawTransaction)
-        print("Tokens approved")
-        time.sleep(15)
-        
-        # Register
-        print("[2/3] Registering...")
-        register_receipt = bc.register_participant(participant_address, private_key)
-        print(f"Registration Tx: {register_receipt.transactionHash.hex()}")
-        time.sleep(15)
-    
-    # Submit gradient
-    current_round = bc.get_current_round()
-    round_info = bc.contract.functions.rounds(current_round).call()
-    
-    if time.time() > round_info[1]:
-        print(f"Round {current_round} has ended. Waiting for new round...")
-        return
-    
-    print(f"\n[3/3] Submitting to CURRENT ROUND {current_round}")
-    
-    proof, inputs = zk.generate_gradient_proof([])
-    receipt = bc.submit_gradient(
-        participant_address,
-        private_key,
-        current_round,
-        "Qmdummyhash",
-        proof,
-        inputs
-    )
-    print(f"\nSubmission Successful!")
-    print(f"Tx Hash: {receipt.transactionHash.hex()}")
-    print(f"Block Number: {receipt.blockNumber}")
 
 if __name__ == "__main__":
-    admin_address = os.getenv('ADMIN_ADDRESS')
-    admin_private_key = os.getenv('ADMIN_PRIVATE_KEY')
-    
-    if not admin_address or not admin_private_key:
-        raise ValueError("Missing ADMIN_ADDRESS or ADMIN_PRIVATE_KEY in .env")
-    
-    simulate_participant(admin_address, admin_private_key)
+    main()
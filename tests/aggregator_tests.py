@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import pickle
+import numpy as np
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.aggregator import Aggregator, StreamingAccumulator
+
+class TestAggregator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.gradients = [
+            [rng.standard_normal((3, 3, 1, 8)).astype(np.float32), rng.standard_normal(8).astype(np.float32)]
+            for _ in range(20)
+        ]
+
+    def _aggregate(self, aggregator, weights=None):
+        for i, gradient in enumerate(self.gradients):
+            aggregator.add_gradient(gradient, 1.0 if weights is None else weights[i])
+        return aggregator.aggregate()
+
+    def test_streaming_matches_mean(self):
+        expected = self._aggregate(Aggregator())
+        for compensated in (False, True):
+            result = self._aggregate(Aggregator(streaming=True, compensated=compensated))
+            for e, r in zip(expected, result):
+                self.assertEqual(e.dtype, r.dtype)
+                np.testing.assert_allclose(e, r, rtol=1e-5, atol=1e-6)
+
+    def test_weighted_average(self):
+        weights = np.arange(1, len(self.gradients) + 1, dtype=np.float64)
+        expected = self._aggregate(Aggregator(), weights)
+        result = self._aggregate(Aggregator(streaming=True), weights)
+        for e, r in zip(expected, result):
+            np.testing.assert_allclose(e, r, rtol=1e-5, atol=1e-6)
+
+    def test_merge_partial_accumulators(self):
+        expected = self._aggregate(Aggregator(streaming=True))
+
+        left, right = StreamingAccumulator(), StreamingAccumulator(compensated=True)
+        for i, gradient in enumerate(self.gradients):
+            (left if i % 2 else right).add(gradient)
+        # Partial accumulators travel between processes by pickling
+        right = pickle.loads(pickle.dumps(right))
+
+        merged = Aggregator(streaming=True).merge(left).merge(right)
+        self.assertEqual(merged.accumulator.count, len(self.gradients))
+        for e, r in zip(expected, merged.aggregate()):
+            np.testing.assert_allclose(e, r, rtol=1e-5, atol=1e-6)
+
+    def test_rejects_mismatched_shapes(self):
+        aggregator = Aggregator(streaming=True)
+        aggregator.add_gradient(self.gradients[0])
+        with self.assertRaises(ValueError):
+            aggregator.add_gradient([np.zeros(3, dtype=np.float32)])
+
+    def test_aggregate_resets_state(self):
+        aggregator = Aggregator(streaming=True)
+        self._aggregate(aggregator)
+        self.assertEqual(aggregator.aggregate(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.chunked_store import ChunkedStore
+from client.model_versions import ModelFetcher, ModelPublisher
+from server.ipfs_cache import IPFSCache
+from server.ipfs_handler import IPFSHandler
+from server.ipfs_stub import IPFSStub
+
+class TestChunkedStore(unittest.TestCase):
+    def setUp(self):
+        self.stub = IPFSStub().start()
+        self.ipfs = IPFSHandler(api_url=self.stub.api_url, max_concurrency=4)
+        rng = np.random.default_rng(0)
+        # 4 KB chunks: the first layer spans 8 chunks, the others fit in one
+        self.tensors = [
+            rng.standard_normal((64, 128)).astype(np.float32),
+            rng.standard_normal(100).astype(np.float64),
+            np.arange(10, dtype=np.int32),
+            np.zeros((0, 3), dtype=np.float32)
+        ]
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def assertSameTensors(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(actual, expected):
+            self.assertEqual((a.dtype, a.shape), (e.dtype, e.shape))
+            np.testing.assert_array_equal(a, e)
+
+    def test_round_trip(self):
+        store = ChunkedStore(self.ipfs, chunk_size=4096)
+        cid = store.put(self.tensors, {'model_version': {'version': 1}})
+        tensors, meta = ChunkedStore(self.ipfs).get(cid, with_meta=True)
+        self.assertSameTensors(tensors, self.tensors)
+        self.assertEqual(meta['model_version'], {'version': 1})
+        self.assertEqual([len(entry['chunks']) for entry in meta['chunked']['tensors']], [8, 1, 1, 1])
+        self.assertFalse(tensors[0].flags.writeable)
+        with self.assertRaises(ValueError):
+            store.get(self.ipfs.add_tensors(self.tensors))
+
+    def test_unchanged_chunks_are_shared(self):
+        store = ChunkedStore(self.ipfs, chunk_size=4096)
+        first = store.put(self.tensors)
+        uploaded = store.stats['chunks_uploaded']
+
+        # Fine-tuning: one row block of the first layer changes, the rest is frozen
+        changed = [t.copy() for t in self.tensors]
+        changed[0][:8] += 1
+        second = store.put(changed)
+        self.assertEqual(store.stats['chunks_uploaded'] - uploaded, 1)
+
+        old_manifest = self.ipfs.get_tensors(first, with_meta=True)[1]['chunked']
+        new_manifest = self.ipfs.get_tensors(second, with_meta=True)[1]['chunked']
+        old_cids = {chunk['cid'] for entry in old_manifest['tensors'] for chunk in entry['chunks']}
+        new_cids = {chunk['cid'] for entry in new_manifest['tensors'] for chunk in entry['chunks']}
+        self.assertEqual(len(new_cids - old_cids), 1)
+
+        # A client holding the first version downloads only the changed chunk
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = ChunkedStore(IPFSHandler(api_url=self.stub.api_url, cache=IPFSCache(cache_dir)))
+            held = client.get(first)
+            cats = self.stub.request_counts['/api/v0/cat']
+            fetched = client.stats['chunks_fetched']
+            self.assertSameTensors(client.get(second, have=held), changed)
+            self.assertEqual(self.stub.request_counts['/api/v0/cat'] - cats, 2)  # manifest + one chunk
+            self.assertEqual(client.stats['chunks_fetched'] - fetched, 1)
+
+            # Without `have`, the manifest and every chunk come from the local cache
+            cats = self.stub.request_counts['/api/v0/cat']
+            self.assertSameTensors(client.get(second), changed)
+            self.assertEqual(self.stub.request_counts['/api/v0/cat'], cats)
+
+    def test_corrupt_chunk(self):
+        store = ChunkedStore(self.ipfs, chunk_size=4096)
+        cid = store.put(self.tensors)
+        chunk_cid = self.ipfs.get_tensors(cid, with_meta=True)[1]['chunked']['tensors'][1]['chunks'][0]['cid']
+        self.stub.objects[chunk_cid] = bytes(len(self.stub.objects[chunk_cid]))
+        with self.assertRaises(RuntimeError):
+            ChunkedStore(self.ipfs).get(cid)
+
+    def test_snapshots_reuse_frozen_layers(self):
+        rng = np.random.default_rng(1)
+        backbone = rng.standard_normal((256, 64)).astype(np.float32)
+        publisher = ModelPublisher(self.ipfs, snapshot_interval=2, chunk_size=4096)
+        fetcher = ModelFetcher(self.ipfs)
+        fetcher.store.chunk_size = 4096
+        for version in range(3):
+            head = np.full(16, version, dtype=np.float32)
+            self.assertSameTensors(fetcher.fetch(publisher.publish([backbone, head])), [backbone, head])
+        # Version 3 is a snapshot again; only the head was downloaded for it
+        self.assertEqual(fetcher.last_source, 'snapshot')
+        self.assertEqual(fetcher.store.stats['chunks_reused'], backbone.nbytes // 4096)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import client and server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.compression import GradientCompressor
+from common.compression import CompressedGradient, decompress, flatten_gradient
+from server.aggregator import Aggregator
+from server.tensor_codec import encode_tensors, decode_tensors
+
+class TestGradientCompression(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.gradient = [rng.standard_normal((50, 40)).astype(np.float32), rng.standard_normal(37).astype(np.float32)]
+        self.flat = flatten_gradient(self.gradient)
+
+    def test_topk_keeps_largest_entries(self):
+        compressed = GradientCompressor('topk', ratio=0.05).compress(self.gradient)
+        indices, values = compressed.tensors
+        self.assertEqual(indices.size, int(self.flat.size * 0.05))
+        self.assertGreaterEqual(np.abs(values).min(), np.sort(np.abs(self.flat))[-indices.size])
+        np.testing.assert_array_equal(decompress(compressed)[indices], self.flat[indices])
+
+    def test_quantization_error_is_bounded(self):
+        for method, levels, min_ratio in (('int8', 127, 3.5), ('int4', 7, 7.0)):
+            compressor = GradientCompressor(method, block_size=256, seed=0)
+            compressed = compressor.compress(self.gradient)
+            error = np.abs(decompress(compressed) - self.flat).max()
+            self.assertLessEqual(error, np.abs(self.flat).max() / levels + 1e-6)
+            self.assertGreater(compressor.last_ratio, min_ratio)
+
+    def test_error_feedback_carries_residual(self):
+        compressor = GradientCompressor('topk', ratio=0.01)
+        sent = np.zeros_like(self.flat)
+        rounds = 200
+        for _ in range(rounds):
+            sent += decompress(compressor.compress(self.gradient))
+        # Nothing is lost: what was sent plus the residual is the full signal
+        np.testing.assert_allclose(sent + compressor.residual, self.flat * rounds, rtol=1e-4, atol=1e-3)
+
+    def test_wire_round_trip(self):
+        compressed = GradientCompressor('int4', block_size=128, seed=1).compress(self.gradient)
+        tensors, meta = decode_tensors(encode_tensors(*compressed.to_tensors()), with_meta=True)
+        self.assertTrue(CompressedGradient.is_compressed(meta))
+        restored = CompressedGradient.from_tensors(tensors, meta)
+        np.testing.assert_array_equal(decompress(restored), decompress(compressed))
+        self.assertEqual(restored.shapes, [(50, 40), (37,)])
+
+    def test_aggregator_accumulates_compressed_updates(self):
+        compressors = [GradientCompressor(m, ratio=0.1, seed=0) for m in ('topk', 'int8', 'none')]
+        updates = [c.compress(self.gradient) for c in compressors]
+        expected = np.mean([decompress(u) for u in updates], axis=0)
+
+        for streaming in (True, False):
+            aggregator = Aggregator(streaming=streaming)
+            for update in updates:
+                aggregator.add_compressed(update)
+            result = aggregator.aggregate()
+            self.assertEqual([r.shape for r in result], [(50, 40), (37,)])
+            np.testing.assert_allclose(flatten_gradient(result), expected, rtol=1e-5, atol=1e-6)
+            self.assertEqual(aggregator.decode_stats.summary()['updates'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.data_handler import DataHandler
+
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+
+@unittest.skipIf(tf is None, "TensorFlow is not installed")
+class TestDataHandler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        rng = np.random.default_rng(0)
+        self.x = rng.integers(0, 256, (300, 28, 28, 1), dtype=np.uint8)
+        self.y = rng.integers(0, 10, 300)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write_npy(self, split, name, x, y):
+        os.makedirs(os.path.join(self.path, split), exist_ok=True)
+        np.save(os.path.join(self.path, split, f"{name}_x.npy"), x)
+        np.save(os.path.join(self.path, split, f"{name}_y.npy"), y)
+
+    def _write_tfrecord(self, name, x, y):
+        with tf.io.TFRecordWriter(os.path.join(self.path, name)) as writer:
+            for image, label in zip(x, y):
+                example = tf.train.Example(features=tf.train.Features(feature={
+                    'image': tf.train.Feature(bytes_list=tf.train.BytesList(value=[image.tobytes()])),
+                    'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[int(label)]))
+                }))
+                writer.write(example.SerializeToString())
+
+    def _collect(self, dataset):
+        xs, ys = zip(*[(x.numpy(), y.numpy()) for x, y in dataset])
+        return np.concatenate(xs), np.concatenate(ys)
+
+    def test_npy_and_npz_shards(self):
+        self._write_npy('train', 'a', self.x[:100], self.y[:100])
+        # Flat rows are reshaped to the input shape inside the pipeline
+        self._write_npy('train', 'b', self.x[100:250].reshape(150, -1), self.y[100:250])
+        os.makedirs(os.path.join(self.path, 'test'))
+        np.savez(os.path.join(self.path, 'test', 'c.npz'), x=self.x[250:], y=self.y[250:])
+
+        handler = DataHandler(self.path, batch_size=16, shuffle_buffer=64)
+        handler.load_data()
+        handler.preprocess_data()
+
+        x, y = self._collect(handler.train_dataset())
+        self.assertEqual(x.shape, (250, 28, 28, 1))
+        self.assertEqual(x.dtype, np.float32)
+        self.assertEqual(y.dtype, np.int64)
+        self.assertLessEqual(x.max(), 1.0)
+        # Shuffled, but the same examples with their own labels
+        self.assertEqual(sorted(y.tolist()), sorted(self.y[:250].tolist()))
+        np.testing.assert_allclose(np.sort(x.sum(axis=(1, 2, 3))), np.sort(self.x[:250].sum(axis=(1, 2, 3)) / 255), rtol=1e-5)
+
+        x, y = self._collect(handler.test_dataset())
+        np.testing.assert_array_equal(y, self.y[250:])
+        np.testing.assert_allclose(x, self.x[250:] / 255, rtol=1e-6)
+
+        # The sample is read without shuffling: same rows on every call
+        sample_x, sample_y = handler.get_sample(8)
+        np.testing.assert_array_equal(handler.get_sample(8)[1], sample_y)
+        np.testing.assert_allclose(sample_x[0], self.x[0] / 255, rtol=1e-6)
+        flat = (self.x[:250].reshape(250, -1) / 255).astype(np.float32)
+        for row, label in zip(sample_x.reshape(8, -1), sample_y):
+            index = np.flatnonzero(np.all(np.isclose(flat, row), axis=1))[0]
+            self.assertEqual(label, self.y[index])
+
+    def test_tfrecord_shards(self):
+        self._write_tfrecord('train-0.tfrecord', self.x[:200], self.y[:200])
+        self._write_tfrecord('test-0.tfrecord', self.x[200:], self.y[200:])
+        handler = DataHandler(self.path, batch_size=32)
+        handler.load_data()
+        handler.preprocess_data()
+
+        dataset, labels = handler.get_test_data()
+        self.assertIsNone(labels)
+        x, y = self._collect(dataset)
+        np.testing.assert_array_equal(y, self.y[200:])
+        np.testing.assert_allclose(x, self.x[200:] / 255, rtol=1e-6)
+        self.assertEqual(len(self._collect(handler.train_dataset())[1]), 200)
+
+    def test_missing_shards(self):
+        handler = DataHandler(self.path)
+        with self.assertRaises(ValueError):
+            handler.load_data()
+
+    def test_placeholder_data(self):
+        handler = DataHandler(os.path.join(self.path, 'missing'))
+        handler.load_data()
+        handler.preprocess_data()
+        x_train, y_train = handler.get_train_data()
+        self.assertEqual(x_train.shape, (800, 28, 28, 1))
+        self.assertEqual(y_train.ndim, 1)
+        batch_x, batch_y = next(iter(handler.train_dataset()))
+        self.assertEqual(tuple(batch_x.shape), (32, 28, 28, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from eth_abi import encode
+    from web3 import Web3, EthereumTesterProvider
+    import eth_tester  # noqa: F401
+except ImportError:
+    Web3 = None
+
+from client.event_monitor import RoundEventMonitor
+from tests.evm_helpers import deploy_runtime
+
+# Round events as declared in FedChainCore
+ROUND_EVENTS_ABI = [
+    {"anonymous": False, "name": "RoundStarted", "type": "event", "inputs": [
+        {"indexed": True, "name": "roundId", "type": "uint256"},
+        {"indexed": False, "name": "startTime", "type": "uint256"},
+        {"indexed": False, "name": "endTime", "type": "uint256"}]},
+    {"anonymous": False, "name": "GradientSubmitted", "type": "event", "inputs": [
+        {"indexed": True, "name": "roundId", "type": "uint256"},
+        {"indexed": True, "name": "participant", "type": "address"},
+        {"indexed": False, "name": "gradientIpfsHash", "type": "string"}]},
+    {"anonymous": False, "name": "RoundFinalized", "type": "event", "inputs": [
+        {"indexed": True, "name": "roundId", "type": "uint256"},
+        {"indexed": False, "name": "resultModelIpfsHash", "type": "string"},
+        {"indexed": False, "name": "modelVersion", "type": "uint256"}]},
+]
+
+# Minimal contract that re-emits whatever log it is given. Calldata layout:
+# topic count (2 or 3) | topic0 | topic1 | topic2 | ABI-encoded log data
+LOG_EMITTER_RUNTIME = bytes.fromhex(
+    '366080900380608060003760003560031460'
+    '1f57604035602035826000a2005b606035604035602035836000a300'
+)
+
+@unittest.skipIf(Web3 is None, "web3 with eth-tester is not installed")
+class TestRoundEventMonitor(unittest.TestCase):
+    def setUp(self):
+        self.w3 = Web3(EthereumTesterProvider())
+        self.account = self.w3.eth.accounts[0]
+        self.contract = deploy_runtime(self.w3, LOG_EMITTER_RUNTIME, ROUND_EVENTS_ABI)
+
+    def _emit(self, signature, indexed, types, values):
+        topics = [self.w3.keccak(text=signature)] + [encode([t], [v]) for t, v in indexed]
+        data = encode(['uint256'], [len(topics)]) + b''.join(topics + [b'\x00' * 32] * (4 - len(topics)))[:96]
+        tx_hash = self.w3.eth.send_transaction({
+            'from': self.account,
+            'to': self.contract.address,
+            'data': data + encode(types, values),
+            'gas': 200000
+        })
+        return self.w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    def _round_started(self, round_id):
+        return self._emit('RoundStarted(uint256,uint256,uint256)', [('uint256', round_id)],
+                          ['uint256', 'uint256'], [int(time.time()), int(time.time()) + 300])
+
+    def _gradient_submitted(self, round_id, participant, gradient_hash):
+        return self._emit('GradientSubmitted(uint256,address,string)',
+                          [('uint256', round_id), ('address', participant)], ['string'], [gradient_hash])
+
+    def _round_finalized(self, round_id):
+        return self._emit('RoundFinalized(uint256,string,uint256)', [('uint256', round_id)],
+                          ['string', 'uint256'], ['QmModel', round_id + 1])
+
+    def test_catch_up_in_batches(self):
+        self._round_started(1)
+        for i, participant in enumerate(self.w3.eth.accounts[1:4]):
+            self._gradient_submitted(1, participant, f"QmGradient{i}")
+
+        monitor = RoundEventMonitor(self.w3, self.contract, from_block=0, batch_size=2, use_filter=False)
+        events = monitor.poll()
+        self.assertEqual([e['event'] for e in events], ['RoundStarted'] + ['GradientSubmitted'] * 3)
+        self.assertEqual(events[-1]['args']['gradientIpfsHash'], 'QmGradient2')
+        self.assertEqual(monitor.poll(), [])
+        self.assertEqual(monitor.round_start_blocks, {1: events[0]['blockNumber']})
+
+    def test_filter_delivers_new_events_once(self):
+        monitor = RoundEventMonitor(self.w3, self.contract, poll_interval=0.01)
+        self.assertEqual(monitor.poll(), [])
+        self.assertIsNotNone(monitor._filter)
+
+        self._gradient_submitted(1, self.w3.eth.accounts[1], 'QmA')
+        self._round_finalized(1)
+        self.assertEqual([e['event'] for e in monitor.poll()], ['GradientSubmitted', 'RoundFinalized'])
+        self.assertEqual(monitor.poll(), [])
+
+    def test_round_submissions(self):
+        participants = self.w3.eth.accounts[1:3]
+        self._gradient_submitted(1, participants[0], 'QmOld')
+        self._gradient_submitted(2, participants[0], 'QmA')
+        self._gradient_submitted(2, participants[1], 'QmB')
+
+        monitor = RoundEventMonitor(self.w3, self.contract)
+        self.assertEqual(monitor.round_submissions(2), {participants[0]: 'QmA', participants[1]: 'QmB'})
+
+    def test_wait_returns_when_threshold_reached(self):
+        monitor = RoundEventMonitor(self.w3, self.contract, poll_interval=0.01)
+        participants = self.w3.eth.accounts[1:3]
+        self._gradient_submitted(1, participants[0], 'QmA')
+        self._gradient_submitted(1, participants[1], 'QmB')
+
+        start = time.time()
+        status = monitor.wait_for_round(1, min_participants=2, end_time=time.time() + 30)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(set(status.gradient_hashes.values()), {'QmA', 'QmB'})
+        self.assertFalse(status.finalized)
+
+    def test_wait_returns_on_finalization_and_deadline(self):
+        monitor = RoundEventMonitor(self.w3, self.contract, poll_interval=0.01)
+        self._gradient_submitted(3, self.w3.eth.accounts[1], 'QmA')
+        self._round_finalized(3)
+        started = self._round_started(4)
+        status = monitor.wait_for_round(3, min_participants=5, end_time=time.time() + 30)
+        self.assertTrue(status.finalized)
+        self.assertEqual(status.next_round, 4)
+        self.assertEqual(monitor.round_start_blocks[4], started['blockNumber'])
+
+        status = monitor.wait_for_round(4, min_participants=5, end_time=time.time() + 0.2)
+        self.assertEqual(status.gradient_hashes, {})
+        self.assertFalse(status.finalized)
+
+    def test_wait_for_round_start(self):
+        monitor = RoundEventMonitor(self.w3, self.contract, poll_interval=0.01)
+        self._round_started(1)
+        self._round_finalized(1)
+        self._round_started(2)
+
+        start = time.time()
+        self.assertEqual(monitor.wait_for_round_start(1, timeout=30), 2)
+        self.assertLess(time.time() - start, 5)
+        self.assertIsNone(monitor.wait_for_round_start(2, timeout=0.1))
+
+    def test_wait_for_round_start_falls_back_to_state(self):
+        monitor = RoundEventMonitor(self.w3, self.contract, poll_interval=0.01, use_filter=False)
+        calls = []
+
+        def current_round():
+            calls.append(time.time())
+            return 3 if len(calls) > 1 else 2
+
+        self.assertEqual(monitor.wait_for_round_start(2, timeout=30, fallback=current_round, fallback_interval=0.05), 3)
+        self.assertEqual(len(calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()
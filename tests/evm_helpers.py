@@ -0,0 +1,13 @@
+def deploy_runtime(w3, runtime, abi):
+    """
+    Deploy hand-assembled `runtime` bytecode (under 256 bytes) from the
+    first account and return a contract object for it with `abi`. Tests use
+    this for small stand-in contracts that need no compiled artifacts.
+    """
+    # Init code of 11 bytes that returns the runtime appended after it:
+    # PUSH1 len, DUP1, PUSH1 11, PUSH1 0, CODECOPY (memory[0:len] =
+    # code[11:11+len]), PUSH1 0, RETURN (memory[0:len] as the contract code)
+    init_code = bytes.fromhex('60%02x80600b6000396000f3' % len(runtime)) + runtime
+    tx_hash = w3.eth.send_transaction({'from': w3.eth.accounts[0], 'data': init_code})
+    address = w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+    return w3.eth.contract(address=address, abi=abi)
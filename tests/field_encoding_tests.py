@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.poseidon import FIELD_MODULUS, poseidon, poseidon_chain
+from client.field_encoding import (
+    dequantize, field_elements, from_limbs, gradient_circuit_inputs, hash_blocks, quantize, to_blocks, to_limbs
+)
+
+
+class TestPoseidon(unittest.TestCase):
+    def test_matches_circomlib(self):
+        # Reference values from circomlibjs
+        self.assertEqual(poseidon([1]), 18586133768512220936620570745912940619677854269274689475585506675881198879027)
+        self.assertEqual(poseidon([1, 2]), 7853200120776062878684798364095072458815029376092732009249414926327459813530)
+        self.assertEqual(poseidon([1, 2, 3, 4]), 18821383157269793795438455681495246036402687001665670618754263018637548127333)
+
+    def test_chain(self):
+        self.assertEqual(poseidon_chain([1, 2]), poseidon([1, 2]))
+        self.assertEqual(poseidon_chain([1, 2, 3]), poseidon([poseidon([1, 2]), 3]))
+        with self.assertRaises(ValueError):
+            poseidon([])
+
+
+class TestFieldEncoding(unittest.TestCase):
+    def test_quantize(self):
+        values = np.array([0.5, -0.25, 3.0, -1e-9], dtype=np.float32)
+        np.testing.assert_array_equal(quantize(values, 16), [32768, -16384, 196608, 0])
+        np.testing.assert_allclose(dequantize(quantize(values, 16), 16), values, atol=2 ** -17)
+        with self.assertRaises(ValueError):
+            quantize([np.nan])
+        with self.assertRaises(ValueError):
+            quantize([1e30])
+
+    def test_limbs(self):
+        quantized = np.array([0, 1, -1, 2 ** 61, -2 ** 61, -123456789])
+        self.assertEqual(from_limbs(to_limbs(quantized)), [int(q) % FIELD_MODULUS for q in quantized])
+
+    def test_blocks(self):
+        limbs = field_elements([np.ones((3, 50)), np.ones(30)], 0)
+        blocks = to_blocks(limbs)
+        self.assertEqual(blocks.shape, (2, 100, 4))
+        self.assertEqual(from_limbs(blocks[1]), [1] * 80 + [0] * 20)
+
+    def test_parallel_hashes_match(self):
+        blocks = to_blocks(field_elements([np.random.default_rng(0).standard_normal(250)]))
+        serial = hash_blocks(blocks, workers=1)
+        self.assertEqual(hash_blocks(blocks, workers=2), serial)
+        self.assertEqual(serial[0], poseidon_chain(from_limbs(blocks[0])))
+
+    def test_circuit_inputs(self):
+        model = [np.linspace(-1, 1, 100)]
+        gradients = [np.full(100, -0.5)]
+        (inputs,) = gradient_circuit_inputs(model, gradients, 8)
+        self.assertEqual(inputs['gradient'], [str(FIELD_MODULUS - 128)] * 100)
+        self.assertEqual(inputs['model'][0], str(FIELD_MODULUS - 256))
+        self.assertEqual(inputs['gradientHash'], str(poseidon_chain([FIELD_MODULUS - 128] * 100)))
+        with self.assertRaises(ValueError):
+            gradient_circuit_inputs(model, [np.zeros(101)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.ipfs_cache import IPFSCache
+from server.ipfs_handler import IPFSHandler
+from server.ipfs_stub import IPFSStub
+
+class TestIPFSCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        cache = IPFSCache(self.cache_dir, max_bytes=1024)
+        self.assertIsNone(cache.get('QmA'))
+        cache.put('QmA', b'hello')
+        self.assertEqual(bytes(cache.get('QmA')), b'hello')
+        self.assertEqual(cache.get('QmEmpty'), None)
+        cache.put('QmEmpty', b'')
+        self.assertEqual(cache.get('QmEmpty'), b'')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_lru_eviction(self):
+        cache = IPFSCache(self.cache_dir, max_bytes=250)
+        for name in ('QmA', 'QmB'):
+            cache.put(name, b'x' * 100)
+        cache.get('QmA')  # QmB becomes least recently used
+        cache.put('QmC', b'x' * 100)
+        self.assertIn('QmA', cache)
+        self.assertNotIn('QmB', cache)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['bytes'], 250)
+
+    def test_index_survives_restart(self):
+        IPFSCache(self.cache_dir).put('QmA', b'persisted')
+        cache = IPFSCache(self.cache_dir)
+        self.assertEqual(bytes(cache.get('QmA')), b'persisted')
+
+    def test_rejects_path_traversal(self):
+        cache = IPFSCache(self.cache_dir)
+        with self.assertRaises(ValueError):
+            cache.put('../../etc/passwd', b'x')
+
+    def test_handler_reuses_cached_objects(self):
+        with IPFSStub() as stub:
+            cache = IPFSCache(self.cache_dir)
+            ipfs_handler = IPFSHandler(api_url=stub.api_url, cache=cache)
+            model = [np.arange(6, dtype=np.float32)]
+            gradient_cid = stub.put(b'gradient')
+
+            model_cid = ipfs_handler.add_tensors(model)
+            for _ in range(3):
+                np.testing.assert_array_equal(ipfs_handler.get_tensors(model_cid)[0], model[0])
+            self.assertEqual(bytes(dict(ipfs_handler.get_many([gradient_cid]))[gradient_cid]), b'gradient')
+            self.assertEqual(bytes(dict(ipfs_handler.get_many([gradient_cid]))[gradient_cid]), b'gradient')
+
+            self.assertEqual(stub.request_counts.get('/api/v0/cat'), 1)
+            self.assertEqual(cache.stats()['hits'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
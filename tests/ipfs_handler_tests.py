@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.ipfs_handler import IPFSHandler
+from server.ipfs_stub import IPFSStub
+
+class TestIPFSHandler(unittest.TestCase):
+    def setUp(self):
+        self.stub = IPFSStub().start()
+        self.ipfs_handler = IPFSHandler(api_url=self.stub.api_url, max_concurrency=8, timeout=5)
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def test_tensor_round_trip(self):
+        tensors = [np.arange(12, dtype=np.float32).reshape(3, 4), np.ones(5, dtype=np.float32)]
+        cid = self.ipfs_handler.add_tensors(tensors)
+        for original, restored in zip(tensors, self.ipfs_handler.get_tensors(cid)):
+            np.testing.assert_array_equal(original, restored)
+
+    def test_legacy_json_gradients(self):
+        cid = self.ipfs_handler.add_json([[0.5, 1.5], [[1.0], [2.0]]])
+        restored = self.ipfs_handler.get_tensors(cid)
+        self.assertEqual(restored[1].shape, (2, 1))
+
+    def test_get_many_fetches_concurrently(self):
+        cids = [self.stub.put(f"object-{i}".encode()) for i in range(8)]
+        self.stub.latency = 0.2
+
+        start = time.perf_counter()
+        results = dict(self.ipfs_handler.get_many(cids))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, {cid: self.stub.objects[cid] for cid in cids})
+        self.assertLess(elapsed, 8 * 0.2 / 2)
+
+    def test_get_many_respects_concurrency_limit(self):
+        cids = [self.stub.put(f"object-{i}".encode()) for i in range(4)]
+        self.stub.latency = 0.1
+
+        start = time.perf_counter()
+        list(self.ipfs_handler.get_many(cids, max_concurrency=1))
+        self.assertGreaterEqual(time.perf_counter() - start, 4 * 0.1)
+
+    def test_get_many_errors(self):
+        cids = [self.stub.put(b'present'), 'QmMissing']
+        results = dict(self.ipfs_handler.get_many(cids, return_exceptions=True))
+        self.assertEqual(results[cids[0]], b'present')
+        self.assertIsInstance(results['QmMissing'], RuntimeError)
+
+        with self.assertRaises(RuntimeError):
+            list(self.ipfs_handler.get_many(cids))
+
+    def test_per_request_timeout(self):
+        cid = self.stub.put(b'slow')
+        self.stub.latency = 0.5
+        with self.assertRaises(RuntimeError):
+            list(self.ipfs_handler.get_many([cid], timeout=0.1))
+
+class TestIPFSStreaming(unittest.TestCase):
+    SIZE = 32 * 1024 * 1024
+
+    def setUp(self):
+        self.stub = IPFSStub().start()
+        self.ipfs_handler = IPFSHandler(api_url=self.stub.api_url)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.payload = os.urandom(1024) * (self.SIZE // 1024)
+
+    def tearDown(self):
+        self.stub.stop()
+        self.tmp.cleanup()
+
+    def _peak_allocation(self, fn):
+        tracemalloc.start()
+        try:
+            result = fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, peak
+
+    def test_add_file_streams_upload(self):
+        path = os.path.join(self.tmp.name, 'model.bin')
+        with open(path, 'wb') as f:
+            f.write(self.payload)
+
+        cid = self.ipfs_handler.add_file(path)
+        self.assertEqual(self.stub.objects[cid], self.payload)
+        # The body is generated on the fly rather than sized up front
+        self.assertEqual(self.stub.last_headers.get('Transfer-Encoding'), 'chunked')
+
+    def test_get_file_streams_to_disk(self):
+        cid = self.stub.put(self.payload)
+        output_path = os.path.join(self.tmp.name, 'download.bin')
+
+        view, peak = self._peak_allocation(lambda: self.ipfs_handler.get_file(cid, output_path, mmap_view=True))
+        self.assertEqual(len(view), self.SIZE)
+        self.assertEqual(view[:1024], self.payload[:1024])
+        self.assertLess(peak, self.SIZE / 4)
+
+    def test_json_and_tensors_round_trip(self):
+        payload = {'layers': [[0.25] * 1000, [1.0, 2.0]]}
+        self.assertEqual(self.ipfs_handler.get_json(self.ipfs_handler.add_json(payload)), payload)
+
+        tensors = [np.arange(1 << 20, dtype=np.float32)]
+        restored = self.ipfs_handler.get_tensors(self.ipfs_handler.add_tensors(tensors))
+        np.testing.assert_array_equal(restored[0], tensors[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import sys
 import os
+import numpy as np
 
 # Add parent directory to path to import client modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -44,5 +45,56 @@ class TestLocalFunctionality(unittest.TestCase):
         self.assertIsNotNone(proof)
         self.assertIsNotNone(public_inputs)
 
+    def test_flat_parameter_buffer(self):
+        flat = self.model_trainer.get_flat_weights()
+        self.assertEqual(flat.dtype, np.float32)
+        self.assertEqual(flat.size, sum(w.size for w in self.model_trainer.get_weights()))
+
+        # unflatten returns views over the flat buffer
+        views = self.model_trainer.unflatten(flat)
+        for view, weight in zip(views, self.model_trainer.get_weights()):
+            self.assertTrue(np.shares_memory(view, flat))
+            np.testing.assert_array_equal(view, weight)
+
+        self.model_trainer.assign_flat(np.zeros_like(flat))
+        self.assertFalse(np.any(self.model_trainer.get_flat_weights()))
+        self.model_trainer.assign_flat(flat)
+        np.testing.assert_array_equal(self.model_trainer.get_flat_weights(), flat)
+
+    def test_flat_gradients(self):
+        self.data_handler.load_data()
+        self.data_handler.preprocess_data()
+        x_train, y_train = self.data_handler.get_train_data()
+        flat = self.model_trainer.get_flat_gradients(x_train[:1], y_train[:1])
+        self.assertEqual(flat.size, self.model_trainer.flat_size(self.model_trainer.trainable_layout))
+
+    def test_micro_batched_gradients(self):
+        self.data_handler.load_data()
+        self.data_handler.preprocess_data()
+        x_train, y_train = self.data_handler.get_train_data()
+        x, y = x_train[:100], y_train[:100]
+        trainer = ModelTrainer(micro_batch_size=30)
+        trainer.model = self.model_trainer.model
+
+        full = trainer.get_gradients(x, y, compiled=False)
+        trainer.micro_batch_size = 100
+        single = trainer.get_gradients(x, y, compiled=False)
+        compiled = trainer.get_gradients(x, y)
+        for a, b, c in zip(full, single, compiled):
+            np.testing.assert_allclose(a, b, atol=1e-5)
+            np.testing.assert_allclose(a, c, atol=1e-5)
+
+        # Micro-batches of any size reuse the one trace
+        trainer.micro_batch_size = 30
+        trainer.get_gradients(x, y)
+        trainer.get_gradients(self.data_handler.train_dataset())
+        self.assertEqual(trainer.compiled_step.experimental_get_tracing_count(), 1)
+
+        # tf.data pipelines are rebatched to the micro-batch size too
+        dataset = self.data_handler.train_dataset()
+        sizes = [int(batch_x.shape[0]) for batch_x, _ in trainer._micro_batches(dataset, None)]
+        self.assertEqual(max(sizes), 30)
+        self.assertEqual(sum(sizes), sum(int(batch_x.shape[0]) for batch_x, _ in dataset))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.merkle import commit_tensors, verify_chunk
+from client.zk_prover import ZKProver
+
+
+class TestMerkleCommitment(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.tensors = [
+            rng.standard_normal((64, 33), dtype=np.float32),
+            rng.standard_normal(1000, dtype=np.float32),
+            np.arange(7, dtype=np.float64)
+        ]
+
+    def _chunk(self, proof):
+        data = np.ascontiguousarray(self.tensors[proof['tensor']]).reshape(-1).view(np.uint8)
+        return data[proof['offset']:proof['offset'] + proof['length']]
+
+    def test_deterministic_and_parallel_safe(self):
+        serial = commit_tensors(self.tensors, chunk_size=512, workers=1)
+        parallel = commit_tensors(self.tensors, chunk_size=512, workers=8)
+        self.assertEqual(serial.root_hex, parallel.root_hex)
+        self.assertEqual(len(serial.leaves), 17 + 8 + 1)
+
+    def test_distinguishes_tensors_with_equal_repr(self):
+        a = np.zeros(100000, dtype=np.float32)
+        b = a.copy()
+        b[50000] = 1.0
+        self.assertEqual(str([a]), str([b]))
+        self.assertNotEqual(commit_tensors([a]).root_hex, commit_tensors([b]).root_hex)
+
+    def test_binds_shapes(self):
+        flat = self.tensors[0].reshape(-1)
+        self.assertNotEqual(
+            commit_tensors([self.tensors[0]], chunk_size=512).root_hex,
+            commit_tensors([flat], chunk_size=512).root_hex
+        )
+
+    def test_inclusion_proofs(self):
+        commitment = commit_tensors(self.tensors, chunk_size=512)
+        for leaf in range(len(commitment.leaves)):
+            proof = commitment.proof(leaf)
+            self.assertTrue(verify_chunk(commitment.root_hex, proof, self._chunk(proof)))
+
+        proof = commitment.proof(commitment.leaf_index(1, 2000))
+        self.assertEqual((proof['tensor'], proof['offset']), (1, 1536))
+        tampered = self._chunk(proof).copy()
+        tampered[0] ^= 1
+        self.assertFalse(verify_chunk(commitment.root_hex, proof, tampered))
+
+        # A valid chunk presented at another position does not verify either
+        moved = dict(proof, offset=proof['offset'] - 512)
+        self.assertFalse(verify_chunk(commitment.root_hex, moved, self._chunk(proof)))
+
+    def test_prover_output_format(self):
+        prover = ZKProver()
+        proof, public_inputs = prover.generate_gradient_proof(self.tensors)
+        self.assertEqual(proof, '0x' + prover.last_commitment.root_hex)
+        self.assertEqual(public_inputs, proof[:10])
+        self.assertEqual(len(bytes.fromhex(proof[2:])), 32)
+        self.assertTrue(prover.generate_gradient_proof([])[0].startswith('0x'))
+
+if __name__ == '__main__':
+    unittest.main()
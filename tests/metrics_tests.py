@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import urllib.request
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from common import metrics
+from server.rpc_stub import RPCStub
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        metrics.disable()
+        shutil.rmtree(self.tmpdir)
+
+    def test_disabled_is_a_no_op(self):
+        self.assertIsNone(metrics.configure(port=0, trace_dir=None, enabled=False))
+        self.assertFalse(metrics.enabled())
+        with metrics.stage('train') as span:
+            metrics.count('rpc_calls', method='eth_call')
+        self.assertIs(span, metrics._NULL_SPAN)
+        self.assertIsNone(metrics.end_round())
+
+    def test_prometheus_text(self):
+        registry = metrics.configure('test', enabled=True)
+        metrics.count('ipfs_requests', endpoint='add')
+        metrics.count('ipfs_requests', 2, endpoint='add')
+        metrics.span('train', 0.0, 0.3)
+        metrics.span('train', 0.0, 20.0)
+        text = registry.render()
+        self.assertIn('# TYPE fedchain_ipfs_requests_total counter', text)
+        self.assertIn('fedchain_ipfs_requests_total{endpoint="add"} 3', text)
+        self.assertIn('# TYPE fedchain_stage_seconds histogram', text)
+        self.assertIn('fedchain_stage_seconds_bucket{stage="train",le="0.5"} 1', text)
+        self.assertIn('fedchain_stage_seconds_bucket{stage="train",le="+Inf"} 2', text)
+        self.assertIn('fedchain_stage_seconds_count{stage="train"} 2', text)
+
+        port = registry.serve(0)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            self.assertEqual(response.read().decode(), registry.render())
+
+    def test_round_trace(self):
+        metrics.configure('client-1', trace_dir=self.tmpdir)
+        metrics.begin_round(7)
+        start = time.perf_counter()
+        metrics.span('upload', start, start + 0.01, lane='upload')
+        with metrics.stage('submit'):
+            pass
+        path = metrics.end_round()
+        self.assertEqual(path, os.path.join(self.tmpdir, 'client-1-round-7.json'))
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        spans = {event['name']: event for event in events if event['ph'] == 'X'}
+        self.assertEqual(set(spans), {'upload', 'submit'})
+        self.assertAlmostEqual(spans['upload']['dur'], 1e4, places=3)
+        self.assertNotEqual(spans['upload']['tid'], spans['submit']['tid'])
+
+        # Rounds outside begin/end and dropped rounds leave no file
+        metrics.begin_round(8)
+        self.assertIsNone(metrics.end_round(keep=False))
+        self.assertEqual(os.listdir(self.tmpdir), ['client-1-round-7.json'])
+
+    def test_rpc_traffic(self):
+        from web3 import Web3
+        registry = metrics.configure('test', enabled=True)
+        with RPCStub() as stub:
+            w3 = Web3(Web3.HTTPProvider(stub.endpoint_uri, session=metrics.instrument_rpc(requests.Session())))
+            w3.eth.block_number
+            w3.eth.chain_id
+        counters = registry.counters
+        self.assertEqual(counters[('rpc_calls', (('method', 'eth_blockNumber'),))], 1)
+        self.assertEqual(counters[('rpc_http_requests', ())], 2)
+        self.assertGreater(counters[('rpc_sent_bytes', ())], 0)
+        self.assertGreater(counters[('rpc_received_bytes', ())], 0)
+
+if __name__ == '__main__':
+    unittest.main()
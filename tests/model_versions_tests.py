@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.model_versions import ModelFetcher, ModelPublisher, apply_delta, encode_delta
+from server.ipfs_handler import IPFSHandler
+from server.ipfs_stub import IPFSStub
+
+def model_versions(count, seed=0):
+    # Successive SGD-like updates of a small model; the bias is frozen
+    rng = np.random.default_rng(seed)
+    weights = [rng.standard_normal((64, 32)).astype(np.float32) * 0.05, np.zeros(32, dtype=np.float32)]
+    versions = [weights]
+    for _ in range(count - 1):
+        weights = [weights[0] - np.float32(1e-4) * rng.standard_normal((64, 32)).astype(np.float32), weights[1]]
+        versions.append(weights)
+    return versions
+
+class TestModelVersions(unittest.TestCase):
+    def setUp(self):
+        self.stub = IPFSStub().start()
+        self.ipfs = IPFSHandler(api_url=self.stub.api_url)
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def assertSameBits(self, actual, expected):
+        for a, e in zip(actual, expected):
+            self.assertEqual(a.dtype, e.dtype)
+            self.assertEqual(a.shape, e.shape)
+            self.assertEqual(a.tobytes(), e.tobytes())
+
+    def test_delta_round_trip(self):
+        rng = np.random.default_rng(1)
+        for dtype in (np.float32, np.float64, np.int8):
+            old = (rng.standard_normal((5, 7)) * 10).astype(dtype)
+            new = old.copy()
+            new[2] += dtype(1)
+            self.assertSameBits([apply_delta(old, encode_delta(old, new))], [new])
+        # Special values survive bit for bit
+        old = np.array([0.0, 1.0, np.inf, 3.0], dtype=np.float32)
+        new = np.array([-0.0, np.nan, -np.inf, 3.0], dtype=np.float32)
+        self.assertSameBits([apply_delta(old, encode_delta(old, new))], [new])
+        with self.assertRaises(ValueError):
+            encode_delta(old, new[:3])
+        with self.assertRaises(ValueError):
+            apply_delta(old[:3], encode_delta(old, new))
+
+    def test_clients_follow_deltas(self):
+        versions = model_versions(6)
+        publisher = ModelPublisher(self.ipfs, snapshot_interval=4)
+        fetcher = ModelFetcher(self.ipfs)
+        sources = []
+        for weights in versions:
+            cid = publisher.publish(weights)
+            self.assertSameBits(fetcher.fetch(cid), weights)
+            sources.append(fetcher.last_source)
+        # Versions 1 and 5 are snapshots
+        self.assertEqual(sources, ['snapshot', 'delta', 'delta', 'delta', 'snapshot', 'delta'])
+        self.assertEqual(fetcher.fetch(cid)[0].flags.writeable, False)
+        self.assertEqual(fetcher.last_source, 'cached')
+        # Only the changed layer costs bytes; the frozen bias packs to almost nothing
+        self.assertLess(fetcher.stats['bytes'], fetcher.stats['model_bytes'])
+        self.assertGreater(publisher.last_ratio, 1.5)
+
+    def test_catch_up_after_gap(self):
+        versions = model_versions(5)
+        publisher = ModelPublisher(self.ipfs, snapshot_interval=10)
+        cids = [publisher.publish(weights) for weights in versions]
+
+        # A new client starts from the snapshot
+        fresh = ModelFetcher(self.ipfs)
+        self.assertSameBits(fresh.fetch(cids[-1]), versions[-1])
+        self.assertEqual(fresh.stats['snapshots'], 1)
+        self.assertEqual(fresh.stats['deltas'], 4)
+
+        # A client that missed two versions continues from the one it holds
+        behind = ModelFetcher(self.ipfs)
+        behind.fetch(cids[1])
+        self.assertEqual((behind.stats['snapshots'], behind.stats['deltas']), (1, 1))
+        self.assertSameBits(behind.fetch(cids[4]), versions[4])
+        self.assertEqual((behind.stats['snapshots'], behind.stats['deltas'], behind.stats['gaps']), (1, 4, 2))
+
+    def test_legacy_model_and_resume(self):
+        versions = model_versions(3)
+        legacy = self.ipfs.add_tensors(versions[0])
+        publisher = ModelPublisher(self.ipfs, snapshot_interval=10)
+        self.assertSameBits(publisher.resume(legacy), versions[0])
+        cid = publisher.publish(versions[1])
+
+        # A restarted publisher continues the chain of the current model
+        restarted = ModelPublisher(self.ipfs, snapshot_interval=10)
+        restarted.resume(cid)
+        self.assertEqual((restarted.version, restarted.snapshot_cid), (1, legacy))
+        cid = restarted.publish(versions[2])
+
+        fetcher = ModelFetcher(self.ipfs)
+        self.assertSameBits(fetcher.fetch(cid), versions[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from web3 import Web3, EthereumTesterProvider
+    import eth_tester  # noqa: F401
+except ImportError:
+    Web3 = None
+
+from client.data_handler import DataHandler
+from client.model_trainer import ModelTrainer
+from server.orchestrator import ModelEvaluator, Orchestrator
+
+# The parts of FedChainCore the orchestrator touches here
+CORE_ABI = [
+    {"type": "event", "name": "RoundStarted", "anonymous": False, "inputs": [
+        {"name": "roundId", "type": "uint256", "indexed": True},
+        {"name": "startTime", "type": "uint256", "indexed": False},
+        {"name": "endTime", "type": "uint256", "indexed": False}]},
+    {"type": "event", "name": "GradientSubmitted", "anonymous": False, "inputs": [
+        {"name": "roundId", "type": "uint256", "indexed": True},
+        {"name": "participant", "type": "address", "indexed": True},
+        {"name": "gradientIpfsHash", "type": "string", "indexed": False}]},
+    {"type": "event", "name": "RoundFinalized", "anonymous": False, "inputs": [
+        {"name": "roundId", "type": "uint256", "indexed": True},
+        {"name": "resultModelIpfsHash", "type": "string", "indexed": False},
+        {"name": "modelVersion", "type": "uint256", "indexed": False}]},
+    {"type": "function", "name": "updateModel", "stateMutability": "nonpayable", "outputs": [], "inputs": [
+        {"name": "_roundId", "type": "uint256"},
+        {"name": "_newModelIpfsHash", "type": "string"},
+        {"name": "_accuracy", "type": "uint256"},
+        {"name": "_metadataURI", "type": "string"},
+        {"name": "_zkProof", "type": "bytes"},
+        {"name": "_publicInputs", "type": "bytes"}]},
+]
+
+
+class FakeBlockchain:
+    def __init__(self):
+        self.w3 = Web3(EthereumTesterProvider())
+        self.contract = self.w3.eth.contract(address='0x' + '00' * 19 + '01', abi=CORE_ABI)
+        self.read_cache = None
+        self.transactions = []
+
+    def get_min_participants(self):
+        return 2
+
+    def get_current_model(self):
+        return 'QmModel'
+
+    def transact(self, function, private_key):
+        self.transactions.append(function)
+
+
+class FakePublisher:
+    version = 0
+    last_ratio = 1.0
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, weights):
+        self.published.append(weights)
+        self.version += 1
+        return f"QmVersion{self.version}"
+
+
+@unittest.skipIf(Web3 is None, "web3 with eth-tester is not installed")
+class TestPublishModel(unittest.TestCase):
+    def _orchestrator(self, evaluator=None):
+        self.blockchain = FakeBlockchain()
+        self.publisher = FakePublisher()
+        orchestrator = Orchestrator(self.blockchain, None, None, self.publisher, learning_rate=0.5,
+                                    evaluator=evaluator)
+        orchestrator.global_weights = [np.ones((2, 2)), np.ones(3)]
+        return orchestrator
+
+    def test_records_evaluated_accuracy(self):
+        evaluated = []
+
+        def evaluator(weights):
+            evaluated.append(weights)
+            return 0.875
+
+        orchestrator = self._orchestrator(evaluator)
+        update = [np.full((2, 2), 2.0), np.full(3, 4.0)]
+        self.assertEqual(orchestrator.publish_model(7, update), 'QmVersion1')
+
+        np.testing.assert_array_equal(orchestrator.global_weights[0], np.zeros((2, 2)))
+        np.testing.assert_array_equal(orchestrator.global_weights[1], np.full(3, -1.0))
+        self.assertIs(evaluated[0], self.publisher.published[0])
+        (function,) = self.blockchain.transactions
+        self.assertEqual(function.fn_name, 'updateModel')
+        self.assertEqual(function.args[:4], (7, 'QmVersion1', 8750, ''))
+
+    def test_explicit_accuracy(self):
+        orchestrator = self._orchestrator()
+        orchestrator.publish_model(7, [np.zeros((2, 2)), np.zeros(3)], accuracy=0.5)
+        self.assertEqual(self.blockchain.transactions[0].args[2], 5000)
+
+    def test_requires_accuracy(self):
+        orchestrator = self._orchestrator()
+        with self.assertRaises(RuntimeError):
+            orchestrator.publish_model(7, [np.zeros((2, 2)), np.zeros(3)])
+        self.assertEqual(self.publisher.published, [])
+
+    def test_update_must_match_model(self):
+        orchestrator = self._orchestrator(lambda weights: 1.0)
+        for update in ([np.zeros((2, 2))], [np.zeros((2, 2)), np.zeros(4)]):
+            with self.assertRaises(ValueError):
+                orchestrator.publish_model(7, update)
+        np.testing.assert_array_equal(orchestrator.global_weights[1], np.ones(3))
+        self.assertEqual((self.publisher.published, self.blockchain.transactions), ([], []))
+
+
+class TestModelEvaluator(unittest.TestCase):
+    def test_accuracy(self):
+        evaluator = ModelEvaluator(DataHandler('dummy_path'))
+        accuracy = evaluator(ModelTrainer().get_weights())
+        self.assertGreaterEqual(accuracy, 0.0)
+        self.assertLessEqual(accuracy, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+from concurrent.futures import CancelledError
+import numpy as np
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.proof_scheduler import CommandProver, LocalProver, ProofScheduler
+from client.zk_prover import ZKProver
+from server.prover_stub import stub_proof
+
+STUB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server', 'prover_stub.py')
+
+
+class TestProofScheduler(unittest.TestCase):
+    def setUp(self):
+        self.key_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.key_dir.name, 'gradient_verification.zkey'), 'wb') as f:
+            f.write(b'proving key')
+        self.inputs = {'modelHash': '1', 'gradientHash': '2', 'model': ['3'], 'gradient': ['4']}
+
+    def tearDown(self):
+        self.key_dir.cleanup()
+
+    def _prover(self, *options, persistent=False):
+        mode = ['serve', '{circuit}', '{key}'] if persistent else ['prove', '{circuit}', '{key}', '{input}', '{proof}', '{public}']
+        return CommandProver([sys.executable, STUB] + mode + list(options), key_dir=self.key_dir.name, persistent=persistent)
+
+    def test_local_prover(self):
+        gradients = [np.arange(10, dtype=np.float32)]
+        with ProofScheduler(LocalProver()) as scheduler:
+            result = scheduler.submit('gradient', gradients).result(timeout=60)
+        self.assertEqual(result, ZKProver().generate_gradient_proof(gradients))
+
+    def test_command_prover(self):
+        expected = stub_proof('gradient_verification', b'proving key', self.inputs)
+        for persistent in (False, True):
+            with ProofScheduler(self._prover(persistent=persistent)) as scheduler:
+                futures = [scheduler.submit('gradient_verification', self.inputs) for _ in range(3)]
+                for future in futures:
+                    self.assertEqual(tuple(future.result(timeout=60)), expected)
+                self.assertEqual(expected[1], ['1', '2'])
+                # One worker: a persistent prover loads the key once
+                self.assertEqual(scheduler.stats['key_loads'], 1)
+                self.assertEqual(scheduler.stats['completed'], 3)
+
+    def test_missing_key(self):
+        with ProofScheduler(self._prover()) as scheduler:
+            with self.assertRaises(RuntimeError):
+                scheduler.submit('training_verification', self.inputs).result(timeout=60)
+            self.assertEqual(scheduler.stats['failed'], 1)
+
+    def test_bounded_queue_and_cancellation(self):
+        with ProofScheduler(self._prover('--delay', '1'), max_pending=2) as scheduler:
+            running = scheduler.submit('gradient_verification', self.inputs, round_id=5)
+            queued = scheduler.submit('gradient_verification', self.inputs, round_id=5)
+            start = time.perf_counter()
+            with self.assertRaises(RuntimeError):
+                scheduler.submit('gradient_verification', self.inputs, round_id=6, timeout=0.1)
+            self.assertLess(time.perf_counter() - start, 0.9)
+
+            self.assertEqual(scheduler.cancel_round(5), 2)
+            self.assertTrue(queued.cancelled())
+            with self.assertRaises(CancelledError):
+                running.result(timeout=0)
+
+            # The worker finishes the dropped job, then takes new work
+            next_round = scheduler.submit('gradient_verification', self.inputs, round_id=6, timeout=5)
+            self.assertEqual(next_round.result(timeout=60)[1], ['1', '2'])
+            self.assertEqual(scheduler.stats['cancelled'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
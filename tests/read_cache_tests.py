@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from web3 import Web3, EthereumTesterProvider, HTTPProvider
+    import eth_tester  # noqa: F401
+except ImportError:
+    Web3 = None
+
+from client.read_cache import BlockReadCache
+from server.rpc_stub import RPCStub
+from tests.evm_helpers import deploy_runtime
+
+# Counter contract: a call with empty calldata increments storage slot 0, any
+# other call returns it
+COUNTER_RUNTIME = bytes.fromhex('3615601057600054600052602060' '00f35b600054600101600055' '00')
+
+COUNTER_ABI = [
+    {"type": "function", "name": "count", "stateMutability": "view", "inputs": [],
+     "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "minParticipants", "stateMutability": "view", "inputs": [],
+     "outputs": [{"name": "", "type": "uint256"}]},
+]
+
+
+@unittest.skipIf(Web3 is None, "web3 with eth-tester is not installed")
+class TestBlockReadCache(unittest.TestCase):
+    def setUp(self):
+        self.w3 = Web3(EthereumTesterProvider())
+        self.account = self.w3.eth.accounts[0]
+        self.contract = deploy_runtime(self.w3, COUNTER_RUNTIME, COUNTER_ABI)
+
+    def _increment(self):
+        tx_hash = self.w3.eth.send_transaction({'from': self.account, 'to': self.contract.address, 'gas': 100000})
+        return self.w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    def test_reads_within_a_block_hit(self):
+        cache = BlockReadCache(self.w3, head_ttl=60)
+        self.assertEqual([cache.call(self.contract.functions.count()) for _ in range(5)], [0] * 5)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['head_reads']), (4, 1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 0.8)
+
+    def test_observed_block_invalidates(self):
+        cache = BlockReadCache(self.w3, head_ttl=60)
+        self.assertEqual(cache.call(self.contract.functions.count()), 0)
+        receipt = self._increment()
+
+        # The receipt's block invalidates even before the head TTL runs out
+        cache.observe_block(receipt['blockNumber'])
+        self.assertEqual(cache.call(self.contract.functions.count()), 1)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_head_refresh_invalidates(self):
+        # By default the head is checked on every read
+        cache = BlockReadCache(self.w3)
+        self.assertEqual(cache.call(self.contract.functions.count()), 0)
+        self._increment()
+        self.assertEqual(cache.call(self.contract.functions.count()), 1)
+        self.assertEqual(cache.stats()['head_reads'], 2)
+
+    def test_pinned_values_survive_new_blocks(self):
+        cache = BlockReadCache(self.w3, pinned=['minParticipants'], head_ttl=0)
+        self.assertEqual(cache.call(self.contract.functions.minParticipants()), 0)
+        self._increment()
+        self.assertEqual(cache.call(self.contract.functions.minParticipants()), 0)
+        self.assertEqual(cache.call(self.contract.functions.count()), 1)
+
+    def test_call_many_fetches_only_misses(self):
+        cache = BlockReadCache(self.w3, head_ttl=60)
+        cache.call(self.contract.functions.count())
+        fetched = []
+
+        def fetch(functions, block_identifier):
+            fetched.extend(f.fn_name for f in functions)
+            return [f.call(block_identifier=block_identifier) for f in functions]
+
+        functions = [self.contract.functions.count(), self.contract.functions.minParticipants()]
+        self.assertEqual(cache.call_many(functions, fetch=fetch), [0, 0])
+        self.assertEqual(fetched, ['minParticipants'])
+
+    def test_pinned_reads_save_requests(self):
+        with RPCStub(self.w3) as stub:
+            w3 = Web3(HTTPProvider(stub.endpoint_uri))
+            contract = w3.eth.contract(address=self.contract.address, abi=COUNTER_ABI)
+            for _ in range(5):
+                contract.functions.minParticipants().call()
+            uncached = stub.http_requests
+
+            stub.reset_counts()
+            cache = BlockReadCache(w3, pinned=['minParticipants'])
+            for _ in range(5):
+                self.assertEqual(cache.call(contract.functions.minParticipants()), 0)
+            self.assertEqual(stub.method_counts.get('eth_call'), 1)
+            self.assertNotIn('eth_blockNumber', stub.method_counts)
+            self.assertLess(stub.http_requests, uncached)
+
+if __name__ == '__main__':
+    unittest.main()
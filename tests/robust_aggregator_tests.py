@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.robust_aggregator import RobustAggregator
+
+class TestRobustAggregator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.updates = rng.standard_normal((15, 1003)).astype(np.float32)
+        self.updates[:2] += 50.0  # two byzantine participants
+
+    def _aggregate(self, workers=1, **kwargs):
+        # Small chunks and capacity exercise chunking and file growth
+        aggregator = RobustAggregator(workers=workers, capacity=4, chunk_bytes=15 * 4 * 100, **kwargs)
+        try:
+            for update in self.updates:
+                aggregator.add_gradient([update[:3], update[3:].reshape(100, 10)])
+            result = aggregator.aggregate()
+            self.assertEqual(result[1].shape, (100, 10))
+            return np.concatenate([r.reshape(-1) for r in result]), aggregator
+        finally:
+            aggregator.close()
+
+    def test_coordinate_median(self):
+        result, _ = self._aggregate(method='median')
+        np.testing.assert_allclose(result, np.median(self.updates, axis=0), rtol=1e-6)
+
+    def test_trimmed_mean(self):
+        result, _ = self._aggregate(method='trimmed_mean', trim_ratio=0.2)
+        expected = np.sort(self.updates, axis=0)[3:12].mean(axis=0)
+        np.testing.assert_allclose(result, expected, rtol=1e-5, atol=1e-6)
+
+    def test_multi_krum_excludes_outliers(self):
+        result, aggregator = self._aggregate(method='krum', byzantine=2)
+        self.assertFalse({0, 1} & set(aggregator.last_selected))
+        np.testing.assert_allclose(result, self.updates[aggregator.last_selected].mean(axis=0), rtol=1e-5, atol=1e-6)
+
+    def test_process_pool_matches_serial(self):
+        serial, _ = self._aggregate(method='median')
+        parallel, _ = self._aggregate(method='median', workers=2)
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_krum_requires_enough_participants(self):
+        aggregator = RobustAggregator(method='krum', byzantine=7, workers=1)
+        try:
+            for update in self.updates:
+                aggregator.add_update(update)
+            with self.assertRaises(ValueError):
+                aggregator.aggregate()
+        finally:
+            aggregator.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from eth_abi import decode
+from web3 import Web3
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.compression import GradientCompressor
+from client.proof_scheduler import CommandProver, LocalProver, ProofScheduler
+from client.round_pipeline import RoundPipeline
+from client.zk_prover import ZKProver
+from server.prover_stub import stub_proof
+
+STUB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server', 'prover_stub.py')
+
+STAGE_SECONDS = 0.2
+
+
+class _Gradient:
+    def __init__(self, value):
+        self.value = value
+
+    def numpy(self):
+        return self.value
+
+
+class _Functions:
+    def rounds(self, round_id):
+        return ('rounds', round_id)
+
+    def getRoundParticipants(self, round_id):
+        return ('participants', round_id)
+
+
+class _Contract:
+    functions = _Functions()
+
+
+class FakeBlockchain:
+    contract = _Contract()
+
+    def __init__(self, end_time, participants=()):
+        self.end_time = end_time
+        self.participants = list(participants)
+        self.submissions = []
+
+    def batch_call(self, functions):
+        time.sleep(STAGE_SECONDS / 4)
+        return [(0, self.end_time, False, '', 0), self.participants]
+
+    def get_current_model(self):
+        return 'QmModel'
+
+    def submit_gradient(self, *args):
+        self.submissions.append(args)
+
+
+class _Cache:
+    def stats(self):
+        return {'hit_rate': 0.0}
+
+
+class FakeIPFS:
+    cache = _Cache()
+
+    def __init__(self):
+        self.uploads = []
+
+    def get_tensors(self, file_hash, with_meta=False):
+        time.sleep(STAGE_SECONDS)
+        return ([np.ones(3)], {}) if with_meta else [np.ones(3)]
+
+    def add_tensors(self, tensors, meta=None):
+        time.sleep(STAGE_SECONDS)
+        self.uploads.append((tensors, meta))
+        return 'QmGradients'
+
+
+class FakeTrainer:
+    def __init__(self):
+        self.weights = None
+
+    def set_weights(self, weights):
+        self.weights = weights
+
+    def train(self, x, y, epochs=1):
+        time.sleep(STAGE_SECONDS)
+
+    def get_gradients(self, x, y):
+        return [_Gradient(w * 2) for w in self.weights]
+
+    def get_trainable_weights(self):
+        return list(self.weights)
+
+    def evaluate(self, x, y):
+        time.sleep(STAGE_SECONDS)
+        return 0.5, 0.9
+
+
+class FakeData:
+    def get_train_data(self):
+        return np.zeros((64, 1)), np.zeros(64)
+
+    def get_test_data(self):
+        return np.zeros((8, 1)), np.zeros(8)
+
+    def get_sample(self, count=32):
+        return np.zeros((count, 1)), np.zeros(count)
+
+
+class FakeScheduler:
+    prover = LocalProver()
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.cancelled = []
+        self.inputs = []
+
+    def submit(self, circuit, inputs, round_id=None):
+        self.inputs.append(inputs)
+
+        def prove():
+            time.sleep(self.seconds)
+            return '0x' + 'ab' * 32, '0xabababab'
+        return self.pool.submit(prove)
+
+    def cancel_round(self, round_id):
+        self.cancelled.append(round_id)
+
+
+class TestRoundPipeline(unittest.TestCase):
+    def _pipeline(self, blockchain, prove_seconds=STAGE_SECONDS, compressor=None):
+        self.scheduler = FakeScheduler(prove_seconds)
+        self.ipfs = FakeIPFS()
+        return RoundPipeline(blockchain, self.ipfs, FakeTrainer(), FakeData(), self.scheduler, compressor)
+
+    def test_stages_overlap(self):
+        blockchain = FakeBlockchain(time.time() + 60)
+        pipeline = self._pipeline(blockchain)
+        self.assertEqual(pipeline.run(3, '0xme', 'key'), 'submitted')
+
+        (address, _, round_id, gradient_hash, proof, public_inputs), = blockchain.submissions
+        self.assertEqual((round_id, gradient_hash, public_inputs), (3, 'QmGradients', '0xabababab'))
+
+        timings = pipeline.last_timings
+        self.assertEqual(
+            set(timings.stages),
+            {'check_round', 'fetch_model', 'train', 'gradients', 'compress', 'witness', 'prove', 'upload', 'evaluate', 'submit'}
+        )
+        # The download starts with the round checks; proof, upload and
+        # evaluation run side by side
+        self.assertLess(timings.stages['fetch_model'][0], timings.stages['check_round'][1])
+        self.assertLess(timings.stages['evaluate'][0], timings.stages['upload'][1])
+        self.assertLess(timings.stages['upload'][0], timings.stages['prove'][1])
+        self.assertLess(timings.total, timings.busy - 2 * STAGE_SECONDS)
+
+    def test_proof_covers_uploaded_tensors(self):
+        blockchain = FakeBlockchain(time.time() + 60)
+        pipeline = self._pipeline(blockchain, compressor=GradientCompressor('int8'))
+        self.assertEqual(pipeline.run(3, '0xme', 'key'), 'submitted')
+
+        (tensors, meta), = self.ipfs.uploads
+        proven, = self.scheduler.inputs
+        self.assertEqual(meta['compression'], 'int8')
+        self.assertIs(proven, tensors)
+
+    def test_external_prover(self):
+        # PROVER_COMMAND path: gradient_verification witnesses per block,
+        # proven by the stub binary and encoded for submitGradient
+        with tempfile.TemporaryDirectory() as key_dir:
+            with open(os.path.join(key_dir, 'gradient_verification.zkey'), 'wb') as f:
+                f.write(b'proving key')
+            prover = CommandProver([sys.executable, STUB, 'serve', '{circuit}', '{key}'], key_dir=key_dir,
+                                   persistent=True)
+            blockchain = FakeBlockchain(time.time() + 60)
+            with ProofScheduler(prover) as scheduler:
+                pipeline = RoundPipeline(blockchain, FakeIPFS(), FakeTrainer(), FakeData(), scheduler)
+                self.assertEqual(pipeline.run(3, '0xme', 'key'), 'submitted')
+
+        (_, _, _, _, proof, public_inputs), = blockchain.submissions
+        witness, = ZKProver().circuit_inputs([np.ones(3)], [np.full(3, 2.0)])
+        expected_proof, expected_public = stub_proof('gradient_verification', b'proving key', witness)
+        self.assertEqual(json.loads(Web3.to_bytes(hexstr=proof)), [expected_proof])
+        self.assertEqual(decode(['uint256[]'], Web3.to_bytes(hexstr=public_inputs))[0],
+                         tuple(int(signal) for signal in expected_public))
+
+    def test_fetch_without_cache(self):
+        blockchain = FakeBlockchain(time.time() + 60)
+        pipeline = self._pipeline(blockchain)
+        self.ipfs.cache = None
+        self.assertEqual(pipeline.run(3, '0xme', 'key'), 'submitted')
+        np.testing.assert_array_equal(pipeline.model_trainer.weights, [np.ones(3)])
+
+    def test_skips_rounds(self):
+        blockchain = FakeBlockchain(time.time() + 60, participants=['0xme'])
+        self.assertEqual(self._pipeline(blockchain).run(3, '0xme', 'key'), 'already_submitted')
+        blockchain = FakeBlockchain(time.time() - 1)
+        self.assertEqual(self._pipeline(blockchain).run(3, '0xme', 'key'), 'ended')
+        self.assertEqual(blockchain.submissions, [])
+
+    def test_round_ends_while_proving(self):
+        blockchain = FakeBlockchain(time.time() + 5 * STAGE_SECONDS)
+        pipeline = self._pipeline(blockchain, prove_seconds=20 * STAGE_SECONDS)
+        self.assertEqual(pipeline.run(4, '0xme', 'key'), 'ended')
+        self.assertEqual(self.scheduler.cancelled, [4])
+        self.assertEqual(blockchain.submissions, [])
+
+if __name__ == '__main__':
+    unittest.main()
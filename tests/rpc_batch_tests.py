@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from web3 import Web3, EthereumTesterProvider
+    import eth_tester  # noqa: F401
+except ImportError:
+    Web3 = None
+
+from client.rpc_batch import BatchCaller, encode_call
+from server.rpc_stub import RPCStub
+from tests.evm_helpers import deploy_runtime
+
+# Contract whose every function returns its own ABI-encoded arguments, so an
+# ABI with matching inputs and outputs decodes to what was passed in
+ECHO_RUNTIME = bytes.fromhex('36600490038060046000376000f3')
+
+ECHO_ABI = [
+    {"type": "function", "name": "rounds", "stateMutability": "view",
+     "inputs": [{"name": "startTime", "type": "uint256"}, {"name": "finalized", "type": "bool"},
+                {"name": "resultModelIpfsHash", "type": "string"}],
+     "outputs": [{"name": "startTime", "type": "uint256"}, {"name": "finalized", "type": "bool"},
+                 {"name": "resultModelIpfsHash", "type": "string"}]},
+    {"type": "function", "name": "roundId", "stateMutability": "view",
+     "inputs": [{"name": "value", "type": "uint256"}],
+     "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "getRoundParticipants", "stateMutability": "view",
+     "inputs": [{"name": "info", "type": "tuple", "components": [
+         {"name": "roundId", "type": "uint256"}, {"name": "participants", "type": "address[]"}]}],
+     "outputs": [{"name": "info", "type": "tuple", "components": [
+         {"name": "roundId", "type": "uint256"}, {"name": "participants", "type": "address[]"}]}]},
+]
+
+
+@unittest.skipIf(Web3 is None, "web3 with eth-tester is not installed")
+class TestBatchCaller(unittest.TestCase):
+    def setUp(self):
+        self.stub = RPCStub().start()
+        self.w3 = Web3(Web3.HTTPProvider(self.stub.endpoint_uri))
+        self.contract = deploy_runtime(self.w3, ECHO_RUNTIME, ECHO_ABI)
+        self.stub.reset_counts()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def test_one_request_per_chunk(self):
+        caller = BatchCaller(self.w3, batch_size=4)
+        functions = [self.contract.functions.rounds(i, i % 2 == 0, f"Qm{i}") for i in range(10)]
+        results = caller.call(functions)
+
+        self.assertEqual(results, [[i, i % 2 == 0, f"Qm{i}"] for i in range(10)])
+        self.assertEqual(self.stub.http_requests, 3)
+        self.assertEqual(self.stub.method_counts, {'eth_call': 10})
+
+    def test_matches_individual_calls(self):
+        functions = [self.contract.functions.roundId(7), self.contract.functions.rounds(1, True, 'QmA')]
+        batched = BatchCaller(self.w3).call(functions, block_identifier=self.w3.eth.block_number)
+        self.assertEqual(batched, [f.call() for f in functions])
+
+    def test_encoding_matches_web3(self):
+        # Calldata is built without web3 internals; it must stay what web3 encodes
+        participants = self.w3.eth.accounts[:2]
+        cases = [('roundId', [7]), ('rounds', [1, True, 'QmA']), ('getRoundParticipants', [(3, participants)])]
+        for fn_name, args in cases:
+            function = getattr(self.contract.functions, fn_name)(*args)
+            self.assertEqual(encode_call(self.w3, function), self.contract.encodeABI(fn_name=fn_name, args=args))
+        function = self.contract.functions.rounds(startTime=1, finalized=True, resultModelIpfsHash='QmA')
+        self.assertEqual(encode_call(self.w3, function), self.contract.encodeABI(fn_name='rounds', args=[1, True, 'QmA']))
+
+        functions = [self.contract.functions.getRoundParticipants((3, participants))]
+        self.assertEqual(BatchCaller(self.w3).call(functions), [f.call() for f in functions])
+
+    def test_falls_back_without_http_provider(self):
+        w3 = Web3(EthereumTesterProvider())
+        contract = deploy_runtime(w3, ECHO_RUNTIME, ECHO_ABI)
+
+        caller = BatchCaller(w3)
+        self.assertEqual(caller.call([contract.functions.roundId(i) for i in range(3)]), [0, 1, 2])
+        self.assertEqual(caller.requests, 3)
+
+    def test_errors_are_raised(self):
+        # Calling an account without code returns empty data, which cannot be decoded
+        contract = self.w3.eth.contract(address=self.w3.eth.accounts[1], abi=ECHO_ABI)
+        with self.assertRaises(Exception):
+            BatchCaller(self.w3).call([contract.functions.roundId(1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+import unittest
+import sys
+import os
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client.contracts import artifacts_available
+from server.simulation import Simulation, participant_keys
+
+try:
+    from web3 import Web3, EthereumTesterProvider
+    import eth_tester
+    HAVE_ETH_TESTER = True
+except ImportError:
+    HAVE_ETH_TESTER = False
+
+HAVE_ARTIFACTS = artifacts_available(('FedToken', 'ModelNFT', 'ZKVerifier', 'FedChainCore'))
+
+
+class _Call:
+    def __init__(self, name, args):
+        self.fn_name = name
+        self.args = args
+
+
+class _Functions:
+    def __getattr__(self, name):
+        return lambda *args: _Call(name, args)
+
+
+class FakeCore:
+    """
+    In-memory FedChainCore: rounds finalize on the minParticipants-th
+    submission, and updateModel() opens the next round.
+    """
+    def __init__(self, min_participants, initial_model_hash):
+        self.min_participants = min_participants
+        self.model_hash = initial_model_hash
+        self.round_id = 1
+        self.submissions = {}
+        self.finalized = set()
+        self.updates = []
+        self.lock = threading.Lock()
+
+    def submit(self, round_id, address, gradient_hash):
+        with self.lock:
+            if round_id != self.round_id or round_id in self.finalized:
+                raise RuntimeError("Round not active")
+            submitted = self.submissions.setdefault(round_id, {})
+            submitted[address] = gradient_hash
+            if len(submitted) >= self.min_participants:
+                self.finalized.add(round_id)
+
+    def update_model(self, round_id, model_hash, accuracy, metadata, proof, public_inputs):
+        with self.lock:
+            if round_id not in self.finalized:
+                raise RuntimeError("Round not finalized")
+            self.updates.append((round_id, model_hash, accuracy))
+            self.model_hash = model_hash
+            self.round_id += 1
+
+
+CHAINS = {}
+
+
+def _fake_w3():
+    from eth_account import Account
+    return SimpleNamespace(eth=SimpleNamespace(account=Account, block_number=0))
+
+
+def _fake_contract(w3, name, address):
+    return SimpleNamespace(functions=_Functions())
+
+
+class FakeChain:
+    def __init__(self, rpc_url=None, admin_key=None, latency=0.0):
+        self.rpc_url = 'http://fake-chain'
+        self.w3 = _fake_w3()
+        self.admin_key = participant_keys(1, seed='admin')[0]
+        self.admin_address = self.w3.eth.account.from_key(self.admin_key).address
+
+    def deploy(self, min_participants, round_duration, initial_model_hash):
+        address = f"0x{len(CHAINS) + 1:040x}"
+        CHAINS[address] = FakeCore(min_participants, initial_model_hash)
+        return address
+
+    def fund(self, addresses):
+        pass
+
+    def rpc_counts(self):
+        return 0, {}
+
+    def reset_counts(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Engine:
+    def send(self, call, private_key, gas=None):
+        return call
+
+    def wait(self, calls):
+        return [{'status': 1} for _ in calls]
+
+
+class FakeClient:
+    def __init__(self, rpc_url, contract_address):
+        self.core = CHAINS[contract_address]
+        self.contract_address = contract_address
+        self.w3 = _fake_w3()
+        self.contract = SimpleNamespace(functions=_Functions())
+        self.tx_engine = _Engine()
+        self.read_cache = None
+
+    def read(self, call):
+        if call.fn_name == 'rounds':
+            round_id, = call.args
+            return (0, 0, round_id in self.core.finalized, '', len(self.core.submissions.get(round_id, {})))
+        return f"0x{0:040x}"
+
+    def get_current_round(self):
+        return self.core.round_id
+
+    def get_current_model(self):
+        return self.core.model_hash
+
+    def get_min_participants(self):
+        return self.core.min_participants
+
+    def submit_gradient(self, address, private_key, round_id, gradient_hash, proof, public_inputs):
+        self.core.submit(round_id, address, gradient_hash)
+
+    def transact(self, call, private_key):
+        self.core.update_model(*call.args)
+
+
+class FakeMonitor:
+    def __init__(self, w3, contract, read_cache=None):
+        self.core = CHAINS[max(CHAINS)]
+
+    def round_submissions(self, round_id, from_block):
+        return dict(self.core.submissions.get(round_id, {}))
+
+
+class TestSimulation(unittest.TestCase):
+    def test_participant_keys(self):
+        keys = participant_keys(3)
+        self.assertEqual(keys, participant_keys(3))
+        self.assertEqual(len(set(keys)), 3)
+        self.assertNotEqual(participant_keys(1, seed='other'), keys[:1])
+
+    @unittest.skipIf(not (HAVE_ETH_TESTER and HAVE_ARTIFACTS), "eth-tester or compiled contracts not available")
+    def test_full_rounds(self):
+        with Simulation(3, samples_per_participant=16, concurrency=3) as simulation:
+            initial_model_hash = simulation.admin_client.get_current_model()
+            first, second = simulation.run(2)
+            current_model_hash = simulation.admin_client.get_current_model()
+        for report in (first, second):
+            self.assertEqual(report['accepted'], 3, report['errors'])
+            self.assertTrue(report['finalized'])
+            self.assertGreater(report['rpc_calls'], 0)
+            self.assertEqual(report['ipfs_requests'].get('/api/v0/add'), 3 + 1)
+        self.assertEqual(second['round'], first['round'] + 1)
+        self.assertNotEqual(current_model_hash, initial_model_hash)
+        self.assertEqual(second['model_version'], 3)
+
+    def test_rounds_on_stub_deployment(self):
+        # The contracts are replaced by FakeCore, so this runs without
+        # compiled artifacts: participants, IPFS, aggregation and
+        # Orchestrator.publish_model() are the real ones
+        with mock.patch('server.simulation.LocalChain', FakeChain), \
+                mock.patch('server.simulation.BlockchainClient', FakeClient), \
+                mock.patch('server.simulation.get_contract', _fake_contract), \
+                mock.patch('server.orchestrator.RoundEventMonitor', FakeMonitor):
+            with Simulation(3, samples_per_participant=16, concurrency=3) as simulation:
+                core = CHAINS[simulation.admin_client.contract_address]
+                initial_model_hash = core.model_hash
+                first, second = simulation.run(2)
+        for report in (first, second):
+            self.assertEqual(report['accepted'], 3, report['errors'])
+            self.assertTrue(report['finalized'])
+            self.assertEqual(report['ipfs_requests'].get('/api/v0/add'), 3 + 1)
+        self.assertEqual((first['round'], second['round']), (1, 2))
+        self.assertEqual([update[0] for update in core.updates], [1, 2])
+        self.assertNotEqual(core.model_hash, initial_model_hash)
+        self.assertEqual(core.model_hash, core.updates[-1][1])
+        for _, _, accuracy in core.updates:
+            self.assertTrue(0 <= accuracy <= 10000)
+        self.assertEqual(second['model_version'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
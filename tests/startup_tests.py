@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import gc
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import weakref
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client import contracts
+from client.lazy import LazyModule, import_times
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ABI = [{"type": "function", "name": "roundId", "stateMutability": "view", "inputs": [],
+        "outputs": [{"name": "", "type": "uint256"}]}]
+
+
+class TestContractCache(unittest.TestCase):
+    def setUp(self):
+        self.build_dir = tempfile.mkdtemp()
+        self._env = os.environ.get('CONTRACTS_BUILD_DIR')
+        os.environ['CONTRACTS_BUILD_DIR'] = self.build_dir
+        self._write('FedChainCore', ABI)
+        contracts.clear_cache()
+
+    def tearDown(self):
+        if self._env is None:
+            del os.environ['CONTRACTS_BUILD_DIR']
+        else:
+            os.environ['CONTRACTS_BUILD_DIR'] = self._env
+        contracts.clear_cache()
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+
+    def _write(self, name, abi):
+        with open(os.path.join(self.build_dir, f"{name}.json"), 'w') as f:
+            json.dump({'contractName': name, 'abi': abi, 'bytecode': '0x' + '00' * 1024}, f)
+
+    def test_abi_parsed_once(self):
+        abi = contracts.load_abi('FedChainCore')
+        self.assertEqual(abi, ABI)
+        os.remove(os.path.join(self.build_dir, 'FedChainCore.json'))
+        self.assertIs(contracts.load_abi('FedChainCore'), abi)
+
+    def test_bundle_replaces_artifacts(self):
+        path, names = contracts.build_bundle()
+        self.assertEqual(names, ['FedChainCore'])
+        os.remove(os.path.join(self.build_dir, 'FedChainCore.json'))
+        contracts.clear_cache()
+        self.assertEqual(contracts.load_abi('FedChainCore'), ABI)
+
+    def test_newer_artifact_wins_over_bundle(self):
+        path, _ = contracts.build_bundle()
+        os.utime(path, (time.time() - 60, time.time() - 60))
+        updated = ABI + [{"type": "function", "name": "minParticipants", "stateMutability": "view",
+                          "inputs": [], "outputs": [{"name": "", "type": "uint256"}]}]
+        self._write('FedChainCore', updated)
+        contracts.clear_cache()
+        self.assertEqual(contracts.load_abi('FedChainCore'), updated)
+
+    def test_contracts_do_not_keep_web3_alive(self):
+        try:
+            from web3 import Web3, EthereumTesterProvider
+        except ImportError:
+            self.skipTest("web3 is not installed")
+        w3 = Web3(EthereumTesterProvider())
+        contract = contracts.get_contract(w3, 'FedChainCore', w3.eth.accounts[0])
+        self.assertIs(contract.abi, contracts.load_abi('FedChainCore'))
+        ref = weakref.ref(w3)
+        del w3, contract
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_module_loaded_on_first_use(self):
+        module = LazyModule('colorsys')
+        self.assertIn('not loaded', repr(module))
+        self.assertEqual(module.rgb_to_hsv(0, 0, 0), (0.0, 0.0, 0.0))
+        self.assertIn('colorsys', import_times)
+
+    def test_entry_points_skip_heavy_imports(self):
+        code = (
+            "import sys, client_node, server.orchestrator\n"
+            "print(','.join(m for m in ('tensorflow', 'keras', 'sklearn', 'web3') if m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), '')
+
+if __name__ == '__main__':
+    unittest.main()
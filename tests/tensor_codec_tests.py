@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import server modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.tensor_codec import encode_tensors, decode_tensors, is_tensor_container
+
+class TestTensorCodec(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.tensors = [
+            rng.standard_normal((3, 3, 1, 32)).astype(np.float32),
+            rng.standard_normal(32).astype(np.float32),
+            rng.standard_normal((5, 7)).astype(np.float64),
+            np.zeros((0,), dtype=np.float32),
+            np.arange(10, dtype=np.int8)
+        ]
+
+    def test_round_trip(self):
+        data = encode_tensors(self.tensors)
+        self.assertTrue(is_tensor_container(data))
+        decoded = decode_tensors(data)
+        self.assertEqual(len(decoded), len(self.tensors))
+        for original, restored in zip(self.tensors, decoded):
+            self.assertEqual(original.dtype, restored.dtype)
+            self.assertEqual(original.shape, restored.shape)
+            np.testing.assert_array_equal(original, restored)
+
+    def test_decode_is_zero_copy(self):
+        data = bytearray(encode_tensors(self.tensors))
+        decoded = decode_tensors(data)
+        self.assertTrue(np.shares_memory(decoded[0], np.frombuffer(data, dtype=np.uint8)))
+
+    def test_big_endian_input_is_stored_little_endian(self):
+        tensor = np.arange(6, dtype='>f4').reshape(2, 3)
+        decoded = decode_tensors(encode_tensors([tensor]))[0]
+        self.assertEqual(decoded.dtype.str, '<f4')
+        np.testing.assert_array_equal(decoded, tensor)
+
+    def test_meta_round_trip(self):
+        data = encode_tensors(self.tensors[:1], meta={'round': 3})
+        _, meta = decode_tensors(data, with_meta=True)
+        self.assertEqual(meta, {'round': 3})
+
+    def test_rejects_invalid_input(self):
+        with self.assertRaises(ValueError):
+            decode_tensors(b'[[0.1, 0.2]]')
+        with self.assertRaises(ValueError):
+            decode_tensors(encode_tensors(self.tensors)[:-100])
+        with self.assertRaises(ValueError):
+            encode_tensors([np.array(['a'], dtype=object)])
+
+if __name__ == '__main__':
+    unittest.main()
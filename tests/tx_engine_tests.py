@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from web3 import Web3, EthereumTesterProvider
+    import eth_tester  # noqa: F401
+except ImportError:
+    Web3 = None
+
+from client.tx_engine import TransactionEngine, raw_transaction
+
+
+@unittest.skipIf(Web3 is None, "web3 with eth-tester is not installed")
+class TestTransactionEngine(unittest.TestCase):
+    def setUp(self):
+        self.w3 = Web3(EthereumTesterProvider())
+        self.account = self.w3.eth.account.create()
+        tx_hash = self.w3.eth.send_transaction({
+            'from': self.w3.eth.accounts[0],
+            'to': self.account.address,
+            'value': 10 ** 18
+        })
+        self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        self.recipient = self.w3.eth.accounts[1]
+        self.engine = TransactionEngine(self.w3, poll_interval=0.01)
+
+    def _transfer(self):
+        return {'to': self.recipient, 'value': 1000}
+
+    def test_pipelined_sends(self):
+        tx_hashes = [self.engine.send(self._transfer(), self.account.key) for _ in range(5)]
+        receipts = self.engine.wait(tx_hashes)
+
+        self.assertTrue(all(r['status'] == 1 for r in receipts))
+        nonces = [self.w3.eth.get_transaction(h)['nonce'] for h in tx_hashes]
+        self.assertEqual(nonces, list(range(5)))
+        self.assertEqual(self.engine.stats['confirmed'], 5)
+
+    def test_estimates_and_fees_are_cached(self):
+        for _ in range(4):
+            self.engine.transact(self._transfer(), self.account.key)
+        self.assertEqual(self.engine.stats['gas_estimates'], 1)
+        # Fees are refreshed once a receipt from a newer block is seen
+        self.assertLessEqual(self.engine.stats['fee_fetches'], 4)
+
+        # Without newer receipts the fee stays cached for the whole batch
+        self.engine.fee_ttl = 3600
+        self.engine.gas_price()
+        fetches = self.engine.stats['fee_fetches']
+        tx_hashes = [self.engine.send(self._transfer(), self.account.key) for _ in range(3)]
+        self.assertEqual(self.engine.stats['fee_fetches'], fetches)
+        self.engine.wait(tx_hashes)
+
+    def test_nonce_resync_after_external_transaction(self):
+        self.engine.transact(self._transfer(), self.account.key)
+
+        # Spend the next nonce behind the engine's back
+        tx = dict(self._transfer(), nonce=1, gas=21000, gasPrice=self.w3.eth.gas_price, chainId=self.w3.eth.chain_id)
+        self.w3.eth.send_raw_transaction(raw_transaction(self.account.sign_transaction(tx)))
+
+        with self.assertRaises(Exception):
+            self.engine.send(self._transfer(), self.account.key)
+        receipt = self.engine.transact(self._transfer(), self.account.key)
+        self.assertEqual(receipt['status'], 1)
+        self.assertEqual(self.engine.stats['nonce_resyncs'], 1)
+
+    def test_reverted_transaction_raises(self):
+        # A contract whose code is PUSH1 0 PUSH1 0 REVERT
+        deploy = self.engine.transact({'data': '0x6460006000fd6000526005601bf3'}, self.account.key, gas=100000)
+        reverting = {'to': deploy['contractAddress'], 'value': 0}
+
+        with self.assertRaises(RuntimeError):
+            self.engine.transact(reverting, self.account.key, gas=50000)
+        # wait() still hands back the receipt for callers that check it
+        receipt = self.engine.wait([self.engine.send(reverting, self.account.key, gas=50000)])[0]
+        self.assertEqual(receipt['status'], 0)
+        self.assertEqual(self.engine.stats['failed'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 pragma circom 2.0.0;
 
-include "circomlib/poseidon.circom";
+include "poseidon_chain.circom";
 
 template GradientVerification() {
     // Public inputs
@@ -12,8 +12,8 @@ template GradientVerification() {
     signal input gradient[100];
     
     // Compute hashes
-    component modelHasher = Poseidon(100);
-    component gradientHasher = Poseidon(100);
+    component modelHasher = PoseidonChain(100);
+    component gradientHasher = PoseidonChain(100);
     
     for (var i = 0; i < 100; i++) {
         modelHasher.inputs[i] <== model[i];
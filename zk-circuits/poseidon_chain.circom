@@ -0,0 +1,23 @@
+pragma circom 2.0.0;
+
+include "circomlib/poseidon.circom";
+
+// Hash of n inputs as a chain of 2-input Poseidon hashes:
+// h = Poseidon(in[0], in[1]), then h = Poseidon(h, in[i]) for i >= 2.
+// circomlib's Poseidon takes at most 16 inputs, so Poseidon(100) does not compile.
+template PoseidonChain(n) {
+    signal input inputs[n];
+    signal output out;
+
+    component hashers[n - 1];
+    hashers[0] = Poseidon(2);
+    hashers[0].inputs[0] <== inputs[0];
+    hashers[0].inputs[1] <== inputs[1];
+    for (var i = 1; i < n - 1; i++) {
+        hashers[i] = Poseidon(2);
+        hashers[i].inputs[0] <== hashers[i - 1].out;
+        hashers[i].inputs[1] <== inputs[i + 1];
+    }
+
+    out <== hashers[n - 2].out;
+}
@@ -1,6 +1,6 @@
 pragma circom 2.0.0;
 
-include "circomlib/poseidon.circom";
+include "poseidon_chain.circom";
 
 template TrainingVerification() {
     // Public inputs
@@ -14,8 +14,8 @@ template TrainingVerification() {
     signal input trainingData[1000];  // Simplified: assume 1000 data points
     
     // Compute hashes
-    component oldModelHasher = Poseidon(100);
-    component newModelHasher = Poseidon(100);
+    component oldModelHasher = PoseidonChain(100);
+    component newModelHasher = PoseidonChain(100);
     
     for (var i = 0; i < 100; i++) {
         oldModelHasher.inputs[i] <== oldModel[i];